@@ -0,0 +1,100 @@
+"""Compare the size and the serialization time of the json output layouts
+
+The output is generated: every reviewer writes several of the reviews and every
+profile has a list of the latest reviews of the reviewer, like on Amazon.
+"""
+from functools import partial
+import json
+from time import perf_counter
+from typing import Any, Dict
+
+from amarps.records import collect_profiles, LAYOUTS, Profile, Review, to_json
+import click
+
+
+def _create_output(
+    num_reviews: int, reviews_per_profile: int, profile_reviews: int
+) -> Dict[str, Any]:
+    profiles = [
+        Profile(
+            {
+                "profile_name": f"Name {i}",
+                "profile_influence": i,
+                "profile_num_reviews": profile_reviews,
+                "profile_image": True,
+                "profile_reviews": [
+                    {
+                        "body": "Body of a review on the profile " * 10,
+                        "date": "2023/01/03",
+                        "found_helpful": j,
+                        "rating": 1 + j % 5,
+                        "review_link": f"https://www.amazon.com/review/{i}-{j}",
+                        "title": f"Title {j}",
+                        "verified_purchase": True,
+                    }
+                    for j in range(profile_reviews)
+                ],
+            }
+        )
+        for i in range(num_reviews // reviews_per_profile + 1)
+    ]
+    reviews = []
+    for i in range(num_reviews):
+        review = Review(
+            {
+                "body": "Body of a review " * 20,
+                "date": "2023/01/03",
+                "found_helpful": i,
+                "profile_link": f"https://www.amazon.com/profile/{i % len(profiles)}",
+                "rating": 1 + i % 5,
+                "title": f"Title {i}",
+                "verified_purchase": True,
+                "url": f"https://www.amazon.com/product-reviews/{i // 10}",
+            }
+        )
+        review.profile = profiles[i % len(profiles)]
+        reviews.append(review)
+    return {"product_title": "Product", "reviews": reviews}
+
+
+@click.command()
+@click.option(
+    "--reviews",
+    help="Number of reviews",
+    type=click.IntRange(min=1),
+    default=10000,
+    show_default=True,
+)
+@click.option(
+    "--reviews-per-profile",
+    help="Number of reviews written by each reviewer",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+)
+@click.option(
+    "--profile-reviews",
+    help="Number of reviews listed on each profile",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+)
+def main(reviews: int, reviews_per_profile: int, profile_reviews: int) -> None:
+    """Report the output size and the time of json.dumps for every layout"""
+    data = _create_output(reviews, reviews_per_profile, profile_reviews)
+    for layout in LAYOUTS:
+        inline_profiles = layout == "inline"
+        start = perf_counter()
+        output = data
+        if not inline_profiles:
+            output = {**data, "profiles": collect_profiles(data["reviews"])}
+        text = json.dumps(
+            output, default=partial(to_json, inline_profiles=inline_profiles)
+        )
+        elapsed = perf_counter() - start
+        size = len(text) / 2**20
+        click.echo(f"{layout:<10}{size:>8.1f} MiB{elapsed * 1000:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure the startup time of the command `amarps`
+
+The import time is the time to run `--help` and `--version`, which is also paid
+for invalid arguments. The time to the first request is measured with a local
+HTTP server answering the preflight request of a product with 404, so neither a
+browser nor network access is needed.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import median
+import subprocess
+import sys
+from threading import Event, Thread
+from time import perf_counter
+from typing import Callable, List, Optional
+
+import click
+
+
+HEAVY_MODULES = ("dateparser", "requests", "selectorlib", "selenium", "seleniumwire")
+
+
+def _run(*args: str) -> None:
+    subprocess.run(
+        [sys.executable, *args],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _measure(function: Callable[[], Optional[float]], runs: int) -> float:
+    timings: List[float] = []
+    for _ in range(runs):
+        start = perf_counter()
+        elapsed = function()
+        timings.append(perf_counter() - start if elapsed is None else elapsed)
+    return median(timings)
+
+
+def _loaded_heavy_modules() -> List[str]:
+    code = (
+        "import sys, amarps.main; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    return output.split()
+
+
+def _time_to_first_request() -> float:
+    requested = Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.set()
+            self.send_error(404)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/product-reviews/B000000000/"
+    try:
+        start = perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "amarps", "--preflight", url],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if not requested.wait(60):
+            raise RuntimeError("amarps did not send a request")
+        elapsed = perf_counter() - start
+        process.wait()
+        return elapsed
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@click.command()
+@click.option(
+    "--runs",
+    help="Number of runs of each measurement, the median is reported",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+)
+def main(runs: int) -> None:
+    """Report the median startup times of the command amarps in milliseconds"""
+    measurements = {
+        "python": lambda: _run("-c", "pass"),
+        "import amarps.main": lambda: _run("-c", "import amarps.main"),
+        "amarps --help": lambda: _run("-m", "amarps", "--help"),
+        "amarps --version": lambda: _run("-m", "amarps", "--version"),
+        "time to first request": _time_to_first_request,
+    }
+    for name, function in measurements.items():
+        click.echo(f"{name:<24}{_measure(function, runs) * 1000:>8.0f} ms")
+    click.echo(f"heavy modules imported:   {' '.join(_loaded_heavy_modules())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from nox_poetry import Session, session
 
 
 nox.options.sessions = "lint", "mypy", "tests"
-LOCATIONS = "src", "tests", "noxfile.py"
+LOCATIONS = "src", "tests", "benchmarks", "noxfile.py"
 
 
 @session(python=["3.8", "3.9", "3.10", "3.11"])
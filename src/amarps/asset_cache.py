@@ -0,0 +1,140 @@
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from threading import get_ident, Lock
+from typing import Any, Dict, Final, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+
+MAX_SIZE: Final = 256 * 2**20
+ASSET_HOSTS: Final = ("media-amazon.com", "ssl-images-amazon.com")
+ASSET_EXTENSIONS: Final = (
+    ".css",
+    ".gif",
+    ".jpg",
+    ".js",
+    ".png",
+    ".svg",
+    ".webp",
+    ".woff",
+    ".woff2",
+)
+CACHE_HEADER: Final = "X-Amarps-Cache"
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_static_asset(url: str) -> bool:
+    """Whether the URL points to an immutable asset on the CDN of Amazon, the URLs
+    of these assets change with their content
+    """
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    return host.endswith(ASSET_HOSTS) and parsed.path.lower().endswith(
+        ASSET_EXTENSIONS
+    )
+
+
+Asset = Tuple[int, Dict[str, str], bytes]
+
+
+class AssetCache:
+    """Disk cache of static assets keyed by URL for seleniumwire interceptors
+
+    The least recently used assets are evicted when the cache exceeds `max_size`
+    bytes. The usage order survives restarts by means of the file modification
+    times. Each asset is stored in one file: a line of JSON with its status and
+    headers followed by the body as received, so a compressed body keeps its
+    Content-Encoding.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_size: int = MAX_SIZE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        files = sorted(self.directory.glob("*.asset"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            self._sizes[path.stem] = path.stat().st_size
+        self.size = sum(self._sizes.values())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.asset"
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[Asset]:
+        key = self._key(url)
+        with self._lock:
+            if key not in self._sizes:
+                self.misses += 1
+                return None
+            self._sizes.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            meta, body = path.read_bytes().split(b"\n", 1)
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read cached {url}: {e}")
+            return None
+        data = json.loads(meta)
+        return data["status"], data["headers"], body
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        meta = json.dumps({"url": url, "status": status, "headers": headers})
+        content = meta.encode() + b"\n" + body
+        if len(content) > self.max_size:
+            return
+        key = self._key(url)
+        path = self._path(key)
+        tmp_path = self.directory / f"{key}.{os.getpid()}-{get_ident()}.tmp"
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+        with self._lock:
+            self.size += len(content) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(content)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self.max_size:
+            key, size = self._sizes.popitem(last=False)
+            self.size -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def request_interceptor(self, request: Any) -> None:
+        """Answer requests of cached static assets without network access"""
+        if request.method != "GET" or not is_static_asset(request.url):
+            return
+        asset = self.get(request.url)
+        if asset is not None:
+            status, headers, body = asset
+            request.create_response(
+                status_code=status, headers={**headers, CACHE_HEADER: "hit"}, body=body
+            )
+
+    def response_interceptor(self, request: Any, response: Any) -> None:
+        """Store the responses of static assets"""
+        if (
+            request.method != "GET"
+            or response.status_code != 200
+            or CACHE_HEADER in response.headers
+            or "no-store" in response.headers.get("Cache-Control", "")
+            or not is_static_asset(request.url)
+        ):
+            return
+        self.put(
+            request.url, response.status_code, dict(response.headers), response.body
+        )
@@ -0,0 +1,91 @@
+import logging
+from time import monotonic
+from typing import Callable, Dict, Final, List, Optional, Tuple
+
+from .records import Review
+
+
+logger = logging.getLogger(__name__)
+
+
+def _found_helpful(review: Review, is_cached: bool) -> float:
+    found_helpful = review.get("found_helpful")
+    return found_helpful if isinstance(found_helpful, int) else 0
+
+
+def _verified_purchase(review: Review, is_cached: bool) -> float:
+    return float(review.get("verified_purchase") is True)
+
+
+def _rating_extremes(review: Review, is_cached: bool) -> float:
+    rating = review.get("rating")
+    return abs(rating - 3) if isinstance(rating, int) else 0
+
+
+def _uncached(review: Review, is_cached: bool) -> float:
+    return float(not is_cached)
+
+
+PRIORITY_CRITERIA: Final[Dict[str, Callable[[Review, bool], float]]] = {
+    "found_helpful": _found_helpful,
+    "verified_purchase": _verified_purchase,
+    "rating_extremes": _rating_extremes,
+    "uncached": _uncached,
+}
+
+
+def sort_by_priority(
+    reviews: List[Review], criteria: List[str], is_cached: Callable[[str], bool]
+) -> List[Review]:
+    """Sort reviews by the criteria, the most valuable first
+
+    Later criteria only break ties of earlier ones, the order of reviews with the
+    same priority is kept.
+    """
+    for criterion in criteria:
+        if criterion not in PRIORITY_CRITERIA:
+            raise ValueError(f"Invalid priority criterion: {criterion}")
+
+    def priority(review: Review) -> Tuple[float, ...]:
+        profile_link = review.get("profile_link")
+        cached = profile_link is not None and is_cached(profile_link)
+        return tuple(-PRIORITY_CRITERIA[c](review, cached) for c in criteria)
+
+    return sorted(reviews, key=priority)
+
+
+class Budget:
+    """Limit the number of requests and the runtime of a run"""
+
+    def __init__(
+        self,
+        max_requests: Optional[int] = None,
+        max_runtime: Optional[float] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.max_requests = max_requests
+        self.max_runtime = max_runtime
+        self._clock = clock
+        self.requests = 0
+        self._start_time = clock()
+        self._is_logged = False
+
+    def spend(self) -> None:
+        self.requests += 1
+
+    @property
+    def runtime(self) -> float:
+        return self._clock() - self._start_time
+
+    @property
+    def exhausted(self) -> bool:
+        exhausted = (
+            self.max_requests is not None and self.requests >= self.max_requests
+        ) or (self.max_runtime is not None and self.runtime >= self.max_runtime)
+        if exhausted and not self._is_logged:
+            logger.warning(
+                f"Budget exhausted after {self.requests} requests "
+                f"and {self.runtime:.0f} seconds"
+            )
+            self._is_logged = True
+        return exhausted
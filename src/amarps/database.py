@@ -0,0 +1,199 @@
+from pathlib import Path
+import sqlite3
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .records import Record, Review
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    product_title TEXT,
+    average_rating REAL,
+    num_ratings INTEGER
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    profile_name TEXT,
+    profile_influence INTEGER,
+    profile_num_reviews INTEGER,
+    profile_image INTEGER,
+    profile_error TEXT
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    profile_id INTEGER REFERENCES profiles(id),
+    url TEXT NOT NULL,
+    title TEXT,
+    body TEXT,
+    date TEXT,
+    rating INTEGER,
+    found_helpful INTEGER,
+    verified_purchase INTEGER
+);
+CREATE TABLE IF NOT EXISTS profile_reviews (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles(id),
+    review_link TEXT,
+    title TEXT,
+    body TEXT,
+    date TEXT,
+    rating INTEGER,
+    found_helpful INTEGER,
+    verified_purchase INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS reviews_key
+    ON reviews(product_id, IFNULL(profile_id, 0), IFNULL(title, ''), IFNULL(date, ''));
+CREATE INDEX IF NOT EXISTS reviews_product_id ON reviews(product_id);
+CREATE INDEX IF NOT EXISTS reviews_profile_id ON reviews(profile_id);
+CREATE INDEX IF NOT EXISTS profile_reviews_profile_id ON profile_reviews(profile_id);
+"""
+
+# the first unique index of reviews let reviews without title or date be inserted
+# again on every run, these duplicates are deleted before the new index is created
+_MIGRATE_REVIEWS_UNIQUE = """
+DELETE FROM reviews WHERE id NOT IN (
+    SELECT MAX(id) FROM reviews
+    GROUP BY product_id, IFNULL(profile_id, 0), IFNULL(title, ''), IFNULL(date, '')
+);
+DROP INDEX reviews_unique;
+"""
+
+_PRODUCT_FIELDS = ["product_title", "average_rating", "num_ratings"]
+_PROFILE_FIELDS = [
+    "profile_name",
+    "profile_influence",
+    "profile_num_reviews",
+    "profile_image",
+    "profile_error",
+]
+_PROFILE_DATA_FIELDS = [f for f in _PROFILE_FIELDS if f != "profile_error"]
+_REVIEW_FIELDS = [
+    "title",
+    "body",
+    "date",
+    "rating",
+    "found_helpful",
+    "verified_purchase",
+]
+
+
+def _get_values(data: Union[Dict[str, Any], Record], fields: List[str]) -> List[Any]:
+    return [data.get(f) for f in fields]
+
+
+class Database:
+    """SQLite sink storing products, reviews and profiles in normalized tables
+
+    The connection may be used from any thread, e.g. by `Scraper.iter_reviews`
+    which extracts on a background thread, the writes are serialized by a lock.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._lock = Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        if self._has_index("reviews_unique"):
+            self._connection.executescript(_MIGRATE_REVIEWS_UNIQUE)
+        self._connection.executescript(_SCHEMA)
+
+    def _has_index(self, name: str) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", [name]
+        ).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _upsert_product(self, url: str, data: Dict[str, Any]) -> int:
+        self._connection.execute(
+            "INSERT INTO products (url, product_title, average_rating, num_ratings) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+            "product_title=excluded.product_title, "
+            "average_rating=excluded.average_rating, "
+            "num_ratings=excluded.num_ratings",
+            [url, *_get_values(data, _PRODUCT_FIELDS)],
+        )
+        return self._get_id("products", url)
+
+    def _upsert_profile(self, url: str, data: Dict[str, Any]) -> int:
+        if not any(f in data for f in [*_PROFILE_DATA_FIELDS, "profile_reviews"]):
+            # a failed download does not replace the data of an earlier run
+            no_data = " AND ".join(
+                f"profiles.{f} IS NULL" for f in _PROFILE_DATA_FIELDS
+            )
+            self._connection.execute(
+                "INSERT INTO profiles (url, profile_error) VALUES (?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET profile_error=excluded.profile_error "
+                f"WHERE excluded.profile_error IS NOT NULL AND {no_data}",
+                [url, data.get("profile_error")],
+            )
+            return self._get_id("profiles", url)
+
+        columns = ", ".join(_PROFILE_FIELDS)
+        updates = ", ".join(f"{f}=excluded.{f}" for f in _PROFILE_FIELDS)
+        self._connection.execute(
+            f"INSERT INTO profiles (url, {columns}) "
+            f"VALUES (?{', ?' * len(_PROFILE_FIELDS)}) "
+            f"ON CONFLICT(url) DO UPDATE SET {updates}",
+            [url, *_get_values(data, _PROFILE_FIELDS)],
+        )
+        profile_id = self._get_id("profiles", url)
+
+        if data.get("profile_reviews") is not None:
+            self._connection.execute(
+                "DELETE FROM profile_reviews WHERE profile_id = ?", [profile_id]
+            )
+            self._connection.executemany(
+                "INSERT INTO profile_reviews "
+                f"(profile_id, review_link, {', '.join(_REVIEW_FIELDS)}) "
+                f"VALUES (?, ?{', ?' * len(_REVIEW_FIELDS)})",
+                [
+                    [profile_id, r.get("review_link"), *_get_values(r, _REVIEW_FIELDS)]
+                    for r in data["profile_reviews"]
+                ],
+            )
+        return profile_id
+
+    def _get_id(self, table: str, url: str) -> int:
+        row = self._connection.execute(
+            f"SELECT id FROM {table} WHERE url = ?", [url]
+        ).fetchone()
+        return row[0]
+
+    def add_product(self, url: str, data: Dict[str, Any]) -> None:
+        with self._lock, self._connection:
+            self._upsert_product(url, data)
+
+    def add_profile(self, url: str, data: Dict[str, Any]) -> None:
+        with self._lock, self._connection:
+            self._upsert_profile(url, data)
+
+    def add_reviews(self, product_url: str, reviews: Iterable[Review]) -> None:
+        """Insert the reviews of one page together with their profiles at once"""
+        with self._lock, self._connection:
+            product_id = self._get_id("products", product_url)
+            rows = []
+            for r in reviews:
+                profile_id: Optional[int] = None
+                profile_link = r.get("profile_link")
+                if profile_link is not None:
+                    profile = r.get("profile")
+                    profile_id = self._upsert_profile(
+                        profile_link, {} if profile is None else profile.to_dict()
+                    )
+                rows.append(
+                    [product_id, profile_id, r.url, *_get_values(r, _REVIEW_FIELDS)]
+                )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO reviews "
+                f"(product_id, profile_id, url, {', '.join(_REVIEW_FIELDS)}) "
+                f"VALUES (?, ?, ?{', ?' * len(_REVIEW_FIELDS)})",
+                rows,
+            )
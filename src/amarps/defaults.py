@@ -0,0 +1,27 @@
+from typing import Final
+
+
+BROWSER: Final = "chrome"
+HAVE_BROWSER_HEADLESS: Final = False
+SCROLL_DEPTH_PROFILE_PAGE: Final = 2000
+SCROLL_DEPTH_REVIEWS_PAGE: Final = 2000
+CAPTCHA_TIMEOUT: Final = 600
+PAGE_LOAD_TIMEOUT: Final = 60
+NUM_TABS: Final = 1
+PARSE_WORKERS: Final = 0
+REVIEW_FIELDS: Final = (
+    "body",
+    "date",
+    "found_helpful",
+    "profile_link",
+    "rating",
+    "title",
+    "verified_purchase",
+)
+PROFILE_FIELDS: Final = (
+    "profile_name",
+    "profile_influence",
+    "profile_num_reviews",
+    "profile_image",
+    "profile_reviews",
+)
@@ -0,0 +1,260 @@
+import logging
+import os
+from pathlib import Path
+from signal import SIGKILL
+from threading import Event, Timer
+from typing import (
+    Callable,
+    Dict,
+    Final,
+    List,
+    Optional,
+    TYPE_CHECKING,
+    TypeVar,
+    Union,
+)
+
+from selenium.common.exceptions import WebDriverException
+
+from .defaults import PAGE_LOAD_TIMEOUT
+from .trace import span
+
+if TYPE_CHECKING:
+    from seleniumwire import webdriver
+
+
+BROWSERS: Final = ["chrome", "firefox"]
+SCRIPT_TIMEOUT: Final = 30
+MAX_RETRIES: Final = 2
+
+
+logger = logging.getLogger(__name__)
+
+Driver = Union["webdriver.Chrome", "webdriver.Firefox"]
+T = TypeVar("T")
+
+
+def init_browser_driver(
+    browser: str,
+    have_browser_headless: bool,
+    user_data_dir: Optional[Path] = None,
+    page_load_strategy: Optional[str] = None,
+) -> Driver:
+    """Start a browser, with user_data_dir it keeps its profile in this directory
+
+    With the page load strategy "none" page loads do not block, see `TabLoader`.
+    """
+    logger.debug(f"Init browser '{browser}'")
+
+    if browser == "chrome":
+        from selenium.webdriver.chrome.service import Service
+        from seleniumwire.webdriver import Chrome as BrowserDriver
+        from seleniumwire.webdriver import ChromeOptions as BrowserDriverOptions
+        from webdriver_manager.chrome import ChromeDriverManager as BrowserDriverManager
+    elif browser == "firefox":
+        from selenium.webdriver.firefox.service import Service
+        from seleniumwire.webdriver import Firefox as BrowserDriver
+        from seleniumwire.webdriver import FirefoxOptions as BrowserDriverOptions
+        from webdriver_manager.firefox import GeckoDriverManager as BrowserDriverManager
+    else:
+        raise ValueError(f"Invalid browser: {browser}")
+
+    options = BrowserDriverOptions()
+    options.set_capability("loggingPrefs", {"performance": "ALL"})
+    if have_browser_headless:
+        options.add_argument("--headless")
+    if page_load_strategy is not None:
+        options.page_load_strategy = page_load_strategy
+    if user_data_dir is not None and browser == "chrome":
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+    elif user_data_dir is not None:
+        options.add_argument("-profile")
+        options.add_argument(str(user_data_dir))
+
+    return BrowserDriver(
+        options=options,
+        service=Service(BrowserDriverManager().install()),
+    )
+
+
+def _get_child_pids(pid: int) -> List[int]:
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # the process name in brackets can contain spaces
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+def _get_process_tree(pid: int) -> List[int]:
+    """Get the PIDs of a process and all its descendants, only works on Linux"""
+    pids = [pid]
+    for p in pids:
+        pids.extend(_get_child_pids(p))
+    return pids
+
+
+def _get_rss(pid: int) -> int:
+    """Get the resident set size of a process in bytes, 0 if it is unknown"""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return 0
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def _get_service_pid(driver: Driver) -> Optional[int]:
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class DriverManager:
+    """Own the browser driver and replace it when it is worn out or stuck
+
+    The browser is recycled after `max_pages` pages or when the browser processes
+    use more than `max_rss` bytes. An action which takes longer than the page load
+    timeout or hangs completely is aborted, the browser replaced and the action
+    retried.
+    """
+
+    def __init__(
+        self,
+        create_driver: Callable[[], Driver],
+        max_pages: Optional[int] = None,
+        max_rss: Optional[int] = None,
+        page_load_timeout: float = PAGE_LOAD_TIMEOUT,
+        script_timeout: float = SCRIPT_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self._create_driver = create_driver
+        self.max_pages = max_pages
+        self.max_rss = max_rss
+        self.page_load_timeout = page_load_timeout
+        self.script_timeout = script_timeout
+        self.max_retries = max_retries
+        self._proxy: Optional[Dict[str, str]] = None
+        self._pages = 0
+        self._driver: Optional[Driver] = None
+
+    @property
+    def driver(self) -> Driver:
+        """The browser driver, the browser is only started when it is needed"""
+        if self._driver is None:
+            self._driver = self._start()
+        return self._driver
+
+    def start(self) -> None:
+        """Start the browser ahead of the first page load"""
+        self.driver
+
+    @property
+    def is_started(self) -> bool:
+        return self._driver is not None
+
+    @property
+    def proxy(self) -> Optional[Dict[str, str]]:
+        return self._proxy
+
+    @proxy.setter
+    def proxy(self, proxy: Dict[str, str]) -> None:
+        self._proxy = proxy
+        if self._driver is not None:
+            self._driver.proxy = proxy
+
+    def _start(self) -> Driver:
+        with span("start driver", "driver"):
+            driver = self._create_driver()
+        driver.set_page_load_timeout(self.page_load_timeout)
+        driver.set_script_timeout(self.script_timeout)
+        if self._proxy is not None:
+            driver.proxy = self._proxy
+        return driver
+
+    def _kill(self, driver: Driver, killed: Event) -> None:
+        """Kill the processes of a driver which does not respond anymore"""
+        logger.warning("Browser is stuck, kill it")
+        killed.set()
+        pid = _get_service_pid(driver)
+        if pid is None:
+            return
+        for p in reversed(_get_process_tree(pid)):
+            try:
+                os.kill(p, SIGKILL)
+            except OSError:
+                pass
+
+    def _quit(self) -> None:
+        if self._driver is None:
+            return
+        try:
+            self._driver.quit()
+        except Exception as e:
+            logger.warning(f"Failed to quit browser: {e}")
+        self._driver = None
+
+    def restart(self) -> None:
+        logger.info("Restart browser")
+        self._quit()
+        self._pages = 0
+        self._driver = self._start()
+
+    def close(self) -> None:
+        self._quit()
+
+    def get_rss(self) -> int:
+        if self._driver is None:
+            return 0
+        pid = _get_service_pid(self._driver)
+        if pid is None:
+            return 0
+        return sum(_get_rss(p) for p in _get_process_tree(pid))
+
+    def _is_worn_out(self) -> bool:
+        if self.max_pages is not None and self._pages >= self.max_pages:
+            logger.info(f"Browser loaded {self._pages} pages")
+            return True
+        if self.max_rss is not None:
+            rss = self.get_rss()
+            if rss > self.max_rss:
+                logger.info(f"Browser uses {rss / 2**20:.0f} MiB")
+                return True
+        return False
+
+    def run(self, action: Callable[[Driver], T], pages: int = 1) -> T:
+        """Run action which loads one page or the given number of pages, retry it
+        with a new browser if the browser times out or is stuck
+        """
+        if self._is_worn_out():
+            self.restart()
+        driver = self.driver
+
+        hang_timeout = 2 * self.page_load_timeout + self.script_timeout
+        attempt = 0
+        while True:
+            killed = Event()
+            watchdog = Timer(hang_timeout, self._kill, [driver, killed])
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                result = action(driver)
+                self._pages += pages
+                return result
+            except Exception as e:
+                is_stuck = isinstance(e, WebDriverException) or killed.is_set()
+                if not is_stuck or attempt == self.max_retries:
+                    raise
+                logger.warning(f"Browser failed, retry with a new one: {e}")
+            finally:
+                watchdog.cancel()
+            attempt += 1
+            self.restart()
+            driver = self.driver
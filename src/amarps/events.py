@@ -1,19 +1,68 @@
+from pathlib import Path
 from signal import getsignal, SIGINT, signal
-from threading import Event
+from threading import current_thread, Event, main_thread
+from time import monotonic
+from typing import Final, Union
+
+
+POLL_INTERVAL: Final = 1.0
 
 
 class WaitHandler:
-    def __init__(self):
-        self.original_sigint_handler = getsignal(SIGINT)
+    """Wait until the time is up or the waiting is resumed
+
+    The waiting is resumed by SIGINT, by creating the `resume_file` or by calling
+    `resume`. Signal handlers can only be set on the main thread, so on other
+    threads SIGINT is not handled.
+    """
+
+    def __init__(
+        self,
+        resume_file: Union[str, Path, None] = None,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        self.resume_file = None if resume_file is None else Path(resume_file)
+        self.poll_interval = poll_interval
         self.event = Event()
-        signal(SIGINT, self._stop)
+        self._handles_sigint = current_thread() is main_thread()
+        if self._handles_sigint:
+            self.original_sigint_handler = getsignal(SIGINT)
+            signal(SIGINT, self._stop)
 
     def __del__(self):
-        signal(SIGINT, self.original_sigint_handler)
+        if self._handles_sigint and current_thread() is main_thread():
+            signal(SIGINT, self.original_sigint_handler)
 
-    def wait(self, seconds: int):
-        self.event.wait(seconds)
+    def _is_resume_file_created(self) -> bool:
+        if self.resume_file is None or not self.resume_file.exists():
+            return False
+        self.resume_file.unlink()
+        return True
 
-    def _stop(self, _signalNumber, _):
-        self.event.set()
+    def _is_resumed(self) -> bool:
+        """Whether resume was called since the last resumed wait, consumes it"""
+        if not self.event.is_set():
+            return False
         self.event.clear()
+        return True
+
+    def wait(self, seconds: float) -> bool:
+        """Return whether the waiting was resumed before the time was up
+
+        A resume before the wait is kept and ends the next wait immediately.
+        """
+        deadline = monotonic() + seconds
+        while True:
+            if self._is_resumed() or self._is_resume_file_created():
+                return True
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+            timeout = remaining if self.resume_file is None else self.poll_interval
+            self.event.wait(min(remaining, timeout))
+
+    def resume(self) -> None:
+        self.event.set()
+
+    def _stop(self, _signalNumber, _):
+        self.resume()
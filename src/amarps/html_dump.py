@@ -0,0 +1,48 @@
+from collections import deque
+import gzip
+import json
+import logging
+from pathlib import Path
+import re
+from time import time
+from typing import Any, Deque, Dict, Final, Optional, Union
+
+
+BUFFER_SIZE: Final = 10
+
+
+logger = logging.getLogger(__name__)
+
+
+class HtmlPageBuffer:
+    """Keep the last HTML pages in memory and only write them on a failure
+
+    Each page is written compressed to its own file in `directory` together with
+    its URL, HTTP status and the reason for writing it.
+    """
+
+    def __init__(self, directory: Union[str, Path], size: int = BUFFER_SIZE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pages: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def add(self, url: str, status: Optional[int], html_page: str) -> None:
+        self._pages.append(
+            {"url": url, "status": status, "time": time(), "html": html_page}
+        )
+
+    def dump(self, reason: str) -> None:
+        if len(self._pages) == 0:
+            return
+        logger.info(f"Write {len(self._pages)} HTML pages, reason: {reason}")
+        while self._pages:
+            page = self._pages.popleft()
+            self._count += 1
+            name = re.sub(r"[^A-Za-z0-9]+", "_", page["url"])[-80:]
+            path = self.directory / f"{self._count:05}-{name}.json.gz"
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                json.dump({**page, "reason": reason}, f)
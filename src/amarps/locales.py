@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+from typing import Final, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+_INTEGER: Final = re.compile(r"-?\d+")
+
+
+def _guess_thousand_separator(number: str) -> str:
+    thousand_separator = "," if "," in number else "."
+    num_of_allowed_thousand_separators = int((len(number) - 1) / 4)
+    return number.replace(thousand_separator, "", num_of_allowed_thousand_separators)
+
+
+class Locale:
+    """Language specific texts and number formats of an Amazon marketplace
+
+    All regular expressions are compiled once. With guess_thousand_separator the
+    separator is guessed from each number and without languages dateparser detects
+    the language of each date, both is slower and only used for unknown domains.
+    """
+
+    def __init__(
+        self,
+        languages: Optional[List[str]],
+        thousand_separators: str,
+        decimal_separators: str,
+        one_words: Tuple[str, ...],
+        verified_purchase: Tuple[str, ...],
+        num_ratings: str,
+        found_helpful: str,
+        guess_thousand_separator: bool = False,
+    ):
+        self.languages = languages
+        self.one_words = one_words
+        self.verified_purchase = verified_purchase
+        self.guess_thousand_separator = guess_thousand_separator
+        self.thousand_separators = thousand_separators
+        separators = re.escape(thousand_separators)
+        self._integer = re.compile(rf"-?(?:\d{{1,3}}(?:[{separators}]\d{{3}})+|\d+)")
+        self._thousand_separator = re.compile(f"[{separators}]")
+        self._rating = re.compile(
+            rf"(\d+(?:[{re.escape(decimal_separators)}]\d+)?) "
+        )
+        self._verified_purchase = re.compile(
+            "|".join(re.escape(v) for v in verified_purchase)
+        )
+        self._num_ratings = re.compile(num_ratings)
+        self._found_helpful = re.compile(found_helpful)
+
+    def parse_integer(self, number: str) -> Optional[int]:
+        if self.guess_thousand_separator:
+            number = _guess_thousand_separator(number)
+            return int(number) if _INTEGER.fullmatch(number) else None
+        if not self._integer.fullmatch(number):
+            return None
+        return int(self._thousand_separator.sub("", number))
+
+    def parse_rating(self, rating: str) -> Optional[float]:
+        match = self._rating.match(rating)
+        if match is None:
+            return None
+        return float(match.group(1).replace(",", ".", 1))
+
+    def parse_num_ratings(self, num_ratings: str) -> Optional[int]:
+        match = self._num_ratings.match(num_ratings)
+        return None if match is None else self.parse_integer(match.group(1))
+
+    def parse_num_filtered_reviews(self, filter_info: str) -> Optional[int]:
+        """The number of reviews with a star filter, the last number of the filter
+        info, e.g. of "1,234 total ratings, 567 with reviews"
+        """
+        numbers = self._integer.findall(filter_info)
+        return self.parse_integer(numbers[-1]) if numbers else None
+
+    def parse_found_helpful(self, found_helpful: str) -> Optional[int]:
+        match = self._found_helpful.match(found_helpful)
+        if match is None:
+            return None
+        number = match.group(1)
+        if number.lower() in self.one_words:
+            return 1
+        return self.parse_integer(number)
+
+    def is_verified_purchase(self, verified_purchase: str) -> bool:
+        return self._verified_purchase.search(verified_purchase) is not None
+
+
+EN: Final = Locale(
+    ["en"],
+    ",",
+    ".",
+    ("one",),
+    ("Verified Purchase",),
+    r"(\S+) global",
+    r"(\S+) (?:person|people)",
+)
+DE: Final = Locale(
+    ["de"],
+    ".",
+    ",",
+    ("eine",),
+    ("Verifizierter Kauf",),
+    r"(\S+) (?:globale|Sternebewertungen)",
+    r"(\S+) Person",
+)
+FR: Final = Locale(
+    ["fr"],
+    " \xa0\u202f",
+    ",",
+    ("une",),
+    ("Achat vérifié",),
+    r"([\d \xa0\u202f]+) évaluations",
+    r"(\d[\d \xa0\u202f]*|\S+) personne",
+)
+IT: Final = Locale(
+    ["it"],
+    ".",
+    ",",
+    ("una",),
+    ("Acquisto verificato",),
+    r"(\S+) (?:valutazioni|recensioni)",
+    r"(\S+) person[ae]",
+)
+ES: Final = Locale(
+    ["es"],
+    ".",
+    ",",
+    ("una",),
+    ("Compra verificada",),
+    r"(\S+) (?:calificaciones|valoraciones)",
+    r"A (\S+) personas?",
+)
+_PACKS: Final = (EN, DE, FR, IT, ES)
+DEFAULT: Final = Locale(
+    None,
+    ",.",
+    ",.",
+    tuple(w for pack in _PACKS for w in pack.one_words),
+    tuple(v for pack in _PACKS for v in pack.verified_purchase),
+    r"(.+?) global",
+    r"(?:A )?(\S+) ",
+    guess_thousand_separator=True,
+)
+LOCALES: Final = {
+    "amazon.com": EN,
+    "amazon.co.uk": EN,
+    "amazon.ca": EN,
+    "amazon.com.au": EN,
+    "amazon.in": EN,
+    "amazon.de": DE,
+    "amazon.fr": FR,
+    "amazon.it": IT,
+    "amazon.es": ES,
+}
+
+
+def get_locale(url: str) -> Locale:
+    """Select the locale by the domain of the URL, the default for unknown ones"""
+    host = urlparse(url).hostname or ""
+    for domain, locale in LOCALES.items():
+        if host == domain or host.endswith("." + domain):
+            return locale
+    return DEFAULT
+
+
+_current_locale: ContextVar[Locale] = ContextVar("locale", default=DEFAULT)
+
+
+def current_locale() -> Locale:
+    return _current_locale.get()
+
+
+@contextmanager
+def use_locale(locale: Locale) -> Iterator[None]:
+    """Parse with the locale in the enclosed code, only in the current thread"""
+    token = _current_locale.set(locale)
+    try:
+        yield
+    finally:
+        _current_locale.reset(token)
@@ -1,25 +1,69 @@
+from functools import partial
 import json
 import logging
 import sys
-from typing import Dict, Optional
+from typing import Any, Callable, Collection, Dict, List, Optional
 
 import click
 import click_log
 
 from . import __version__
-from .scraper import (
+from .asset_cache import AssetCache, MAX_SIZE
+from .budget import PRIORITY_CRITERIA
+from .database import Database
+from .defaults import (
     BROWSER,
+    CAPTCHA_TIMEOUT,
     HAVE_BROWSER_HEADLESS,
-    logger as scrapper_logger,
-    Scraper,
+    NUM_TABS,
+    PAGE_LOAD_TIMEOUT,
+    PARSE_WORKERS,
+    PROFILE_FIELDS,
+    REVIEW_FIELDS,
     SCROLL_DEPTH_PROFILE_PAGE,
     SCROLL_DEPTH_REVIEWS_PAGE,
 )
+from .html_dump import BUFFER_SIZE, HtmlPageBuffer
+from .progress import logger as progress_logger, Progress
+from .proxies import ProxyPool
+from .records import collect_profiles, LAYOUTS, to_json
+from .retry import BACKOFF, MAX_ATTEMPTS
+from .sampling import PROFILE_FRACTION, Sample
+from .sessions import NUM_SESSIONS, SESSION_PAGES, SessionPool
+from .trace import start_tracing, stop_tracing, Tracer
 
 main_logger = logging.getLogger(__name__)
+# The scraper module is imported only when it is needed, as importing the browser
+# and parsing libraries slows down --help, --version and invalid arguments
+scrapper_logger = logging.getLogger(f"{__package__}.scraper")
 
 click_log.basic_config(scrapper_logger)
 click_log.basic_config(main_logger)
+click_log.basic_config(progress_logger)
+
+
+def _comma_separated(choices: Collection[str]) -> Callable:
+    """Create a click callback parsing a comma separated list of choices"""
+
+    def parse(
+        ctx: click.Context, param: click.Parameter, value: Optional[str]
+    ) -> Optional[List[str]]:
+        if value is None:
+            return None
+        items = [i.strip() for i in value.split(",") if i.strip()]
+        if not items or any(i not in choices for i in items):
+            raise click.BadParameter(
+                f"must be a comma separated list of {', '.join(choices)}"
+            )
+        return items
+
+    return parse
+
+
+def _write_trace(tracer: Tracer, path: str) -> None:
+    stop_tracing()
+    tracer.write(path)
+    main_logger.info(f"Wrote trace to {path}")
 
 
 def _get_command_parameters() -> Dict[str, str]:
@@ -55,6 +99,57 @@ def _get_command_parameters() -> Dict[str, str]:
     default=None,
     show_default=True,
 )
+@click.option(
+    "--preflight/--no-preflight",
+    help=(
+        "Download the first page without browser to skip products without "
+        "reviews and answer single pages without starting the browser"
+    ),
+    default=False,
+    show_default=True,
+)
+@click.option(
+    "--review-fields",
+    help=(
+        "Extract only these comma separated review fields, profile_link is always "
+        "added: " + ", ".join(REVIEW_FIELDS)
+    ),
+    callback=_comma_separated(REVIEW_FIELDS),
+)
+@click.option(
+    "--profile-fields",
+    help=(
+        "Extract only these comma separated profile fields: "
+        + ", ".join(PROFILE_FIELDS)
+    ),
+    callback=_comma_separated(PROFILE_FIELDS),
+)
+@click.option(
+    "--sample",
+    help=(
+        "Download only this many randomly drawn review pages, the reviews are "
+        "marked with their sampling weights"
+    ),
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--sample-seed",
+    help="Seed of the random generator drawing the sample",
+    type=int,
+)
+@click.option(
+    "--stratify/--no-stratify",
+    help="Draw the sampled pages proportionally from each star rating",
+    default=True,
+    show_default=True,
+)
+@click.option(
+    "--sample-profiles",
+    help="Fraction of the reviewers of the sample whose profile is downloaded",
+    type=click.FloatRange(min=0, max=1),
+    default=PROFILE_FRACTION,
+    show_default=True,
+)
 @click.option(
     "--output",
     "-o",
@@ -63,6 +158,22 @@ def _get_command_parameters() -> Dict[str, str]:
     default=sys.stdout,
     show_default=True,
 )
+@click.option(
+    "--layout",
+    help=(
+        "Layout of the json output: inline copies the profile into each of its "
+        "reviews, profiles stores each profile once in the top-level map profiles "
+        "keyed by the profile_link of the reviews"
+    ),
+    type=click.Choice(LAYOUTS),
+    default=LAYOUTS[0],
+    show_default=True,
+)
+@click.option(
+    "--output-db",
+    help="Additionally write the results into this SQLite database",
+    type=click.Path(dir_okay=False, writable=True),
+)
 @click.option(
     "--profile-link/--no-profile-link",
     help="The given link points to a profile and not a product",
@@ -75,6 +186,21 @@ def _get_command_parameters() -> Dict[str, str]:
     help="Save the last accessed html page (useful for debugging)",
     type=click.File("w"),
 )
+@click.option(
+    "--html-dump-dir",
+    help=(
+        "Keep the last accessed html pages in memory and write them compressed to "
+        "this directory when an error occurs (useful for debugging)"
+    ),
+    type=click.Path(file_okay=False, writable=True),
+)
+@click.option(
+    "--html-dump-size",
+    help="Number of html pages kept in memory for --html-dump-dir",
+    type=click.IntRange(min=1),
+    default=BUFFER_SIZE,
+    show_default=True,
+)
 @click.option(
     "--browser",
     "-b",
@@ -90,6 +216,149 @@ def _get_command_parameters() -> Dict[str, str]:
     default=HAVE_BROWSER_HEADLESS,
     show_default=True,
 )
+@click.option(
+    "--proxies",
+    help="File with one proxy URL per line, requests use the healthiest proxy",
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--session-dir",
+    help=(
+        "Keep browser profiles and cookies in this directory and reuse them "
+        "across pages and runs instead of deleting the cookies before every page"
+    ),
+    type=click.Path(file_okay=False, writable=True),
+)
+@click.option(
+    "--sessions",
+    help="Number of persistent sessions in --session-dir used in rotation",
+    type=click.IntRange(min=1),
+    default=NUM_SESSIONS,
+    show_default=True,
+)
+@click.option(
+    "--session-pages",
+    help="Switch to the next persistent session after this many pages",
+    type=click.IntRange(min=1),
+    default=SESSION_PAGES,
+    show_default=True,
+)
+@click.option(
+    "--asset-cache-dir",
+    help=(
+        "Keep static assets like scripts and styles in this directory, the "
+        "browser loads them from there instead of the network"
+    ),
+    type=click.Path(file_okay=False, writable=True),
+)
+@click.option(
+    "--asset-cache-size",
+    help="Maximum size of the --asset-cache-dir (in MiB)",
+    type=click.IntRange(min=1),
+    default=MAX_SIZE // 2**20,
+    show_default=True,
+)
+@click.option(
+    "--tabs",
+    help=(
+        "Load this many review pages or profiles at the same time in the tabs of "
+        "one browser"
+    ),
+    type=click.IntRange(min=1),
+    default=NUM_TABS,
+    show_default=True,
+)
+@click.option(
+    "--parse-workers",
+    help=(
+        "Extract the downloaded pages in this many processes while the browser "
+        "loads the next pages, 0 extracts them in the browser thread"
+    ),
+    type=click.IntRange(min=0),
+    default=PARSE_WORKERS,
+    show_default=True,
+)
+@click.option(
+    "--max-pages-per-browser",
+    help="Replace the browser with a new one after this many pages",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-browser-memory",
+    help="Replace the browser with a new one when it uses more memory (in MiB)",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--page-load-timeout",
+    help="Time in seconds after which a page load is aborted and retried",
+    type=click.FloatRange(min=0, min_open=True),
+    default=PAGE_LOAD_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--retries",
+    help="How often failed review pages and profiles are retried at the end",
+    type=click.IntRange(min=0),
+    default=MAX_ATTEMPTS,
+    show_default=True,
+)
+@click.option(
+    "--retry-backoff",
+    help="Seconds to wait before the 1st retry, doubled for every further retry",
+    type=click.FloatRange(min=0),
+    default=BACKOFF,
+    show_default=True,
+)
+@click.option(
+    "--max-requests",
+    help="Stop downloading after this many page requests",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-runtime",
+    help="Stop downloading after this many seconds",
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--profile-priority",
+    help=(
+        "Download profiles after all review pages, the most valuable first, by "
+        "these comma separated criteria: " + ", ".join(PRIORITY_CRITERIA)
+    ),
+    callback=_comma_separated(PRIORITY_CRITERIA),
+)
+@click.option(
+    "--progress/--no-progress",
+    help=(
+        "Show progress, throughput and ETA, as progress bar on a terminal and "
+        "as log lines otherwise"
+    ),
+    default=False,
+    show_default=True,
+)
+@click.option(
+    "--trace",
+    help=(
+        "Write a timeline of the run in the Chrome Trace Event Format to this "
+        "file, it can be opened with Perfetto"
+    ),
+    type=click.Path(dir_okay=False, writable=True),
+)
+@click.option(
+    "--captcha-timeout",
+    help=(
+        "Time in seconds to wait for a CAPTCHA to be solved in the browser, "
+        "use SIGINT or --resume-file to resume earlier"
+    ),
+    type=click.FloatRange(min=0),
+    default=CAPTCHA_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--resume-file",
+    help="Resume waiting for a solved CAPTCHA or login when this file is created",
+    type=click.Path(dir_okay=False),
+)
 @click.option(
     "--sleep-time",
     help=(
@@ -119,11 +388,42 @@ def main(
     profiles: bool,
     start_page: int,
     stop_page: Optional[int],
+    preflight: bool,
+    review_fields: Optional[List[str]],
+    profile_fields: Optional[List[str]],
+    sample: Optional[int],
+    sample_seed: Optional[int],
+    stratify: bool,
+    sample_profiles: float,
     output: click.File,
+    layout: str,
+    output_db: Optional[str],
     profile_link: bool,
     html_page: click.File,
+    html_dump_dir: Optional[str],
+    html_dump_size: int,
     browser: str,
     have_browser_headless: bool,
+    proxies: Optional[str],
+    session_dir: Optional[str],
+    sessions: int,
+    session_pages: int,
+    asset_cache_dir: Optional[str],
+    asset_cache_size: int,
+    tabs: int,
+    parse_workers: int,
+    max_pages_per_browser: Optional[int],
+    max_browser_memory: Optional[int],
+    page_load_timeout: float,
+    retries: int,
+    retry_backoff: float,
+    max_requests: Optional[int],
+    max_runtime: Optional[float],
+    profile_priority: Optional[List[str]],
+    progress: bool,
+    trace: Optional[str],
+    captcha_timeout: float,
+    resume_file: Optional[str],
     sleep_time: int,
     scroll_depth_profile: int,
     scroll_depth_reviews: int,
@@ -134,19 +434,89 @@ def main(
     Link must be of the form 'https://www.amazon.com/product-reviews/ID123ABC/' and
     must end with a '/'."
     """
-    data = {"python_command_parameters": _get_command_parameters()}
+    from .scraper import Scraper
+
+    data: Dict[str, Any] = {"python_command_parameters": _get_command_parameters()}
     main_logger.debug(f"command parameters: {data['python_command_parameters']}")
 
+    if progress:
+        progress_logger.setLevel(logging.INFO)
+    if trace is not None:
+        tracer = start_tracing()
+        click.get_current_context().call_on_close(partial(_write_trace, tracer, trace))
+    database = None if output_db is None else Database(output_db)
     arr = Scraper(
         html_page,
         browser,
         have_browser_headless,
         scroll_depth_profile,
         scroll_depth_reviews,
+        database=database,
+        proxy_pool=None if proxies is None else ProxyPool.from_file(proxies),
+        max_pages_per_browser=max_pages_per_browser,
+        tabs=tabs,
+        parse_workers=parse_workers,
+        max_browser_memory=(
+            None if max_browser_memory is None else max_browser_memory * 2**20
+        ),
+        page_load_timeout=page_load_timeout,
+        retry_attempts=retries,
+        retry_backoff=retry_backoff,
+        progress=Progress() if progress else None,
+        html_page_buffer=(
+            None
+            if html_dump_dir is None
+            else HtmlPageBuffer(html_dump_dir, html_dump_size)
+        ),
+        max_requests=max_requests,
+        max_runtime=max_runtime,
+        review_fields=review_fields,
+        profile_fields=profile_fields,
+        captcha_timeout=captcha_timeout,
+        resume_file=resume_file,
+        session_pool=(
+            None
+            if session_dir is None
+            else SessionPool(session_dir, sessions, session_pages)
+        ),
+        asset_cache=(
+            None
+            if asset_cache_dir is None
+            else AssetCache(asset_cache_dir, asset_cache_size * 2**20)
+        ),
     )
     if profile_link:
         data.update(arr.get_profile_data(link))
+        if database is not None:
+            database.add_profile(link, data)
+    elif sample is not None:
+        data.update(
+            arr.extract_sample(
+                link,
+                Sample(
+                    sample, sample_seed, stratify, sample_profiles if profiles else 0
+                ),
+                sleep_time,
+            )
+        )
     else:
-        data.update(arr.extract(link, profiles, start_page, stop_page, sleep_time))
+        data.update(
+            arr.extract(
+                link,
+                profiles,
+                start_page,
+                stop_page,
+                sleep_time,
+                preflight=preflight,
+                profile_priority=profile_priority,
+            )
+        )
 
-    output.write(json.dumps(data))
+    inline_profiles = layout == "inline"
+    if not inline_profiles and not profile_link:
+        data["profiles"] = collect_profiles(data["reviews"])
+    output.write(
+        json.dumps(data, default=partial(to_json, inline_profiles=inline_profiles))
+    )
+    if database is not None:
+        database.close()
@@ -0,0 +1,160 @@
+from collections import deque
+import json
+import logging
+from math import ceil
+import sys
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, Final, Optional, TextIO, Tuple
+
+
+REVIEWS_PER_PAGE: Final = 10
+REPORT_INTERVAL: Final = 10.0
+TREND_WINDOW: Final = 300.0
+BAR_WIDTH: Final = 30
+
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_pages(
+    num_ratings: Any, start_page: int, stop_page: Optional[int]
+) -> Optional[int]:
+    """Estimate the number of review pages, num_ratings also counts ratings
+    without a review, so this is an upper bound
+    """
+    if not isinstance(num_ratings, int):
+        return None
+    last_page = max(ceil(num_ratings / REVIEWS_PER_PAGE) - 1, start_page)
+    if stop_page is not None:
+        last_page = min(last_page, stop_page)
+    return last_page - start_page + 1
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+class Progress:
+    """Report pages and profiles done, throughput and estimated time left
+
+    On a terminal a progress bar is updated in place, otherwise a log line is
+    written every `interval` seconds. The throughput of the last `window` seconds
+    is compared to the throughput of the whole run to show whether the scraping
+    slows down, e.g. due to throttling.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO = sys.stderr,
+        interval: float = REPORT_INTERVAL,
+        window: float = TREND_WINDOW,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self._stream = stream
+        self._is_tty = stream.isatty()
+        self.interval = interval
+        self.window = window
+        self._clock = clock
+        self.start()
+
+    def start(self, total_pages: Optional[int] = None) -> None:
+        self.total_pages = total_pages
+        self.pages = 0
+        self.reviews = 0
+        self.profiles = 0
+        self.cache_hits = 0
+        self._start_time = self._clock()
+        self._last_report = self._start_time
+        self._recent: Deque[Tuple[float, int]] = deque()
+
+    def page_done(self, reviews: int) -> None:
+        self.pages += 1
+        self.reviews += reviews
+        self._recent.append((self._clock(), reviews))
+        self.report()
+
+    def profile_fetched(self) -> None:
+        self.profiles += 1
+        self.report()
+
+    def cache_hit(self) -> None:
+        self.cache_hits += 1
+
+    def _get_rates(
+        self, since: float, pages: int, reviews: int
+    ) -> Tuple[float, float]:
+        minutes = max(self._clock() - since, 1e-9) / 60
+        return pages / minutes, reviews / minutes
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self._clock()
+        while self._recent and self._recent[0][0] < now - self.window:
+            self._recent.popleft()
+
+        pages_per_min, reviews_per_min = self._get_rates(
+            self._start_time, self.pages, self.reviews
+        )
+        recent_since = max(now - self.window, self._start_time)
+        recent_pages_per_min, _ = self._get_rates(
+            recent_since, len(self._recent), sum(r for _, r in self._recent)
+        )
+
+        trend = "steady"
+        if now - self._start_time > self.window and pages_per_min > 0:
+            ratio = recent_pages_per_min / pages_per_min
+            if ratio < 0.7:
+                trend = "slowing down"
+            elif ratio > 1.3:
+                trend = "speeding up"
+
+        eta = None
+        if self.total_pages is not None and recent_pages_per_min > 0:
+            pages_left = max(self.total_pages - self.pages, 0)
+            eta = 60 * pages_left / recent_pages_per_min
+
+        return {
+            "pages": self.pages,
+            "total_pages": self.total_pages,
+            "reviews": self.reviews,
+            "profiles": self.profiles,
+            "cache_hits": self.cache_hits,
+            "pages_per_min": round(pages_per_min, 2),
+            "reviews_per_min": round(reviews_per_min, 2),
+            "recent_pages_per_min": round(recent_pages_per_min, 2),
+            "trend": trend,
+            "eta": eta,
+        }
+
+    def _format_bar(self, snapshot: Dict[str, Any]) -> str:
+        total = snapshot["total_pages"]
+        if total:
+            done = min(snapshot["pages"] / total, 1.0)
+            filled = int(BAR_WIDTH * done)
+            bar = "#" * filled + "-" * (BAR_WIDTH - filled)
+        else:
+            bar = "?" * BAR_WIDTH
+        return (
+            f"[{bar}] {snapshot['pages']}/{total or '?'} pages, "
+            f"{snapshot['profiles']} profiles ({snapshot['cache_hits']} cached), "
+            f"{snapshot['pages_per_min']:.1f} pages/min, "
+            f"{snapshot['reviews_per_min']:.1f} reviews/min, {snapshot['trend']}, "
+            f"ETA {_format_duration(snapshot['eta'])}"
+        )
+
+    def report(self, force: bool = False) -> None:
+        now = self._clock()
+        if self._is_tty:
+            self._stream.write("\r\033[K" + self._format_bar(self.snapshot()))
+            self._stream.flush()
+        elif force or now - self._last_report >= self.interval:
+            logger.info(f"progress: {json.dumps(self.snapshot())}")
+            self._last_report = now
+
+    def finish(self) -> None:
+        self.report(force=True)
+        if self._is_tty:
+            self._stream.write("\n")
@@ -0,0 +1,145 @@
+import logging
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Dict, Final, List, Optional, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    import requests
+
+
+BLOCKED_STATUS_CODES: Final = [403, 429, 503]
+GATEWAY_STATUS_CODES: Final = [502, 504]
+LATENCY_SMOOTHING: Final = 0.3
+BLOCK_RATE_SMOOTHING: Final = 0.2
+BLOCK_PENALTY: Final = 60.0
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_proxy_failure(status: Optional[int]) -> bool:
+    """Whether the proxy is blocked or failing, a dead upstream proxy answers with a
+    gateway error or no response at all
+    """
+    return (
+        status is None
+        or status in BLOCKED_STATUS_CODES
+        or status in GATEWAY_STATUS_CODES
+    )
+
+
+class Proxy:
+    """Upstream proxy with a health score based on its latency and block rate"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.block_rate = 0.0
+        self.requests = 0
+        self.quarantined_until = 0.0
+        self._session: Optional["requests.Session"] = None
+
+    def __repr__(self) -> str:
+        return f"Proxy({self.url!r})"
+
+    @property
+    def session(self) -> "requests.Session":
+        """Requests session only used together with this proxy"""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.proxies = {"http": self.url, "https": self.url}
+        return self._session
+
+    @property
+    def seleniumwire_options(self) -> Dict[str, str]:
+        return {"http": self.url, "https": self.url}
+
+    @property
+    def score(self) -> float:
+        """Lower is healthier, proxies without requests are tried first"""
+        if self.latency is None:
+            return 0.0
+        return self.latency + BLOCK_PENALTY * self.block_rate
+
+    def is_quarantined(self, now: float) -> bool:
+        return now < self.quarantined_until
+
+    def update(self, latency: float, blocked: bool) -> None:
+        self.requests += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+        self.block_rate += BLOCK_RATE_SMOOTHING * (float(blocked) - self.block_rate)
+
+
+class ProxyPool:
+    def __init__(
+        self,
+        urls: List[str],
+        max_block_rate: float = 0.5,
+        quarantine_time: float = 300,
+        min_requests: int = 3,
+    ):
+        if len(urls) == 0:
+            raise ValueError("A proxy pool needs at least one proxy")
+        self.proxies = [Proxy(url) for url in urls]
+        self.max_block_rate = max_block_rate
+        self.quarantine_time = quarantine_time
+        self.min_requests = min_requests
+        self._lock = Lock()
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], **kwargs) -> "ProxyPool":
+        """Read one proxy URL per line, empty lines and lines starting with # are
+        ignored
+        """
+        lines = [line.strip() for line in Path(path).read_text().splitlines()]
+        urls = [line for line in lines if line and not line.startswith("#")]
+        return cls(urls, **kwargs)
+
+    def get(self) -> Proxy:
+        """Get the healthiest proxy which is not in quarantine
+
+        If all proxies are in quarantine, the one released the earliest is used.
+        """
+        with self._lock:
+            now = monotonic()
+            available = [p for p in self.proxies if not p.is_quarantined(now)]
+            if len(available) == 0:
+                logger.warning("All proxies are in quarantine")
+                return min(self.proxies, key=lambda p: p.quarantined_until)
+            return min(available, key=lambda p: (p.score, p.requests))
+
+    def report(self, proxy: Proxy, latency: float, blocked: bool) -> None:
+        with self._lock:
+            proxy.update(latency, blocked)
+            logger.debug(
+                f"{proxy}: latency {proxy.latency:.2f}s, "
+                f"block rate {proxy.block_rate:.2f}"
+            )
+            if (
+                proxy.requests >= self.min_requests
+                and proxy.block_rate > self.max_block_rate
+            ):
+                logger.warning(f"Put {proxy} in quarantine")
+                proxy.quarantined_until = monotonic() + self.quarantine_time
+                proxy.block_rate = 0.0
+                proxy.requests = 0
+
+    def request(self, url: str, **kwargs) -> "requests.Response":
+        """Download URL with the healthiest proxy and report the result"""
+        import requests
+
+        proxy = self.get()
+        start = monotonic()
+        try:
+            response = proxy.session.get(url, **kwargs)
+        except requests.RequestException:
+            self.report(proxy, monotonic() - start, True)
+            raise
+        self.report(proxy, monotonic() - start, is_proxy_failure(response.status_code))
+        return response
@@ -0,0 +1,152 @@
+from typing import Any, Dict, Final, Iterable, List, Optional
+
+
+LAYOUTS: Final = ("inline", "profiles")
+
+
+class Record:
+    """Compact record, a field is only serialized when it was set
+
+    The slot names are the keys used in the JSON output, so a record serializes to
+    the same dictionary the extractor produced.
+    """
+
+    __slots__: tuple = ()
+
+    def __init__(self, data: Dict[str, Any]):
+        self._set(data)
+
+    def _set(self, data: Dict[str, Any]) -> None:
+        for key, value in data.items():
+            if key in self.__slots__:
+                setattr(self, key, value)
+
+    def replace(self, data: Dict[str, Any]) -> None:
+        """Replace all fields in place, objects referencing this record see the
+        new data
+        """
+        for key in self.__slots__:
+            if hasattr(self, key):
+                delattr(self, key)
+        self._set(data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__ if hasattr(self, k)}
+
+
+class ProfileReview(Record):
+    __slots__ = (
+        "body",
+        "date",
+        "found_helpful",
+        "rating",
+        "review_link",
+        "title",
+        "verified_purchase",
+    )
+
+    body: Optional[str]
+    date: Optional[str]
+    found_helpful: int
+    rating: Optional[int]
+    review_link: Optional[str]
+    title: Optional[str]
+    verified_purchase: bool
+
+
+class Profile(Record):
+    __slots__ = (
+        "profile_name",
+        "profile_influence",
+        "profile_num_reviews",
+        "profile_image",
+        "profile_reviews",
+        "profile_error",
+    )
+
+    profile_name: Optional[str]
+    profile_influence: Optional[int]
+    profile_num_reviews: Optional[int]
+    profile_image: Optional[bool]
+    profile_reviews: Optional[List[ProfileReview]]
+    profile_error: str
+
+    def _set(self, data: Dict[str, Any]) -> None:
+        super()._set(data)
+        if self.get("profile_reviews") is not None:
+            self.profile_reviews = [ProfileReview(r) for r in data["profile_reviews"]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        if data.get("profile_reviews") is not None:
+            data["profile_reviews"] = [r.to_dict() for r in data["profile_reviews"]]
+        return data
+
+
+class Review(Record):
+    """Review of a product, the profile object is shared by all reviews of a user"""
+
+    __slots__ = (
+        "body",
+        "date",
+        "found_helpful",
+        "profile_link",
+        "rating",
+        "title",
+        "verified_purchase",
+        "url",
+        "sampling_weight",
+        "profile_sampling_weight",
+        "profile",
+    )
+
+    body: Optional[str]
+    date: Optional[str]
+    found_helpful: int
+    profile_link: Optional[str]
+    rating: Optional[int]
+    title: Optional[str]
+    verified_purchase: bool
+    url: str
+    sampling_weight: float
+    profile_sampling_weight: float
+    profile: Profile
+
+    def to_dict(self, inline_profile: bool = True) -> Dict[str, Any]:
+        """Without inline_profile the profile is only referenced by profile_link"""
+        data = super().to_dict()
+        profile = data.pop("profile", None)
+        if profile is not None and inline_profile:
+            data.update(profile.to_dict())
+        return data
+
+
+def collect_profiles(reviews: Iterable[Review]) -> Dict[str, Profile]:
+    """Map the profile links of the reviews to their profiles, every profile is
+    contained once, however many reviews reference it
+    """
+    profiles: Dict[str, Profile] = dict()
+    for r in reviews:
+        link = r.get("profile_link")
+        if link is not None and "profile" in r:
+            profiles[link] = r.profile
+    return profiles
+
+
+def to_json(record: Any, inline_profiles: bool = True) -> Dict[str, Any]:
+    """Use as `default` argument of `json.dumps` to serialize records lazily
+
+    Without inline_profiles the reviews do not contain their profiles, for the
+    layout "profiles" where they are stored in a separate map.
+    """
+    if isinstance(record, Review):
+        return record.to_dict(inline_profiles)
+    if isinstance(record, Record):
+        return record.to_dict()
+    raise TypeError(f"Object of type {type(record).__name__} is not JSON serializable")
@@ -0,0 +1,103 @@
+from collections import deque
+import logging
+from threading import Event
+from typing import Any, Callable, Deque, Dict, Final, List, Optional
+
+from .trace import span
+
+
+MAX_ATTEMPTS: Final = 3
+BACKOFF: Final = 30.0
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Item:
+    def __init__(
+        self, kind: str, url: str, error: Exception, retry: Callable[[], None]
+    ):
+        self.kind = kind
+        self.url = url
+        self.error = error
+        self.retry = retry
+        self.attempts = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "url": self.url,
+            "error": str(self.error),
+            "attempts": self.attempts,
+        }
+
+
+class RetryQueue:
+    """Collect failed downloads to retry them at the end of a run
+
+    Before each round of retries the queue waits `backoff` seconds, the waiting time
+    doubles with every round. Setting the event cancelled ends the waiting early.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff: float = BACKOFF,
+        cancelled: Optional[Event] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.cancelled = Event() if cancelled is None else cancelled
+        self._items: Deque[_Item] = deque()
+        self.failures: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(
+        self, kind: str, url: str, error: Exception, retry: Callable[[], None]
+    ) -> None:
+        logger.warning(f"Retry {kind} {url} later, failed with: {error}")
+        self._items.append(_Item(kind, url, error, retry))
+
+    def add_failure(self, kind: str, url: str, error: str) -> None:
+        """Record a permanent failure of something which was never attempted"""
+        self.failures.append({"kind": kind, "url": url, "error": error, "attempts": 0})
+
+    def drain(
+        self,
+        errors: tuple = (Exception,),
+        stop: Callable[[], bool] = lambda: False,
+    ) -> List[Dict[str, Any]]:
+        """Retry all items and return the ones which failed permanently, they are
+        also collected in `failures` over all drains
+
+        Only the given errors are caught, every other error is raised. Retrying
+        ends early when stop returns True.
+        """
+        for attempt in range(self.max_attempts):
+            if len(self._items) == 0 or stop():
+                break
+            wait_time = self.backoff * 2**attempt
+            logger.info(f"Retry {len(self._items)} failed items in {wait_time}s")
+            with span("backoff", "retry"):
+                self.cancelled.wait(wait_time)
+
+            for _ in range(len(self._items)):
+                if stop():
+                    break
+                item = self._items.popleft()
+                item.attempts += 1
+                try:
+                    with span(f"retry {item.kind}", "retry", url=item.url):
+                        item.retry()
+                    logger.info(f"Retry of {item.kind} {item.url} succeeded")
+                except errors as e:
+                    logger.warning(f"Retry of {item.kind} {item.url} failed: {e}")
+                    item.error = e
+                    self._items.append(item)
+
+        failures = [item.to_dict() for item in self._items]
+        self._items.clear()
+        self.failures.extend(failures)
+        return failures
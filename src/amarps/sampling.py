@@ -0,0 +1,102 @@
+from math import ceil, floor
+import random
+from typing import Any, Dict, Final, List, Optional
+
+from .progress import REVIEWS_PER_PAGE
+
+
+STAR_FILTERS: Final = ("one_star", "two_star", "three_star", "four_star", "five_star")
+PROFILE_FRACTION: Final = 1.0
+
+
+def count_pages(num_ratings: Any) -> int:
+    """Number of review pages, an upper bound as num_ratings also counts ratings
+    without a review
+    """
+    if not isinstance(num_ratings, int):
+        return 0
+    return ceil(num_ratings / REVIEWS_PER_PAGE)
+
+
+def allocate(
+    num_pages: int, strata_pages: Dict[Optional[str], int]
+) -> Dict[Optional[str], int]:
+    """Split num_pages across the strata proportionally to their number of pages
+
+    The remainder is distributed by the largest fractional part.
+    """
+    total = sum(strata_pages.values())
+    if num_pages >= total:
+        return dict(strata_pages)
+
+    quotas = {s: num_pages * pages / total for s, pages in strata_pages.items()}
+    allocation = {s: floor(quota) for s, quota in quotas.items()}
+    remainder = num_pages - sum(allocation.values())
+    by_fraction = sorted(quotas, key=lambda s: quotas[s] - allocation[s], reverse=True)
+    for stratum in by_fraction[:remainder]:
+        allocation[stratum] += 1
+    return allocation
+
+
+class Sample:
+    """Random sample of the review pages and profiles of a product
+
+    `num_pages` review pages are drawn without replacement. With `stratify` the
+    pages are split across the star rating filters of the listing proportionally to
+    their number of pages, otherwise they are drawn from the unfiltered listing
+    (stratum None). Profiles are only downloaded for a random `profile_fraction` of
+    the reviewers.
+    """
+
+    def __init__(
+        self,
+        num_pages: int,
+        seed: Optional[int] = None,
+        stratify: bool = True,
+        profile_fraction: float = PROFILE_FRACTION,
+    ):
+        if num_pages < 1:
+            raise ValueError(f"Invalid number of pages: {num_pages}")
+        if not 0 <= profile_fraction <= 1:
+            raise ValueError(f"Invalid profile fraction: {profile_fraction}")
+        self.num_pages = num_pages
+        self.seed = seed
+        self.stratify = stratify
+        self.profile_fraction = profile_fraction
+        self._random = random.Random(seed)
+        self._profiles: Dict[str, bool] = dict()
+
+    @property
+    def strata(self) -> List[Optional[str]]:
+        return list(STAR_FILTERS) if self.stratify else [None]
+
+    def draw_pages(
+        self, strata_pages: Dict[Optional[str], int]
+    ) -> Dict[Optional[str], List[int]]:
+        """Draw the pages, numbered from 1, of each stratum in ascending order"""
+        return {
+            stratum: sorted(
+                self._random.sample(range(1, strata_pages[stratum] + 1), num_pages)
+            )
+            for stratum, num_pages in allocate(self.num_pages, strata_pages).items()
+            if num_pages > 0
+        }
+
+    def includes_profile(self, profile_link: str) -> bool:
+        """Whether the profile is part of the sample, the same for all reviews of a
+        reviewer
+        """
+        if profile_link not in self._profiles:
+            self._profiles[profile_link] = self._random.random() < self.profile_fraction
+        return self._profiles[profile_link]
+
+    @property
+    def profile_weight(self) -> float:
+        return 1 / self.profile_fraction
+
+    @staticmethod
+    def page_weight(stratum_pages: int, sampled_pages: int) -> float:
+        """Sampling weight of the reviews of a page: the number of pages the
+        sampled page represents in its stratum
+        """
+        return stratum_pages / sampled_pages
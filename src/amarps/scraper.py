@@ -1,128 +1,234 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
 import importlib.resources
+from itertools import islice
 import json
 import logging
 from math import isclose
+from multiprocessing import get_context
+from queue import Full, Queue
 import random
 import sys
-from time import sleep
-from typing import Any, Callable, Dict, Final, List, Optional, Union
+from threading import Event, Thread
+from time import monotonic, sleep
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Final,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from click import File
-import dateparser
 import requests
 from selectorlib import Extractor
 from selectorlib.formatter import Formatter
-from seleniumwire import webdriver
-
+from selenium.common.exceptions import WebDriverException
+
+from .asset_cache import AssetCache
+from .budget import Budget, sort_by_priority
+from .database import Database
+from .defaults import (
+    BROWSER,
+    CAPTCHA_TIMEOUT,
+    HAVE_BROWSER_HEADLESS,
+    NUM_TABS,
+    PARSE_WORKERS,
+    PROFILE_FIELDS,
+    REVIEW_FIELDS,
+    SCROLL_DEPTH_PROFILE_PAGE,
+    SCROLL_DEPTH_REVIEWS_PAGE,
+)
+from .driver import (
+    BROWSERS,
+    Driver,
+    DriverManager,
+    init_browser_driver,
+    PAGE_LOAD_TIMEOUT,
+)
 from .events import WaitHandler
+from .html_dump import HtmlPageBuffer
+from .locales import current_locale, get_locale, use_locale
+from .progress import estimate_pages, Progress
+from .proxies import is_proxy_failure, Proxy, ProxyPool
+from .records import Profile, Review
+from .retry import BACKOFF, MAX_ATTEMPTS, RetryQueue
+from .sampling import count_pages, Sample, STAR_FILTERS
+from .sessions import SessionPool
+from .tabs import PAGE_LOAD_STRATEGY, TabLoader, TabPage
+from .trace import is_tracing, span, TracedFormatter
+
+
+MAX_CONSECUTIVE_FAILED_PAGES: Final = 3
+FILTER_INFO_SELECTOR: Final = {
+    "css": 'div[data-hook="cr-filter-info-review-rating-count"]',
+    "type": "Text",
+    "format": "NumFilteredReviews",
+}
+PREFLIGHT_TIMEOUT: Final = 10
+PREFLIGHT_HEADERS: Final = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/112.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+PREFLIGHT_SKIP_STATUS_CODES: Final = [400, 404, 410]
+CAPTCHA_MARKERS: Final = (
+    "/errors/validateCaptcha",
+    'name="captchacharacters"',
+    'id="captchacharacters"',
+)
+ITER_BUFFER_PAGES: Final = 2
+QUEUE_POLL_INTERVAL: Final = 0.5
 
 
-BROWSER: Final = "chrome"
-HAVE_BROWSER_HEADLESS: Final = False
-SCROLL_DEPTH_PROFILE_PAGE: Final = 2000
-SCROLL_DEPTH_REVIEWS_PAGE: Final = 2000
+logger = logging.getLogger(__name__)
 
+HtmlPageResult = Union[str, Exception]
+# the data of a review page, its error or the data still extracted in a worker
+ReviewPageResult = Union[Dict[str, Any], Exception, Future]
 
-logger = logging.getLogger(__name__)
 
+def _get_page_url(base_url: str, page: int, star: Optional[str] = None) -> str:
+    url = base_url + f"ref=cm_cr_arp_d_paging_btm_next_{page}?pageNumber={page}"
+    return url if star is None else url + f"&filterByStar={star}"
 
-def _get_page_url(base_url: str, page: int) -> str:
-    return base_url + f"ref=cm_cr_arp_d_paging_btm_next_{page}?pageNumber={page}"
 
+def _select_fields(
+    selectors: Dict[str, Any], fields: List[str], valid_fields: Tuple[str, ...]
+) -> Dict[str, Any]:
+    invalid = [f for f in fields if f not in valid_fields]
+    if invalid:
+        raise ValueError(f"Invalid fields: {invalid}")
+    return {k: v for k, v in selectors.items() if k in fields}
 
-def _convert_date(value: str) -> str:
-    logger.debug(value)
 
-    date = dateparser.parse(value)
-    if date is None:
-        raise ValueError(f"Not a suitable date: {date}")
+def _create_review_extractor(
+    formatters: List[Any], fields: Optional[List[str]]
+) -> Extractor:
+    extractor = Extractor.from_yaml_string(
+        importlib.resources.read_text("amarps", "review_page_selectors.yml"),
+        formatters=formatters,
+    )
+    if fields is not None:
+        reviews = extractor.config["reviews"]
+        reviews["children"] = _select_fields(
+            reviews["children"], fields, REVIEW_FIELDS
+        )
+    return extractor
+
+
+def _create_profile_extractor(
+    formatters: List[Any], fields: Optional[List[str]]
+) -> Extractor:
+    extractor = Extractor.from_yaml_string(
+        importlib.resources.read_text("amarps", "profile_page_selectors.yml"),
+        formatters=formatters,
+    )
+    if fields is not None:
+        extractor.config = _select_fields(extractor.config, fields, PROFILE_FIELDS)
+    return extractor
+
 
-    return date.strftime("%Y/%m/%d")
+def _parse_date(value: str) -> Optional[str]:
+    # dateparser takes hundreds of milliseconds to import, only pay for it when
+    # the first date is parsed
+    import dateparser
+
+    logger.debug(value)
+    date = dateparser.parse(value, languages=current_locale().languages)
+    return None if date is None else date.strftime("%Y/%m/%d")
 
 
-def _split(value: str, sep: str, maxsplit: int = 1) -> List[str]:
-    parts = value.split(sep, maxsplit)
-    if len(parts) < 2:
-        raise ValueError(f"Input '{value}' not splittable with separator '{sep}'")
-    logger.debug(parts)
-    return parts
+def _convert_date(value: str) -> str:
+    date = _parse_date(value)
+    if date is None:
+        raise ValueError(f"Not a suitable date: {value}")
+    return date
 
 
 def optional(formatFunction: Callable):
+    """Keep the original value if it cannot be formatted, i.e. the function
+    returns None or raises an exception
+    """
+
     def formatWhenPossible(self: Formatter, value: str) -> Union[str, float, int]:
         logger.debug(
             f"Optionally format value '{value}' with function '{formatFunction}'"
         )
         try:
-            return formatFunction(self, value)
+            formatted = formatFunction(self, value)
         except Exception as e:
             logger.error(
                 f"Keep original value, formatting '{value}' led to exception: {e}"
             )
             return value
+        if formatted is None:
+            logger.error(f"Keep original value, '{value}' could not be formatted")
+            return value
+        return formatted
 
     return formatWhenPossible
 
 
 class ReviewDate(Formatter):
     @optional
-    def format(self, date: str) -> str:
-        return _convert_date(" ".join(_split(date, " ", 10)[-3:]))
+    def format(self, date: str) -> Optional[str]:
+        parts = date.split(" ", 10)
+        return None if len(parts) < 2 else _parse_date(" ".join(parts[-3:]))
 
 
 class ProfileReviewDate(Formatter):
     @optional
-    def format(self, date: str) -> str:
-        return _convert_date(_split(date, " · ")[-1])
-
-
-def _convert_rating(rating: str) -> float:
-    logger.debug(rating)
-    return float(_split(rating, " ")[0].replace(",", ".", 1))
+    def format(self, date: str) -> Optional[str]:
+        parts = date.split(" · ")
+        return None if len(parts) < 2 else _parse_date(parts[-1])
 
 
 class AverageRating(Formatter):
     @optional
-    def format(self, rating: str) -> float:
-        return _convert_rating(rating)
+    def format(self, rating: str) -> Optional[float]:
+        return current_locale().parse_rating(rating)
 
 
 class ReviewRating(Formatter):
-    def format(self, rating: str) -> Optional[int]:
-        try:
-            return int(_convert_rating(rating))
-        except TypeError as e:
-            logger.error(e)
+    def format(self, rating: Optional[str]) -> Optional[int]:
+        if rating is None:
             return None
-
-
-def _remove_thousand_separator(number: str) -> str:
-    if "," in number:
-        thousand_separator = ","
-    else:
-        thousand_separator = "."
-
-    num_of_allowed_thousand_separators = int((len(number) - 1) / 4)
-    number = number.replace(thousand_separator, "", num_of_allowed_thousand_separators)
-
-    return number
-
-
-def _convert_integer(number: str) -> int:
-    logger.debug(number)
-    return int(_remove_thousand_separator(number))
+        value = current_locale().parse_rating(rating)
+        if value is None:
+            raise ValueError(f"Not a suitable rating: {rating}")
+        return int(value)
 
 
 class MyInteger(Formatter):
     @optional
-    def format(self, integer: str) -> int:
-        return _convert_integer(integer)
+    def format(self, integer: str) -> Optional[int]:
+        return current_locale().parse_integer(integer)
 
 
 class NumRatings(Formatter):
     @optional
-    def format(self, num_ratings: str) -> int:
-        return _convert_integer(_split(num_ratings, " global")[0])
+    def format(self, num_ratings: str) -> Optional[int]:
+        return current_locale().parse_num_ratings(num_ratings)
+
+
+class NumFilteredReviews(Formatter):
+    @optional
+    def format(self, filter_info: str) -> Optional[int]:
+        return current_locale().parse_num_filtered_reviews(filter_info)
 
 
 class FoundHelpful(Formatter):
@@ -130,19 +236,18 @@ class FoundHelpful(Formatter):
         logger.debug(found_helpful)
         if found_helpful is None:
             return 0
-        found_helpful = _split(found_helpful, " ")[0]
-        if found_helpful.lower() in ["one", "eine"]:
-            return 1
-        else:
-            return _convert_integer(found_helpful)
+        value = current_locale().parse_found_helpful(found_helpful)
+        if value is None:
+            raise ValueError(f"Not a suitable number of votes: {found_helpful}")
+        return value
 
 
 class VerifiedPurchase(Formatter):
     def format(self, verified_purchase: Optional[str]) -> bool:
         logger.debug(verified_purchase)
-        return (
-            verified_purchase is not None and "Verified Purchase" in verified_purchase
-        )
+        if verified_purchase is None:
+            return False
+        return current_locale().is_verified_purchase(verified_purchase)
 
 
 class HttpError(Exception):
@@ -153,43 +258,92 @@ class HttpError(Exception):
         return f"HTTP error: {self.status_code}"
 
 
-def _init_browser_driver(
-    browser: str, have_browser_headless: bool
-) -> Union[webdriver.Chrome, webdriver.Firefox]:
-    logger.debug(f"Init browser '{browser}'")
-
-    if browser == "chrome":
-        from selenium.webdriver.chrome.service import Service
-        from seleniumwire.webdriver import Chrome as BrowserDriver
-        from seleniumwire.webdriver import ChromeOptions as BrowserDriverOptions
-        from webdriver_manager.chrome import ChromeDriverManager as BrowserDriverManager
-    elif browser == "firefox":
-        from selenium.webdriver.firefox.service import Service
-        from seleniumwire.webdriver import Firefox as BrowserDriver
-        from seleniumwire.webdriver import FirefoxOptions as BrowserDriverOptions
-        from webdriver_manager.firefox import GeckoDriverManager as BrowserDriverManager
-    else:
-        raise ValueError(f"Invalid browser: {browser}")
-
-    options = BrowserDriverOptions()
-    options.set_capability("loggingPrefs", {"performance": "ALL"})
-    if have_browser_headless:
-        options.add_argument("--headless")
-
-    return BrowserDriver(
-        options=options,
-        service=Service(BrowserDriverManager().install()),
-    )
+class CaptchaError(Exception):
+    def __init__(self, url: str):
+        self.url = url
+
+    def __str__(self):
+        return f"CAPTCHA not solved: {self.url}"
+
+
+RETRY_ERRORS: Final = (HttpError, CaptchaError, WebDriverException)
+
+
+class _Cancelled(Exception):
+    """The consumer of the reviews stopped iterating"""
+
+
+class _PageQueue:
+    """Bounded queue passing pages from the scraping thread to the consumer"""
+
+    def __init__(self, size: int):
+        self._queue: Queue = Queue(maxsize=size)
+        self.stopped = Event()
+
+    def put(self, kind: str, item: Any) -> None:
+        """Wait for a free place, raise _Cancelled if the consumer stopped"""
+        while not self.stopped.is_set():
+            try:
+                self._queue.put((kind, item), timeout=QUEUE_POLL_INTERVAL)
+                return
+            except Full:
+                pass
+        raise _Cancelled()
+
+    def get(self) -> Tuple[str, Any]:
+        return self._queue.get()
+
+
+def is_captcha(html_page: str) -> bool:
+    """Whether the page is a CAPTCHA or robot check instead of the requested page"""
+    return any(marker in html_page for marker in CAPTCHA_MARKERS)
 
 
 class ImageSrcToBool(Formatter):
+    def __init__(self, proxy_pool: Optional[ProxyPool] = None):
+        self._proxy_pool = proxy_pool
+
     def format(self, image_url: str) -> Optional[bool]:
-        response = requests.get(image_url)
+        with span("check image", "profile", url=image_url):
+            if self._proxy_pool is None:
+                response = requests.get(image_url)
+            else:
+                response = self._proxy_pool.request(image_url)
         if not response.ok:
             return None
         return not isclose(len(response.content), 7186, rel_tol=0.05)
 
 
+def _create_formatters(proxy_pool: Optional[ProxyPool]) -> List[Any]:
+    return [
+        ImageSrcToBool(proxy_pool) if f is ImageSrcToBool else f
+        for f in Formatter.get_all()
+    ]
+
+
+_worker_extractors: Dict[str, Extractor] = dict()
+
+
+def _init_parse_worker(
+    review_fields: Optional[List[str]],
+    profile_fields: Optional[List[str]],
+    proxy_urls: Optional[List[str]],
+) -> None:
+    """Create the extractors once in each process of the parse pool"""
+    formatters = _create_formatters(
+        None if proxy_urls is None else ProxyPool(proxy_urls)
+    )
+    _worker_extractors["reviews"] = _create_review_extractor(formatters, review_fields)
+    _worker_extractors["profile"] = _create_profile_extractor(
+        formatters, profile_fields
+    )
+
+
+def _parse_in_worker(kind: str, url: str, html_page: str) -> Dict[str, Any]:
+    with use_locale(get_locale(url)):
+        return _worker_extractors[kind].extract(html_page, base_url=url)
+
+
 class Scraper:
     def __init__(
         self,
@@ -198,70 +352,524 @@ class Scraper:
         have_browser_headless: bool = HAVE_BROWSER_HEADLESS,
         scroll_depth_profile_page: int = SCROLL_DEPTH_PROFILE_PAGE,
         scroll_depth_reviews_page: int = SCROLL_DEPTH_REVIEWS_PAGE,
+        database: Optional[Database] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        max_pages_per_browser: Optional[int] = None,
+        max_browser_memory: Optional[int] = None,
+        page_load_timeout: float = PAGE_LOAD_TIMEOUT,
+        retry_attempts: int = MAX_ATTEMPTS,
+        retry_backoff: float = BACKOFF,
+        progress: Optional[Progress] = None,
+        html_page_buffer: Optional[HtmlPageBuffer] = None,
+        max_requests: Optional[int] = None,
+        max_runtime: Optional[float] = None,
+        review_fields: Optional[List[str]] = None,
+        profile_fields: Optional[List[str]] = None,
+        captcha_timeout: float = CAPTCHA_TIMEOUT,
+        resume_file: Optional[str] = None,
+        session_pool: Optional[SessionPool] = None,
+        asset_cache: Optional[AssetCache] = None,
+        tabs: int = NUM_TABS,
+        parse_workers: int = PARSE_WORKERS,
     ):
+        """review_fields and profile_fields limit the extraction to these fields of
+        `REVIEW_FIELDS` and `PROFILE_FIELDS`, the selectors of all other fields are
+        not evaluated at all. profile_link is always extracted, as the profiles are
+        downloaded by it.
+
+        When a page shows a CAPTCHA, the scraper waits up to captcha_timeout seconds
+        for a human to solve it in the browser, see `_wait_for_human`.
+
+        With a session_pool the cookies are kept between pages and runs instead of
+        being deleted before every page. The sessions are rotated after a number of
+        pages and a session is discarded when it runs into a robot check.
+
+        With an asset_cache the browser loads static assets like scripts and styles
+        from the cache instead of the network.
+
+        With more than one tab the review pages and profiles are loaded at the same
+        time in that many tabs of the browser, see `TabLoader`.
+
+        With parse_workers the downloaded pages are extracted and formatted in a
+        pool of that many processes, while the browser already loads the next
+        pages. Up to parse_workers pages are extracted ahead of the page processed
+        in order. The formatters in the workers are not traced.
+        """
+        self.tabs = tabs
+        self._tab_loader = (
+            None if tabs == 1 else TabLoader(tabs, page_load_timeout)
+        )
+        self._asset_cache = asset_cache
+        self._sessions = session_pool
+        self._cancelled = Event()
+        self.captcha_timeout = captcha_timeout
+        self.resume_file = resume_file
+        self._wait_handler: Optional[WaitHandler] = None
+        self.max_requests = max_requests
+        self.max_runtime = max_runtime
+        self._budget: Optional[Budget] = None
+        self._on_profile: Optional[Callable[[str, Profile], None]] = None
+        self._progress = progress
+        self._html_page_buffer = html_page_buffer
+        self.retry_attempts = retry_attempts
+        self.retry_backoff = retry_backoff
         self._html_page_writer = html_page_writer
+        self._database = database
+        self._proxy_pool = proxy_pool
+        self._proxy: Optional[Proxy] = None
         self.have_browser_headless = have_browser_headless
         self.scroll_depth_profile_page = scroll_depth_profile_page
         self.scroll_depth_reviews_page = scroll_depth_reviews_page
-        self._webdriver = _init_browser_driver(browser, self.have_browser_headless)
+        if browser not in BROWSERS:
+            raise ValueError(f"Invalid browser: {browser}")
+        self.browser = browser
+        self._drivers = DriverManager(
+            self._create_driver,
+            max_pages_per_browser,
+            max_browser_memory,
+            page_load_timeout,
+        )
 
-        self._review_extractor = Extractor.from_yaml_string(
-            importlib.resources.read_text("amarps", "review_page_selectors.yml"),
-            formatters=Formatter.get_all(),
+        formatters = _create_formatters(proxy_pool)
+        if is_tracing():
+            formatters = [
+                TracedFormatter(f() if isinstance(f, type) else f) for f in formatters
+            ]
+        if review_fields is not None and "profile_link" not in review_fields:
+            review_fields = [*review_fields, "profile_link"]
+        self._review_extractor = _create_review_extractor(formatters, review_fields)
+        self._profile_extractor = _create_profile_extractor(
+            formatters, profile_fields
+        )
+        self._filter_info_extractor = Extractor(
+            {"num_reviews": FILTER_INFO_SELECTOR}, formatters=[NumFilteredReviews]
         )
-        self._profile_extractor = Extractor.from_yaml_string(
-            importlib.resources.read_text("amarps", "profile_page_selectors.yml"),
-            formatters=Formatter.get_all(),
+        self.parse_workers = parse_workers
+        self._parse_pool = (
+            None
+            if parse_workers == 0
+            else ProcessPoolExecutor(
+                parse_workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_parse_worker,
+                initargs=(
+                    review_fields,
+                    profile_fields,
+                    None if proxy_pool is None else [p.url for p in proxy_pool.proxies],
+                ),
+            )
         )
 
         self._IGNORE_PROFILE_HTTP_STATUS_CODES: Final = [403, 503]
+        self._profiles: Dict[str, Profile] = dict()
 
     def __del__(self):
-        if hasattr(self, "_webdriver"):
-            self._webdriver.close()
+        if hasattr(self, "_drivers"):
+            self._drivers.close()
+        if getattr(self, "_parse_pool", None) is not None:
+            self._parse_pool.shutdown(wait=False)
+
+    def warm_up(self) -> None:
+        """Start the browser now instead of on the first page load"""
+        self._drivers.start()
+
+    def _create_driver(self) -> Driver:
+        user_data_dir = None
+        if self._sessions is not None:
+            logger.info(f"Use {self._sessions.current}")
+            user_data_dir = self._sessions.current.user_data_dir
+        driver = init_browser_driver(
+            self.browser,
+            self.have_browser_headless,
+            user_data_dir,
+            None if self._tab_loader is None else PAGE_LOAD_STRATEGY,
+        )
+        if self._sessions is not None:
+            cookies = self._sessions.current.load_cookies()
+            if cookies and hasattr(driver, "execute_cdp_cmd"):
+                driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        if self._asset_cache is not None:
+            driver.request_interceptor = self._asset_cache.request_interceptor
+            driver.response_interceptor = self._asset_cache.response_interceptor
+        return driver
+
+    def _save_session(self) -> None:
+        """Save the cookies of the current session and rotate it when it is due"""
+        assert self._sessions is not None
+        self._sessions.current.save_cookies(self._drivers.driver.get_cookies())
+        if self._sessions.page_done():
+            self._sessions.rotate()
+            self._drivers.restart()
+
+    def _invalidate_session(self) -> None:
+        """Discard the current session, the browser is quit before, as it writes
+        into its profile directory on shutdown
+        """
+        if self._sessions is not None:
+            self._drivers.close()
+            self._sessions.invalidate()
+            self._drivers.restart()
+
+    def _get_session_cookies(self) -> Optional[Dict[str, str]]:
+        if self._sessions is None:
+            return None
+        return {c["name"]: c["value"] for c in self._sessions.current.load_cookies()}
 
-    def _raise_for_status(self) -> None:
+    def _get_status(self) -> Optional[int]:
         try:
-            status = self._webdriver.last_request.response.status_code
-            if status >= 400:
-                raise HttpError(status)
+            return self._drivers.driver.last_request.response.status_code
         except AttributeError:
             logger.warning("Failed to get HTTP status code")
+            return None
+
+    def _raise_for_status(self, status: Optional[int]) -> None:
+        if status is not None and status >= 400:
+            raise HttpError(status)
+
+    def _dump_html_pages(self, reason: str) -> None:
+        if self._html_page_buffer is not None:
+            self._html_page_buffer.dump(reason)
+
+    def _use_healthiest_proxy(self) -> None:
+        assert self._proxy_pool is not None
+        proxy = self._proxy_pool.get()
+        if proxy is not self._proxy:
+            logger.info(f"Use {proxy}")
+            self._drivers.proxy = proxy.seleniumwire_options
+            self._proxy = proxy
 
     def _get_html_data(
         self, url: str, scroll_depth: int, check_status: bool = True
     ) -> str:
-        logger.info(f"Download {url}")
+        with span("download", "navigate", url=url):
+            html_page = self._get_html_page(url, scroll_depth, check_status)
+        return self._check_html_page(url, html_page, scroll_depth, check_status)
+
+    def _check_html_page(
+        self, url: str, html_page: str, scroll_depth: int, check_status: bool
+    ) -> str:
+        """Handle a CAPTCHA on the downloaded page and save the session"""
+        if is_captcha(html_page):
+            logger.error(f"CAPTCHA on {url}")
+            self._dump_html_pages(f"CAPTCHA on {url}")
+            if self.have_browser_headless:
+                self._invalidate_session()
+                raise CaptchaError(url)
+            self._wait_for_human(
+                f"Please solve the CAPTCHA in the browser, {url} is retried",
+                self.captcha_timeout,
+            )
+            if self._cancelled.is_set():
+                raise CaptchaError(url)
+            html_page = self._get_html_page(url, scroll_depth, check_status)
+            if is_captcha(html_page):
+                self._invalidate_session()
+                raise CaptchaError(url)
+        if self._sessions is not None:
+            self._save_session()
+        return html_page
+
+    def _get_html_page(self, url: str, scroll_depth: int, check_status: bool) -> str:
+        if self._proxy_pool is not None:
+            self._use_healthiest_proxy()
+        return self._download_html_data(url, scroll_depth, check_status)
+
+    def _report_proxy(
+        self, latency: float, html_page: HtmlPageResult, status: Optional[int]
+    ) -> None:
+        """Score the proxy which loaded the page, like `ProxyPool.request` a page
+        which failed to load or has a blocked, gateway or no status is a failure
+        """
+        if self._proxy_pool is None or self._proxy is None:
+            return
+        failed = (
+            isinstance(html_page, Exception)
+            or is_proxy_failure(status)
+            or is_captcha(html_page)
+        )
+        self._proxy_pool.report(self._proxy, latency, failed)
+
+    @property
+    def needs_human(self) -> bool:
+        """Whether the scraper waits for a human to solve a CAPTCHA or login"""
+        return self._wait_handler is not None
+
+    def resume(self) -> None:
+        """Stop waiting for a human, e.g. after the CAPTCHA is solved"""
+        wait_handler = self._wait_handler
+        if wait_handler is not None:
+            wait_handler.resume()
+
+    def _wait_for_human(self, message: str, seconds: float) -> None:
+        """Block only this scraper until a human resumes it or the time is up
+
+        Resume with SIGINT on the main thread, by creating the resume_file or by
+        calling `resume`, e.g. from another thread.
+        """
+        triggers = "SIGINT"
+        if self.resume_file is not None:
+            triggers += f", creating {self.resume_file}"
+        logger.warning(
+            f"{message} after {seconds} seconds or when resumed by {triggers}"
+        )
+        self._wait_handler = WaitHandler(self.resume_file)
+        if self._cancelled.is_set():
+            self._wait_handler.resume()
+        try:
+            with span("wait for human", "wait"):
+                self._wait_handler.wait(seconds)
+        finally:
+            self._wait_handler = None
+
+    def _load_page(self, url: str, scroll_depth: int, driver: Driver) -> str:
+        if self._sessions is None:
+            driver.delete_all_cookies()
+        with span("get", "navigate", url=url):
+            driver.get(url)
+        with span("scroll and wait", "navigate", url=url):
+            driver.execute_script(f"window.scrollTo(0,{scroll_depth})")
+            sleep(random.random())
+
+        with span("page_source", "navigate", url=url):
+            return driver.page_source
+
+    def _download_html_data(
+        self, url: str, scroll_depth: int, check_status: bool
+    ) -> str:
+        if self._tab_loader is not None:
+            html_page = self._download_tab_pages([url], scroll_depth, check_status)[0]
+            if isinstance(html_page, Exception):
+                raise html_page
+            return html_page
 
-        self._webdriver.delete_all_cookies()
-        self._webdriver.get(url)
-        self._webdriver.execute_script(f"window.scrollTo(0,{scroll_depth})")
+        logger.info(f"Download {url}")
+        if self._budget is not None:
+            self._budget.spend()
 
-        sleep(random.random())
+        start = monotonic()
+        try:
+            html_page = self._drivers.run(partial(self._load_page, url, scroll_depth))
+        except Exception as e:
+            if isinstance(e, WebDriverException):
+                self._report_proxy(monotonic() - start, e, None)
+            self._dump_html_pages(f"{type(e).__name__}: {e}")
+            raise
+        latency = monotonic() - start
+        status = (
+            self._get_status()
+            if check_status
+            or self._html_page_buffer is not None
+            or self._proxy_pool is not None
+            else None
+        )
+        self._report_proxy(latency, html_page, status)
+        return self._keep_html_page(url, html_page, status, check_status)
 
-        html_page = self._webdriver.page_source
+    def _keep_html_page(
+        self, url: str, html_page: str, status: Optional[int], check_status: bool
+    ) -> str:
         if self._html_page_writer is not None:
             logger.debug("Write HTML page")
             self._html_page_writer.write(html_page)
+        if self._html_page_buffer is not None:
+            self._html_page_buffer.add(url, status, html_page)
 
         if check_status:
             logger.debug("Check HTTP status")
-            self._raise_for_status()
+            try:
+                self._raise_for_status(status)
+            except HttpError as e:
+                self._dump_html_pages(str(e))
+                raise
 
         return html_page
 
+    def _load_tab_pages(
+        self, urls: List[str], scroll_depth: int, driver: Driver
+    ) -> List[TabPage]:
+        assert self._tab_loader is not None
+        if self._sessions is None:
+            driver.delete_all_cookies()
+        with span("load tabs", "navigate", tabs=len(urls)):
+            return self._tab_loader.load(urls, scroll_depth, driver)
+
+    def _download_tab_pages(
+        self, urls: List[str], scroll_depth: int, check_status: bool = True
+    ) -> List[HtmlPageResult]:
+        """Download the pages at the same time in tabs, a page which fails has its
+        error instead of its html
+        """
+        for url in urls:
+            logger.info(f"Download {url}")
+            if self._budget is not None:
+                self._budget.spend()
+
+        start = monotonic()
+        try:
+            tab_pages = self._drivers.run(
+                partial(self._load_tab_pages, urls, scroll_depth), len(urls)
+            )
+        except Exception as e:
+            if isinstance(e, WebDriverException):
+                self._report_proxy(monotonic() - start, e, None)
+            self._dump_html_pages(f"{type(e).__name__}: {e}")
+            raise
+        latency = monotonic() - start
+        html_pages: List[HtmlPageResult] = []
+        for tab_page in tab_pages:
+            if tab_page.error is not None or tab_page.html is None:
+                error = tab_page.error or RuntimeError("Page not loaded")
+                self._report_proxy(latency, error, tab_page.status)
+                html_pages.append(error)
+                continue
+            self._report_proxy(latency, tab_page.html, tab_page.status)
+            try:
+                html_pages.append(
+                    self._keep_html_page(
+                        tab_page.url, tab_page.html, tab_page.status, check_status
+                    )
+                )
+            except HttpError as e:
+                html_pages.append(e)
+        return html_pages
+
+    def _get_tab_pages(
+        self, urls: List[str], scroll_depth: int
+    ) -> List[HtmlPageResult]:
+        if self._proxy_pool is not None:
+            self._use_healthiest_proxy()
+        return self._download_tab_pages(urls, scroll_depth)
+
+    def _get_html_pages(
+        self, urls: List[str], scroll_depth: int
+    ) -> List[HtmlPageResult]:
+        """Download the pages like `_get_html_data`, at the same time in the tabs if
+        there are several, a page which fails has its error instead of its html
+        """
+        if self._tab_loader is None:
+            html_pages: List[HtmlPageResult] = []
+            for url in urls:
+                try:
+                    html_pages.append(self._get_html_data(url, scroll_depth))
+                except RETRY_ERRORS as e:
+                    html_pages.append(e)
+            return html_pages
+
+        with span("download", "navigate", tabs=len(urls)):
+            html_pages = self._get_tab_pages(urls, scroll_depth)
+        for i, (url, html_page) in enumerate(zip(urls, html_pages)):
+            if isinstance(html_page, Exception):
+                continue
+            try:
+                html_pages[i] = self._check_html_page(
+                    url, html_page, scroll_depth, True
+                )
+            except RETRY_ERRORS as e:
+                html_pages[i] = e
+        return html_pages
+
     def _get_data(self, url: str) -> Dict[str, Any]:
-        return self._review_extractor.extract(
-            self._get_html_data(url, self.scroll_depth_reviews_page), base_url=url
-        )
+        html_page = self._get_html_data(url, self.scroll_depth_reviews_page)
+        return self._extract_review_data(url, html_page)
+
+    def _extract_review_data(self, url: str, html_page: str) -> Dict[str, Any]:
+        with span("extract reviews", "extract", url=url), use_locale(get_locale(url)):
+            data = self._review_extractor.extract(html_page, base_url=url)
+        return self._check_review_data(data)
+
+    def _check_review_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if all(value is None for value in data.values()):
+            self._dump_html_pages("No data could be extracted")
+        return data
+
+    def _submit_extraction(self, kind: str, url: str, html_page: str) -> Future:
+        assert self._parse_pool is not None
+        return self._parse_pool.submit(_parse_in_worker, kind, url, html_page)
+
+    def _start_review_extraction(self, url: str, html_page: str) -> ReviewPageResult:
+        if self._parse_pool is None:
+            return self._extract_review_data(url, html_page)
+        return self._submit_extraction("reviews", url, html_page)
+
+    def _get_data_of_pages(self, urls: List[str]) -> List[ReviewPageResult]:
+        """Get the data of the review pages, of a page which fails its error"""
+        if self._tab_loader is None and self._parse_pool is None:
+            results: List[ReviewPageResult] = []
+            for url in urls:
+                try:
+                    results.append(self._get_data(url))
+                except RETRY_ERRORS as e:
+                    results.append(e)
+            return results
+        html_pages = self._get_html_pages(urls, self.scroll_depth_reviews_page)
+        return [
+            p if isinstance(p, Exception) else self._start_review_extraction(url, p)
+            for url, p in zip(urls, html_pages)
+        ]
+
+    def _finish_review_data(
+        self, page: int, url: str, data: ReviewPageResult
+    ) -> Tuple[int, str, Union[Dict[str, Any], Exception]]:
+        if isinstance(data, Future):
+            with span("wait for extraction", "extract", url=url):
+                data = self._check_review_data(data.result())
+        return page, url, data
+
+    def _iter_review_data(
+        self, base_url: str, pages: Iterable[int]
+    ) -> Iterator[Tuple[int, str, Union[Dict[str, Any], Exception]]]:
+        """Download the review pages in batches of one page per tab, in order
+
+        With a parse pool up to parse_workers pages are extracted in the workers
+        while the next pages are downloaded.
+        """
+        page_iterator = iter(pages)
+        pending: Deque[Tuple[int, str, ReviewPageResult]] = deque()
+        try:
+            while not self._should_stop():
+                batch = list(islice(page_iterator, self.tabs))
+                if not batch:
+                    break
+                urls = [_get_page_url(base_url, page) for page in batch]
+                pending.extend(zip(batch, urls, self._get_data_of_pages(urls)))
+                while len(pending) > self.parse_workers:
+                    yield self._finish_review_data(*pending.popleft())
+            while pending:
+                yield self._finish_review_data(*pending.popleft())
+        finally:
+            for _, _, data in pending:
+                if isinstance(data, Future):
+                    data.cancel()
+
+    def clear_profile_cache(self) -> None:
+        self._profiles.clear()
 
     def get_profile_data(self, url: str) -> Dict[str, Any]:
+        return self._get_profile(url).to_dict()
+
+    def _extract_profile_data(
+        self, url: str, html_page: Union[str, Future]
+    ) -> Dict[str, Any]:
+        if isinstance(html_page, Future):
+            with span("wait for extraction", "extract", url=url):
+                return html_page.result()
+        with span("extract profile", "extract", url=url), use_locale(get_locale(url)):
+            return self._profile_extractor.extract(html_page, base_url=url)
+
+    def _download_profile_data(
+        self, url: str, html_page: Union[HtmlPageResult, Future, None] = None
+    ) -> Dict[str, Any]:
+        """Download and extract the profile, unless its page is already
+        downloaded, i.e. html_page is given, or even extracted in a worker
+        """
         profile_data = dict()
         try:
-            logger.info(f"Download profile {url}")
-            profile_data = self._profile_extractor.extract(
-                self._get_html_data(url, self.scroll_depth_profile_page), base_url=url
-            )
+            if html_page is None:
+                logger.info(f"Download profile {url}")
+                html_page = self._get_html_data(url, self.scroll_depth_profile_page)
+            elif isinstance(html_page, Exception):
+                raise html_page
+            profile_data = self._extract_profile_data(url, html_page)
             logger.info(json.dumps(profile_data, indent=4))
         except TypeError as e:
             logger.error(e)
@@ -272,14 +880,170 @@ class Scraper:
             if e.status_code not in self._IGNORE_PROFILE_HTTP_STATUS_CODES:
                 raise
 
-        if (
-            "profile_reviews" not in profile_data
-            and "profile_error" not in profile_data
-        ):
+        if not profile_data:
             profile_data["profile_error"] = "No data could be extracted"
+        if "profile_error" in profile_data:
+            self._dump_html_pages(profile_data["profile_error"])
 
         return profile_data
 
+    def _get_profile(
+        self,
+        url: str,
+        retry_queue: Optional[RetryQueue] = None,
+        html_page: Union[HtmlPageResult, Future, None] = None,
+    ) -> Profile:
+        if url in self._profiles:
+            logger.info(f"Reuse already downloaded profile {url}")
+            if self._progress is not None:
+                self._progress.cache_hit()
+            return self._profiles[url]
+
+        try:
+            with span("profile", "profile", url=url):
+                profile = Profile(self._download_profile_data(url, html_page))
+        except RETRY_ERRORS as e:
+            if retry_queue is None:
+                raise
+            profile = Profile({"profile_error": str(e)})
+            retry_queue.add(
+                "profile", url, e, partial(self._retry_profile, url, profile)
+            )
+        self._profiles[url] = profile
+        if self._progress is not None:
+            self._progress.profile_fetched()
+        return profile
+
+    def _retry_profile(self, url: str, profile: Profile) -> None:
+        """Download a failed profile again, with on_profile the profile already
+        passed on with its reviews is not changed, the new one is passed on instead
+        """
+        data = self._download_profile_data(url)
+        if self._on_profile is None:
+            profile.replace(data)
+        else:
+            profile = Profile(data)
+            if url in self._profiles:
+                self._profiles[url] = profile
+        if self._database is not None:
+            self._database.add_profile(url, profile.to_dict())
+        if self._on_profile is not None:
+            self._on_profile(url, profile)
+
+    def _should_stop(self) -> bool:
+        return self._cancelled.is_set() or (
+            self._budget is not None and self._budget.exhausted
+        )
+
+    def cancel(self) -> None:
+        """Stop the running extraction after the current page, thread-safe
+
+        A wait for a human or before retries ends right away.
+        """
+        self._cancelled.set()
+        self.resume()
+
+    def _get_profile_page(
+        self, url: str, html_page: HtmlPageResult
+    ) -> Union[HtmlPageResult, Future]:
+        if self._parse_pool is None or isinstance(html_page, Exception):
+            return html_page
+        return self._submit_extraction("profile", url, html_page)
+
+    def _download_profiles(
+        self, reviews: List[Review], retry_queue: RetryQueue
+    ) -> None:
+        """Download the missing profiles of the reviews batch by batch at the same
+        time in tabs and attach each to the first review of its user
+
+        With a parse pool a profile is extracted while the next ones are downloaded,
+        up to parse_workers profiles are in flight.
+        """
+        first_reviews: Dict[str, Review] = dict()
+        for r in reviews:
+            if r.profile_link is not None and r.profile_link not in self._profiles:
+                first_reviews.setdefault(r.profile_link, r)
+        urls = list(first_reviews)
+        pending: Deque[Tuple[str, Union[HtmlPageResult, Future]]] = deque()
+        try:
+            for i in range(0, len(urls), self.tabs):
+                if self._should_stop():
+                    break
+                batch = urls[i:i + self.tabs]
+                logger.info(f"Download profiles {batch}")
+                pages = self._get_html_pages(batch, self.scroll_depth_profile_page)
+                for url, html_page in zip(batch, pages):
+                    pending.append((url, self._get_profile_page(url, html_page)))
+                while len(pending) > self.parse_workers:
+                    url, page = pending.popleft()
+                    profile = self._get_profile(url, retry_queue, page)
+                    first_reviews[url].profile = profile
+            while pending:
+                url, page = pending.popleft()
+                first_reviews[url].profile = self._get_profile(url, retry_queue, page)
+        finally:
+            for _, page in pending:
+                if isinstance(page, Future):
+                    page.cancel()
+
+    def _attach_profiles(self, reviews: List[Review], retry_queue: RetryQueue) -> None:
+        if self._tab_loader is not None or self._parse_pool is not None:
+            self._download_profiles(reviews, retry_queue)
+        for r in reviews:
+            if r.profile_link is None or "profile" in r:
+                continue
+            if r.profile_link not in self._profiles and self._should_stop():
+                continue
+            r.profile = self._get_profile(r.profile_link, retry_queue)
+
+    def _release_profiles(self, reviews: List[Review]) -> None:
+        """Forget the profiles of completed reviews which are not kept, so that the
+        profiles do not pile up over the pages
+        """
+        for r in reviews:
+            profile_link = r.get("profile_link")
+            if profile_link is not None:
+                self._profiles.pop(profile_link, None)
+
+    def _complete_page(
+        self,
+        base_url: str,
+        page_reviews: List[Review],
+        on_page: Optional[Callable[[List[Review]], None]],
+    ) -> None:
+        if self._database is not None:
+            logger.debug("Write reviews to database")
+            self._database.add_reviews(base_url, page_reviews)
+        if on_page is not None:
+            on_page(page_reviews)
+        if self._progress is not None:
+            self._progress.page_done(len(page_reviews))
+
+    def _get_page_reviews(
+        self,
+        base_url: str,
+        page: int,
+        reviews_data: List[Dict[str, Any]],
+        download_profiles: bool,
+        on_page: Optional[Callable[[List[Review]], None]],
+        retry_queue: RetryQueue,
+        complete: bool = True,
+        keep: bool = True,
+    ) -> List[Review]:
+        logger.info(json.dumps(reviews_data, indent=4))
+        url = _get_page_url(base_url, page)
+
+        page_reviews = [Review({**r, "url": url}) for r in reviews_data]
+        if download_profiles:
+            self._attach_profiles(page_reviews, retry_queue)
+        if not complete:
+            return page_reviews
+        self._complete_page(base_url, page_reviews, on_page)
+        if keep:
+            return page_reviews
+        self._release_profiles(page_reviews)
+        return []
+
     def _get_reviews(
         self,
         base_url: str,
@@ -287,62 +1051,527 @@ class Scraper:
         start_page: int,
         stop_page: Optional[int],
         download_profiles: bool,
-    ) -> List[Dict[str, Any]]:
-        reviews = []
-        page = start_page
-        if stop_page is None:
-            stop_page = sys.maxsize
-        current_url = _get_page_url(base_url, page)
-        reviews_exist = True
-        reviews_data = data["reviews"]
-
-        while reviews_exist and page <= stop_page:
-            reviews_exist = False
-            logger.info(json.dumps(reviews_data, indent=4))
-
-            for r in reviews_data:
-                r["url"] = current_url
-                if download_profiles and r["profile_link"] is not None:
-                    r.update(self.get_profile_data(r["profile_link"]))
-                reviews.append(r)
-
-            page += 1
-            current_url = _get_page_url(base_url, page)
-            next_page_data = self._get_data(current_url)
-            if "reviews" in next_page_data and next_page_data["reviews"] is not None:
-                reviews_exist = True
-                reviews_data = next_page_data["reviews"]
-                review_count = len(reviews_data)
-                logger.info(f"number reviews: {review_count}")
+        on_page: Optional[Callable[[List[Review]], None]],
+        retry_queue: RetryQueue,
+        profile_priority: Optional[List[str]],
+        keep_reviews: bool,
+    ) -> Dict[int, List[Review]]:
+        get_page_reviews = partial(
+            self._get_page_reviews,
+            base_url,
+            download_profiles=download_profiles,
+            on_page=on_page,
+            retry_queue=retry_queue,
+            keep=keep_reviews,
+        )
+        # with a priority the profiles are downloaded after all pages are visited
+        get_page_reviews_first = partial(
+            get_page_reviews,
+            download_profiles=download_profiles and profile_priority is None,
+            complete=profile_priority is None,
+        )
+        pages = {start_page: get_page_reviews_first(start_page, data["reviews"] or [])}
 
-        return reviews
+        failed_pages = 0
+        last_page = sys.maxsize if stop_page is None else stop_page
+        review_data = self._iter_review_data(
+            base_url, range(start_page + 1, last_page + 1)
+        )
+        for page, url, page_data in review_data:
+            if isinstance(page_data, Exception):
+                retry = partial(self._retry_page, url, page, pages, get_page_reviews)
+                retry_queue.add("review_page", url, page_data, retry)
+                failed_pages += 1
+                if failed_pages <= MAX_CONSECUTIVE_FAILED_PAGES:
+                    continue
+                if not self._retry_failed_pages(retry_queue):
+                    self._truncate(base_url, page, last_page, retry_queue)
+                    break
+                failed_pages = 0
+                continue
+            failed_pages = 0
+
+            reviews_data = page_data["reviews"]
+            if reviews_data is None:
+                break
+            logger.info(f"number reviews: {len(reviews_data)}")
+            pages[page] = get_page_reviews_first(page, reviews_data)
+
+        if profile_priority is not None:
+            self._complete_pages_by_priority(
+                base_url,
+                pages,
+                download_profiles,
+                on_page,
+                retry_queue,
+                profile_priority,
+                keep_reviews,
+            )
 
-    def extract(
+        return pages
+
+    def _retry_failed_pages(self, retry_queue: RetryQueue) -> bool:
+        """Retry the failed pages before going on, return whether all succeeded"""
+        logger.warning(f"Retry {len(retry_queue)} failed items before going on")
+        failures = retry_queue.drain(RETRY_ERRORS, self._should_stop)
+        return not self._should_stop() and all(
+            f["kind"] != "review_page" for f in failures
+        )
+
+    def _truncate(
+        self, base_url: str, page: int, last_page: int, retry_queue: RetryQueue
+    ) -> None:
+        """Record that the pages after page are not downloaded"""
+        logger.error(f"Stop after {MAX_CONSECUTIVE_FAILED_PAGES + 1} failed pages")
+        if page < last_page:
+            retry_queue.add_failure(
+                "review_page",
+                _get_page_url(base_url, page + 1),
+                "Not requested after too many failed pages in a row, "
+                "neither were the following pages",
+            )
+
+    def _retry_page(
+        self,
+        url: str,
+        page: int,
+        pages: Dict[int, List[Review]],
+        get_page_reviews: Callable[[int, List[Dict[str, Any]]], List[Review]],
+    ) -> None:
+        reviews_data = self._get_data(url)["reviews"]
+        if reviews_data is not None:
+            pages[page] = get_page_reviews(page, reviews_data)
+
+    def _complete_pages_by_priority(
         self,
         base_url: str,
+        pages: Dict[int, List[Review]],
         download_profiles: bool,
-        start_page: int,
-        stop_page: Optional[int],
-        wait_time: int,
-    ) -> Dict[str, Any]:
-        data = self._get_data(_get_page_url(base_url, start_page))
+        on_page: Optional[Callable[[List[Review]], None]],
+        retry_queue: RetryQueue,
+        profile_priority: List[str],
+        keep_reviews: bool,
+    ) -> None:
+        if download_profiles:
+            self._attach_profiles(
+                sort_by_priority(
+                    [r for page in sorted(pages) for r in pages[page]],
+                    profile_priority,
+                    lambda url: url in self._profiles,
+                ),
+                retry_queue,
+            )
+        for page in sorted(pages):
+            self._complete_page(base_url, pages[page], on_page)
+            if not keep_reviews:
+                self._release_profiles(pages.pop(page))
+
+    def _probe(self, url: str) -> Optional[Dict[str, Any]]:
+        """Download and extract a review page without the browser
+
+        Returns None if the page could not be extracted, e.g. due to a CAPTCHA.
+        """
+        logger.info(f"Probe {url}")
+        if self._budget is not None:
+            self._budget.spend()
+        with span("probe", "navigate", url=url):
+            return self._probe_page(url)
+
+    def _probe_page(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            if self._proxy_pool is None:
+                response = requests.get(
+                    url,
+                    headers=PREFLIGHT_HEADERS,
+                    timeout=PREFLIGHT_TIMEOUT,
+                    cookies=self._get_session_cookies(),
+                )
+            else:
+                response = self._proxy_pool.request(
+                    url,
+                    headers=PREFLIGHT_HEADERS,
+                    timeout=PREFLIGHT_TIMEOUT,
+                    cookies=self._get_session_cookies(),
+                )
+        except requests.RequestException as e:
+            logger.warning(f"Probe failed: {e}")
+            return None
+
+        if response.status_code in PREFLIGHT_SKIP_STATUS_CODES:
+            raise HttpError(response.status_code)
+        if not response.ok:
+            logger.warning(f"Probe failed: {HttpError(response.status_code)}")
+            return None
+
+        with span("extract reviews", "extract", url=url), use_locale(get_locale(url)):
+            data = self._review_extractor.extract(response.text, base_url=url)
+        if data["reviews"] is None and data["product_title"] is None:
+            logger.warning("Probe failed: No data could be extracted")
+            return None
+        return data
+
+    def _preflight(
+        self, url: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Probe the first page, return the probed data and the result if the
+        product is skipped
+        """
+        try:
+            data = self._probe(url)
+        except HttpError as e:
+            logger.error(f"Skip product: {e}")
+            failure = {"kind": "product", "url": url, "error": str(e), "attempts": 1}
+            return None, {"reviews": [], "failures": [failure]}
+        if data is not None and not data["reviews"]:
+            logger.warning("Skip product: it has no reviews")
+            return data, {**data, "reviews": [], "failures": []}
+        return data, None
+
+    def _get_first_page_data(self, url: str, wait_time: int) -> Dict[str, Any]:
+        data = self._get_data(url)
 
         if data["reviews"] is None or len(data["reviews"]) == 0:
             logger.error("Failed to extract review data on 1st attempt")
+            self._dump_html_pages("Failed to extract review data on 1st attempt")
             if self.have_browser_headless:
                 raise RuntimeError(
                     "Browser is headless: there is no way to solve a CAPTCHA or login"
                 )
 
-            logger.warning(
-                f"The query will be retried after {wait_time} seconds or when SIGINT "
-                "is signaled, please try to solve a CAPTCHA or login if possible"
+            self._wait_for_human(
+                "Please try to solve a CAPTCHA or login if possible, "
+                "the query is retried",
+                wait_time,
+            )
+            data = self._get_data(url)
+
+        return data
+
+    def extract(
+        self,
+        base_url: str,
+        download_profiles: bool,
+        start_page: int,
+        stop_page: Optional[int],
+        wait_time: int,
+        on_page: Optional[Callable[[List[Review]], None]] = None,
+        preflight: bool = False,
+        profile_priority: Optional[List[str]] = None,
+        keep_reviews: bool = True,
+        on_profile: Optional[Callable[[str, Profile], None]] = None,
+    ) -> Dict[str, Any]:
+        """Download the reviews of a product
+
+        on_page is called with the reviews of each page once they are complete.
+        The failed profiles of these reviews are retried at the end, without
+        on_profile a retried profile replaces the data of the profile object of
+        the reviews, with on_profile it is a new object passed to on_profile with
+        its URL.
+        Without keep_reviews the reviews are only passed to on_page and not kept
+        for 'reviews' and their profiles are forgotten, so the memory use does not
+        grow with the number of pages. A reviewer on several pages is then
+        downloaded again.
+        Review pages and profiles which fail to download are retried at the end,
+        the ones which still fail are listed in 'failures'.
+
+        With preflight the first page is downloaded without the browser. If the
+        product does not exist or has no reviews, the browser is not started at all.
+
+        With a profile_priority the profiles are downloaded after all review pages,
+        ordered by the criteria in `budget.PRIORITY_CRITERIA`, so that the most
+        valuable profiles are downloaded before the budget is exhausted.
+        """
+        self._cancelled.clear()
+        self._on_profile = on_profile
+        if self.max_requests is not None or self.max_runtime is not None:
+            self._budget = Budget(self.max_requests, self.max_runtime)
+        first_url = _get_page_url(base_url, start_page)
+        data = None
+        if preflight:
+            data, skip_result = self._preflight(first_url)
+            if skip_result is not None:
+                return skip_result
+        if data is None:
+            data = self._get_first_page_data(first_url, wait_time)
+
+        if self._database is not None:
+            self._database.add_product(base_url, data)
+        if self._progress is not None:
+            self._progress.start(
+                estimate_pages(data.get("num_ratings"), start_page, stop_page)
             )
-            WaitHandler().wait(wait_time)
-            data = self._get_data(_get_page_url(base_url, start_page))
+        retry_queue = RetryQueue(
+            self.retry_attempts, self.retry_backoff, self._cancelled
+        )
+        pages = self._get_reviews(
+            base_url,
+            data,
+            start_page,
+            stop_page,
+            download_profiles,
+            on_page,
+            retry_queue,
+            profile_priority,
+            keep_reviews,
+        )
+        retry_queue.drain(RETRY_ERRORS, self._should_stop)
+        data["failures"] = retry_queue.failures
+        if self._budget is not None:
+            data["budget_exhausted"] = self._budget.exhausted
+        if self._progress is not None:
+            self._progress.finish()
+        data["reviews"] = [r for page in sorted(pages) for r in pages[page]]
+
+        return data
 
-        data["reviews"] = self._get_reviews(
-            base_url, data, start_page, stop_page, download_profiles
+    def iter_reviews(
+        self,
+        base_url: str,
+        download_profiles: bool = True,
+        start_page: int = 0,
+        stop_page: Optional[int] = None,
+        wait_time: int = 60,
+        buffer_pages: int = ITER_BUFFER_PAGES,
+        on_profile: Optional[Callable[[str, Profile], None]] = None,
+        **kwargs: Any,
+    ) -> Generator[Review, None, Dict[str, Any]]:
+        """Yield the reviews of a product as soon as their page is complete
+
+        The pages are downloaded by `extract` on a background thread, which waits
+        while buffer_pages pages are not consumed, so the memory use is bounded.
+        Closing the generator cancels the extraction after the current page. The
+        result data of `extract` without the reviews is returned by the generator.
+
+        A failed profile is retried at the end, after its reviews were yielded. The
+        profile of these reviews is not changed, the retried profile is passed to
+        on_profile with its URL in the thread iterating the generator.
+        """
+        queue = _PageQueue(buffer_pages)
+        kwargs.update(
+            base_url=base_url,
+            download_profiles=download_profiles,
+            start_page=start_page,
+            stop_page=stop_page,
+            wait_time=wait_time,
+        )
+        thread = Thread(
+            target=self._extract_into,
+            args=(queue, kwargs),
+            name="iter_reviews",
+            daemon=True,
         )
+        thread.start()
+        try:
+            while True:
+                kind, item = queue.get()
+                if kind == "error":
+                    raise item
+                if kind == "done":
+                    del item["reviews"]
+                    return item
+                if kind == "profile":
+                    if on_profile is not None:
+                        on_profile(*item)
+                    continue
+                yield from item
+        finally:
+            queue.stopped.set()
+            self.cancel()
+            thread.join()
+
+    def _extract_into(self, queue: _PageQueue, kwargs: Dict[str, Any]) -> None:
+        try:
+            data = self.extract(
+                on_page=partial(queue.put, "page"),
+                keep_reviews=False,
+                on_profile=lambda url, profile: queue.put("profile", (url, profile)),
+                **kwargs,
+            )
+            queue.put("done", data)
+        except _Cancelled:
+            pass
+        except Exception as e:
+            queue.put("error", e)
+
+    async def aiter_reviews(self, *args: Any, **kwargs: Any) -> AsyncIterator[Review]:
+        """Async counterpart of `iter_reviews`, each step of the iteration runs in
+        the default executor of the event loop
+        """
+        loop = asyncio.get_running_loop()
+        reviews = self.iter_reviews(*args, **kwargs)
+        done = object()
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                pending = loop.run_in_executor(None, next, reviews, done)
+                review = await asyncio.shield(pending)
+                pending = None
+                if review is done:
+                    return
+                yield review
+        finally:
+            if pending is not None:
+                # a generator can only be closed when it does not run
+                self.cancel()
+                await asyncio.wait([pending])
+            await loop.run_in_executor(None, reviews.close)
+
+    def _get_sample_page(
+        self,
+        base_url: str,
+        url: str,
+        reviews_data: List[Dict[str, Any]],
+        sample: Sample,
+        weight: float,
+        on_page: Optional[Callable[[List[Review]], None]],
+        retry_queue: RetryQueue,
+    ) -> List[Review]:
+        page_reviews = [
+            Review({**r, "url": url, "sampling_weight": weight}) for r in reviews_data
+        ]
+        for r in page_reviews:
+            link = r.get("profile_link")
+            if link is None or not sample.includes_profile(link):
+                continue
+            if link not in self._profiles and self._should_stop():
+                continue
+            r.profile = self._get_profile(link, retry_queue)
+            r.profile_sampling_weight = sample.profile_weight
+        self._complete_page(base_url, page_reviews, on_page)
+        return page_reviews
+
+    def _retry_sample_page(
+        self,
+        url: str,
+        reviews: List[Review],
+        get_sample_page: Callable[[str, List[Dict[str, Any]]], List[Review]],
+    ) -> None:
+        reviews_data = self._get_data(url)["reviews"]
+        reviews.extend(get_sample_page(url, reviews_data or []))
+
+    def _get_strata_data(
+        self, base_url: str, sample: Sample, wait_time: int
+    ) -> Tuple[Dict[str, Any], Dict[Optional[str], Dict[str, Any]]]:
+        """Download the first page of the listing and of each stratum to count
+        their pages
+        """
+        data = self._get_first_page_data(_get_page_url(base_url, 1), wait_time)
+        strata_data: Dict[Optional[str], Dict[str, Any]] = {None: data}
+        for star in sample.strata:
+            if star is None:
+                continue
+            try:
+                strata_data[star] = self._get_stratum_data(
+                    _get_page_url(base_url, 1, star)
+                )
+            except RETRY_ERRORS as e:
+                logger.error(f"Leave out the {star} reviews from the sample: {e}")
+                strata_data[star] = {"reviews": None, "num_ratings": None}
+        if sample.stratify and all(
+            strata_data[s]["num_ratings"] is None for s in STAR_FILTERS
+        ):
+            logger.error(
+                "Failed to count the reviews of the star filters, sample without "
+                "stratification"
+            )
+            sample.stratify = False
+        return data, strata_data
+
+    def _get_stratum_data(self, url: str) -> Dict[str, Any]:
+        """Get the data of the first page of a star filter, its 'num_ratings' is
+        the number of reviews with this filter instead of all ratings
+        """
+        html_page = self._get_html_data(url, self.scroll_depth_reviews_page)
+        data = self._extract_review_data(url, html_page)
+        with use_locale(get_locale(url)):
+            filter_info = self._filter_info_extractor.extract(html_page)
+        data["num_ratings"] = filter_info["num_reviews"]
+        return data
+
+    def _get_sample_pages(
+        self,
+        base_url: str,
+        sample: Sample,
+        strata_data: Dict[Optional[str], Dict[str, Any]],
+        on_page: Optional[Callable[[List[Review]], None]],
+        retry_queue: RetryQueue,
+    ) -> List[Review]:
+        strata_pages = {
+            s: count_pages(strata_data[s].get("num_ratings")) for s in sample.strata
+        }
+        drawn = sample.draw_pages(strata_pages)
+        logger.info(f"Sampled pages: {drawn}")
+        if self._progress is not None:
+            self._progress.start(sum(len(pages) for pages in drawn.values()))
+
+        reviews: List[Review] = []
+        for stratum, pages in drawn.items():
+            get_sample_page = partial(
+                self._get_sample_page,
+                base_url,
+                sample=sample,
+                weight=sample.page_weight(strata_pages[stratum], len(pages)),
+                on_page=on_page,
+                retry_queue=retry_queue,
+            )
+            for page in pages:
+                if self._should_stop():
+                    break
+                url = _get_page_url(base_url, page, stratum)
+                try:
+                    page_data = strata_data[stratum] if page == 1 else None
+                    if page_data is None:
+                        page_data = self._get_data(url)
+                except RETRY_ERRORS as e:
+                    retry = partial(
+                        self._retry_sample_page, url, reviews, get_sample_page
+                    )
+                    retry_queue.add("review_page", url, e, retry)
+                    continue
+                reviews.extend(get_sample_page(url, page_data["reviews"] or []))
+        return reviews
 
+    def extract_sample(
+        self,
+        base_url: str,
+        sample: Sample,
+        wait_time: int,
+        on_page: Optional[Callable[[List[Review]], None]] = None,
+        on_profile: Optional[Callable[[str, Profile], None]] = None,
+    ) -> Dict[str, Any]:
+        """Download a random sample of the review pages and profiles of a product
+
+        Each review is marked with its 'sampling_weight', the number of pages its
+        page represents in its stratum. Reviews with a downloaded profile are also
+        marked with the 'profile_sampling_weight'. The first page of each stratum is
+        downloaded to count its pages, it is reused when it is drawn. If none of the
+        star filters can be counted, the sample is not stratified.
+        on_page and on_profile are used as by `extract`.
+        """
+        self._cancelled.clear()
+        self._on_profile = on_profile
+        if self.max_requests is not None or self.max_runtime is not None:
+            self._budget = Budget(self.max_requests, self.max_runtime)
+        data, strata_data = self._get_strata_data(base_url, sample, wait_time)
+        if self._database is not None:
+            self._database.add_product(base_url, data)
+
+        retry_queue = RetryQueue(
+            self.retry_attempts, self.retry_backoff, self._cancelled
+        )
+        reviews = self._get_sample_pages(
+            base_url, sample, strata_data, on_page, retry_queue
+        )
+        retry_queue.drain(RETRY_ERRORS, self._should_stop)
+        data["failures"] = retry_queue.failures
+        if self._budget is not None:
+            data["budget_exhausted"] = self._budget.exhausted
+        if self._progress is not None:
+            self._progress.finish()
+        data["sampling"] = {
+            "seed": sample.seed,
+            "stratified": sample.stratify,
+            "profile_fraction": sample.profile_fraction,
+        }
+        data["reviews"] = reviews
         return data
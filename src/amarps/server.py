@@ -0,0 +1,441 @@
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+from queue import Queue
+from socketserver import ThreadingMixIn, UnixStreamServer
+from threading import Lock
+from typing import Any, Callable, Dict, Final, List, Optional, Set, TYPE_CHECKING
+
+import click
+import click_log
+
+from . import __version__
+from .budget import PRIORITY_CRITERIA
+from .defaults import (
+    BROWSER,
+    CAPTCHA_TIMEOUT,
+    HAVE_BROWSER_HEADLESS,
+    NUM_TABS,
+    PAGE_LOAD_TIMEOUT,
+    PARSE_WORKERS,
+    PROFILE_FIELDS,
+    REVIEW_FIELDS,
+    SCROLL_DEPTH_PROFILE_PAGE,
+    SCROLL_DEPTH_REVIEWS_PAGE,
+)
+from .main import _comma_separated
+from .proxies import ProxyPool
+from .records import collect_profiles, LAYOUTS, Profile, Review, to_json
+from .sampling import PROFILE_FRACTION, Sample
+
+if TYPE_CHECKING:
+    from .scraper import Scraper
+
+
+JOB_DEFAULTS: Final = {
+    "profile_link": False,
+    "profiles": True,
+    "start_page": 0,
+    "stop_page": None,
+    "sleep_time": 60,
+    "preflight": False,
+    "layout": LAYOUTS[0],
+    "sample": None,
+    "sample_seed": None,
+    "stratify": True,
+    "sample_profiles": PROFILE_FRACTION,
+    "profile_priority": None,
+    "max_requests": None,
+    "max_runtime": None,
+}
+
+
+logger = logging.getLogger(__name__)
+scrapper_logger = logging.getLogger(f"{__package__}.scraper")
+
+click_log.basic_config(logger)
+
+
+class ScraperPool:
+    """Pool of initialized scrapers with running browsers which are reused for all
+    jobs
+    """
+
+    def __init__(self, create_scraper: Callable[[], "Scraper"], size: int):
+        self._all_scrapers = [create_scraper() for _ in range(size)]
+        for scraper in self._all_scrapers:
+            scraper.warm_up()
+        self._scrapers: Queue = Queue()
+        for scraper in self._all_scrapers:
+            self._scrapers.put(scraper)
+        self.size = size
+        self._lock = Lock()
+        self._pending = 0
+        self._running = 0
+
+    def status(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queue_depth": self._pending,
+                "running": self._running,
+                "scrapers": self.size,
+                "needs_human": sum(s.needs_human for s in self._all_scrapers),
+            }
+
+    def resume(self) -> int:
+        """Resume all scrapers waiting for a human, return how many were waiting"""
+        waiting = [s for s in self._all_scrapers if s.needs_human]
+        for scraper in waiting:
+            scraper.resume()
+        return len(waiting)
+
+    def run(self, job: Callable[["Scraper"], None]) -> None:
+        with self._lock:
+            self._pending += 1
+        scraper = self._scrapers.get()
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        try:
+            scraper.clear_profile_cache()
+            job(scraper)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._scrapers.put(scraper)
+
+
+def _parse_job(body: bytes) -> Dict[str, Any]:
+    job = json.loads(body)
+    if not isinstance(job, dict) or not isinstance(job.get("link"), str):
+        raise ValueError("A job must be a JSON object with a 'link'")
+    unknown = job.keys() - JOB_DEFAULTS.keys() - {"link"}
+    if unknown:
+        raise ValueError(f"Unknown job options: {sorted(unknown)}")
+    if job.get("layout", LAYOUTS[0]) not in LAYOUTS:
+        raise ValueError(f"Invalid layout: {job['layout']}")
+    priority = job.get("profile_priority")
+    if priority is not None and (
+        not isinstance(priority, list) or not set(priority) <= set(PRIORITY_CRITERIA)
+    ):
+        raise ValueError(f"Invalid profile_priority: {priority}")
+    if not 0 <= job.get("sample_profiles", 0) <= 1:
+        raise ValueError(f"Invalid sample_profiles: {job['sample_profiles']}")
+    return {**JOB_DEFAULTS, **job}
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """Handle `POST /jobs`, `POST /resume` and `GET /status`
+
+    The response to a job is streamed as JSON lines: one line per page of reviews
+    followed by a line with the remaining result data. With the layout "profiles"
+    a page line also has the map 'profiles' with the profiles of its reviews not
+    sent in an earlier line. A profile which failed and succeeded when retried at
+    the end is sent in a line with the map 'profiles', whatever the layout.
+    """
+
+    server: Any
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(data).encode())
+
+    def _write_line(self, data: Dict[str, Any], inline_profiles: bool = True) -> None:
+        default = partial(to_json, inline_profiles=inline_profiles)
+        self.wfile.write(json.dumps(data, default=default).encode() + b"\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        if self.path != "/status":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self._send_json(200, self.server.scraper_pool.status())
+
+    def do_POST(self) -> None:
+        if self.path == "/resume":
+            self._send_json(200, {"resumed": self.server.scraper_pool.resume()})
+            return
+        if self.path != "/jobs":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            job = _parse_job(self.rfile.read(int(self.headers["Content-Length"])))
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        logger.info(f"Start job {job}")
+        self.server.scraper_pool.run(lambda scraper: self._run_job(scraper, job))
+
+    def _run_job(self, scraper: "Scraper", job: Dict[str, Any]) -> None:
+        inline_profiles = job["layout"] == "inline"
+        sent_profiles: Set[str] = set()
+
+        def write_reviews(reviews: List[Review]) -> None:
+            line: Dict[str, Any] = {"reviews": reviews}
+            if not inline_profiles:
+                line["profiles"] = {
+                    link: profile
+                    for link, profile in collect_profiles(reviews).items()
+                    if link not in sent_profiles
+                }
+                sent_profiles.update(line["profiles"])
+            self._write_line(line, inline_profiles)
+
+        def write_profile(link: str, profile: Profile) -> None:
+            self._write_line({"profiles": {link: profile}})
+
+        scraper.max_requests = job["max_requests"]
+        scraper.max_runtime = job["max_runtime"]
+        try:
+            if job["profile_link"]:
+                data = scraper.get_profile_data(job["link"])
+            elif job["sample"] is not None:
+                data = scraper.extract_sample(
+                    job["link"],
+                    Sample(
+                        job["sample"],
+                        job["sample_seed"],
+                        job["stratify"],
+                        job["sample_profiles"] if job["profiles"] else 0,
+                    ),
+                    job["sleep_time"],
+                    write_reviews,
+                    on_profile=write_profile,
+                )
+                del data["reviews"]
+            else:
+                data = scraper.extract(
+                    job["link"],
+                    job["profiles"],
+                    job["start_page"],
+                    job["stop_page"],
+                    job["sleep_time"],
+                    write_reviews,
+                    job["preflight"],
+                    job["profile_priority"],
+                    on_profile=write_profile,
+                )
+                del data["reviews"]
+        except Exception as e:
+            logger.exception(f"Job {job} failed")
+            data = {"error": str(e)}
+        self._write_line({"result": data})
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(
+    scraper_pool: ScraperPool,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    unix_socket: Optional[str] = None,
+) -> Any:
+    server: Any
+    if unix_socket is None:
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    else:
+        server = _ThreadingUnixHTTPServer(unix_socket, JobRequestHandler)
+    server.scraper_pool = scraper_pool
+    return server
+
+
+@click.command()
+@click_log.simple_verbosity_option(scrapper_logger, show_default=True)
+@click_log.simple_verbosity_option(logger, show_default=True)
+@click.version_option(version=__version__)
+@click.option(
+    "--host",
+    help="Host to listen on",
+    default="127.0.0.1",
+    show_default=True,
+)
+@click.option(
+    "--port",
+    help="Port to listen on",
+    type=int,
+    default=8080,
+    show_default=True,
+)
+@click.option(
+    "--unix-socket",
+    help="Listen on this Unix socket instead of host and port",
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of browsers kept running to process jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+)
+@click.option(
+    "--browser",
+    "-b",
+    help="Set which browser should be used",
+    type=click.Choice(["chrome", "firefox"]),
+    default=BROWSER,
+    show_default=True,
+)
+@click.option(
+    "--headless/--no-headless",
+    "have_browser_headless",
+    help="Run browser in background making it more easily detectable as a web scraper",
+    default=HAVE_BROWSER_HEADLESS,
+    show_default=True,
+)
+@click.option(
+    "--proxies",
+    help="File with one proxy URL per line, requests use the healthiest proxy",
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--tabs",
+    help=(
+        "Load this many review pages or profiles at the same time in the tabs of "
+        "one browser"
+    ),
+    type=click.IntRange(min=1),
+    default=NUM_TABS,
+    show_default=True,
+)
+@click.option(
+    "--parse-workers",
+    help=(
+        "Extract the downloaded pages in this many processes while the browser "
+        "loads the next pages, 0 extracts them in the browser thread"
+    ),
+    type=click.IntRange(min=0),
+    default=PARSE_WORKERS,
+    show_default=True,
+)
+@click.option(
+    "--max-pages-per-browser",
+    help="Replace a browser with a new one after this many pages",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-browser-memory",
+    help="Replace a browser with a new one when it uses more memory (in MiB)",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--page-load-timeout",
+    help="Time in seconds after which a page load is aborted and retried",
+    type=click.FloatRange(min=0, min_open=True),
+    default=PAGE_LOAD_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--captcha-timeout",
+    help=(
+        "Time in seconds a browser waits for a CAPTCHA to be solved, the other "
+        "browsers keep processing jobs, use `POST /resume` to resume earlier"
+    ),
+    type=click.FloatRange(min=0),
+    default=CAPTCHA_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--scroll-depth-profile",
+    help="Scroll depth for the profile pages",
+    type=int,
+    default=SCROLL_DEPTH_PROFILE_PAGE,
+    show_default=True,
+)
+@click.option(
+    "--scroll-depth-reviews",
+    help="Scroll depth for the reviews pages",
+    type=int,
+    default=SCROLL_DEPTH_REVIEWS_PAGE,
+    show_default=True,
+)
+@click.option(
+    "--review-fields",
+    help=(
+        "Extract only these comma separated review fields for all jobs, "
+        "profile_link is always added: " + ", ".join(REVIEW_FIELDS)
+    ),
+    callback=_comma_separated(REVIEW_FIELDS),
+)
+@click.option(
+    "--profile-fields",
+    help=(
+        "Extract only these comma separated profile fields for all jobs: "
+        + ", ".join(PROFILE_FIELDS)
+    ),
+    callback=_comma_separated(PROFILE_FIELDS),
+)
+def serve(
+    host: str,
+    port: int,
+    unix_socket: Optional[str],
+    workers: int,
+    browser: str,
+    have_browser_headless: bool,
+    proxies: Optional[str],
+    tabs: int,
+    parse_workers: int,
+    max_pages_per_browser: Optional[int],
+    max_browser_memory: Optional[int],
+    page_load_timeout: float,
+    captcha_timeout: float,
+    scroll_depth_profile: int,
+    scroll_depth_reviews: int,
+    review_fields: Optional[List[str]],
+    profile_fields: Optional[List[str]],
+) -> None:
+    """Keep browsers running and process scraping jobs sent over HTTP
+
+    A job is sent with `POST /jobs` as JSON object with the LINK as 'link' and
+    optionally the options 'profile_link', 'profiles', 'start_page', 'stop_page',
+    'sleep_time', 'preflight', 'layout', 'sample', 'sample_seed', 'stratify',
+    'sample_profiles', 'profile_priority' (a list), 'max_requests' and
+    'max_runtime' of the command `amarps`. The extracted fields are set for all
+    jobs by --review-fields and --profile-fields, since the selectors are loaded
+    once into the browsers and parse workers. The number of waiting jobs and of
+    browsers waiting for a solved CAPTCHA is reported by `GET /status`,
+    `POST /resume` resumes these browsers.
+    """
+    from .scraper import Scraper
+
+    proxy_pool = None if proxies is None else ProxyPool.from_file(proxies)
+    scraper_pool = ScraperPool(
+        lambda: Scraper(
+            None,
+            browser,
+            have_browser_headless,
+            scroll_depth_profile,
+            scroll_depth_reviews,
+            proxy_pool=proxy_pool,
+            max_pages_per_browser=max_pages_per_browser,
+            tabs=tabs,
+            parse_workers=parse_workers,
+            max_browser_memory=(
+                None if max_browser_memory is None else max_browser_memory * 2**20
+            ),
+            page_load_timeout=page_load_timeout,
+            captcha_timeout=captcha_timeout,
+            review_fields=review_fields,
+            profile_fields=profile_fields,
+        ),
+        workers,
+    )
+    server = create_server(scraper_pool, host, port, unix_socket)
+    logger.info(f"Ready to process jobs with {workers} browsers")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,85 @@
+import json
+import logging
+from pathlib import Path
+import shutil
+from typing import Any, Dict, Final, List, Union
+
+
+NUM_SESSIONS: Final = 3
+SESSION_PAGES: Final = 100
+
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """Browser session persisted in a directory: the browser profile and a cookie
+    jar, so that it can be reused by later runs
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.user_data_dir = directory / "user-data"
+        self.cookies_file = directory / "cookies.json"
+        self.user_data_dir.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"Session({str(self.directory)!r})"
+
+    def load_cookies(self) -> List[Dict[str, Any]]:
+        try:
+            return json.loads(self.cookies_file.read_text())
+        except (OSError, ValueError):
+            return []
+
+    def save_cookies(self, cookies: List[Dict[str, Any]]) -> None:
+        self.cookies_file.write_text(json.dumps(cookies))
+
+    def invalidate(self) -> None:
+        """Delete all data of the session, it starts again empty"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.user_data_dir.mkdir(parents=True, exist_ok=True)
+
+
+class SessionPool:
+    """Pool of persistent sessions which are rotated after `max_pages` pages
+
+    The sessions are kept in subdirectories of `directory`, so they are reused
+    across runs. Every browser needs its own directory, as a browser locks its
+    profile.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        size: int = NUM_SESSIONS,
+        max_pages: int = SESSION_PAGES,
+    ):
+        if size < 1:
+            raise ValueError(f"Invalid number of sessions: {size}")
+        self.directory = Path(directory)
+        self.max_pages = max_pages
+        self.sessions = [Session(self.directory / f"{i:03}") for i in range(size)]
+        self._index = 0
+        self.pages = 0
+
+    @property
+    def current(self) -> Session:
+        return self.sessions[self._index]
+
+    def page_done(self) -> bool:
+        """Count a page of the current session, return whether to rotate"""
+        self.pages += 1
+        return self.pages >= self.max_pages
+
+    def rotate(self) -> Session:
+        self._index = (self._index + 1) % len(self.sessions)
+        self.pages = 0
+        logger.info(f"Rotate to {self.current}")
+        return self.current
+
+    def invalidate(self) -> Session:
+        """Discard the current session, e.g. after a robot check, and rotate"""
+        logger.warning(f"Invalidate {self.current}")
+        self.current.invalidate()
+        return self.rotate()
@@ -0,0 +1,142 @@
+import logging
+import random
+from time import monotonic, sleep
+from typing import Final, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from .defaults import PAGE_LOAD_TIMEOUT
+from .driver import Driver
+
+
+POLL_INTERVAL: Final = 0.1
+PAGE_LOAD_STRATEGY: Final = "none"
+
+# The window object is replaced when the new document is committed, so the flag
+# tells the old document still shown in the tab apart from the requested one
+_NAVIGATE_SCRIPT: Final = "window.amarpsStale = true; location.href = arguments[0];"
+_IS_LOADED_SCRIPT: Final = (
+    "return window.amarpsStale === undefined && location.href !== 'about:blank' "
+    "&& document.readyState === 'complete';"
+)
+_STATUS_SCRIPT: Final = (
+    "const entry = performance.getEntriesByType('navigation')[0];"
+    "return entry && entry.responseStatus ? entry.responseStatus : null;"
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class TabPage:
+    """Page loaded in a tab, either with its html or with the error of its load"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.html: Optional[str] = None
+        self.status: Optional[int] = None
+        self.error: Optional[WebDriverException] = None
+
+
+class _Tab:
+    def __init__(self, handle: str, page: TabPage):
+        self.handle = handle
+        self.page = page
+        self.read_at: Optional[float] = None
+
+
+def _get_requests_status(driver: Driver, url: str) -> Optional[int]:
+    """Get the status of the document from the requests recorded by seleniumwire"""
+    for request in reversed(getattr(driver, "requests", [])):
+        if request.url == url and request.response is not None:
+            return request.response.status_code
+    return None
+
+
+def get_status(driver: Driver) -> Optional[int]:
+    """Get the HTTP status of the document in the current tab
+
+    The shared `last_request` of seleniumwire can belong to any tab, so the status
+    is read from the navigation timing of the document.
+    """
+    status = driver.execute_script(_STATUS_SCRIPT)
+    if status is None:
+        status = _get_requests_status(driver, driver.current_url)
+    if status is None:
+        logger.warning("Failed to get HTTP status code")
+    return status
+
+
+class TabLoader:
+    """Load several pages at the same time in the tabs of one browser
+
+    A browser needs much less memory for another tab than another browser. The
+    pages are loaded without blocking, so the browser must be started with the
+    page load strategy `PAGE_LOAD_STRATEGY`, the loader then polls the tabs until
+    their documents are complete or `page_load_timeout` is up. Like a single page,
+    each page is scrolled and read after a random delay.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        page_load_timeout: float = PAGE_LOAD_TIMEOUT,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        if size < 1:
+            raise ValueError(f"Invalid number of tabs: {size}")
+        self.size = size
+        self.page_load_timeout = page_load_timeout
+        self.poll_interval = poll_interval
+
+    def _get_handles(self, driver: Driver, count: int) -> List[str]:
+        handles = driver.window_handles
+        while len(handles) < count:
+            driver.switch_to.new_window("tab")
+            handles = driver.window_handles
+        return handles[:count]
+
+    def _poll(self, driver: Driver, tab: _Tab, scroll_depth: int) -> bool:
+        """Advance the tab, return whether its page is read"""
+        driver.switch_to.window(tab.handle)
+        if tab.read_at is None:
+            if driver.execute_script(_IS_LOADED_SCRIPT):
+                driver.execute_script(f"window.scrollTo(0,{scroll_depth})")
+                tab.read_at = monotonic() + random.random()
+            return False
+        if monotonic() < tab.read_at:
+            return False
+        tab.page.status = get_status(driver)
+        tab.page.html = driver.page_source
+        return True
+
+    def _abort(self, driver: Driver, tab: _Tab) -> None:
+        driver.switch_to.window(tab.handle)
+        driver.execute_script("window.stop();")
+        tab.page.error = TimeoutException(f"Timed out loading {tab.page.url}")
+        logger.warning(tab.page.error.msg)
+
+    def load(self, urls: List[str], scroll_depth: int, driver: Driver) -> List[TabPage]:
+        """Load each URL in its own tab, the pages are in the order of the URLs"""
+        if len(urls) > self.size:
+            raise ValueError(f"More URLs than tabs: {len(urls)} > {self.size}")
+        tabs = [
+            _Tab(handle, TabPage(url))
+            for handle, url in zip(self._get_handles(driver, len(urls)), urls)
+        ]
+        for tab in tabs:
+            driver.switch_to.window(tab.handle)
+            driver.execute_script(_NAVIGATE_SCRIPT, tab.page.url)
+
+        deadline = monotonic() + self.page_load_timeout
+        pending = tabs
+        while pending:
+            pending = [t for t in pending if not self._poll(driver, t, scroll_depth)]
+            if monotonic() > deadline:
+                for tab in pending:
+                    if tab.read_at is None:
+                        self._abort(driver, tab)
+                pending = [t for t in pending if t.page.error is None]
+            if pending:
+                sleep(self.poll_interval)
+        return [tab.page for tab in tabs]
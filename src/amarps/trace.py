@@ -0,0 +1,116 @@
+from contextlib import contextmanager, nullcontext
+import json
+import os
+from pathlib import Path
+from threading import current_thread, get_ident, Lock
+from time import perf_counter
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Union
+
+
+class Tracer:
+    """Record spans as complete events of the Chrome Trace Event Format
+
+    The written file can be opened with Perfetto or `chrome://tracing`, each
+    thread is shown as its own track named after the thread.
+    """
+
+    def __init__(self, clock: Callable[[], float] = perf_counter):
+        self._clock = clock
+        self._start = clock()
+        self._pid = os.getpid()
+        self._lock = Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = dict()
+
+    def _microseconds(self, seconds: float) -> float:
+        return round(seconds * 1e6, 1)
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[None]:
+        tid = get_ident()
+        start = self._clock()
+        try:
+            yield
+        finally:
+            end = self._clock()
+            with self._lock:
+                if tid not in self._threads:
+                    self._threads[tid] = current_thread().name
+                self._events.append(
+                    {
+                        "name": name,
+                        "cat": category,
+                        "ph": "X",
+                        "ts": self._microseconds(start - self._start),
+                        "dur": self._microseconds(end - start),
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": args,
+                    }
+                )
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            thread_names = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._threads.items()
+            ]
+            return {
+                "traceEvents": thread_names + self._events,
+                "displayTimeUnit": "ms",
+            }
+
+    def write(self, path: Union[str, Path]) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start_tracing() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def is_tracing() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, category: str = "scraper", **args: Any) -> ContextManager:
+    """Trace the enclosed code if tracing is started, otherwise do nothing"""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.span(name, category, **args)
+
+
+class TracedFormatter:
+    """Trace every call of a selectorlib formatter
+
+    It is not a subclass of `Formatter`, so it is not listed by
+    `Formatter.get_all`.
+    """
+
+    def __init__(self, formatter: Any):
+        self._formatter = formatter
+
+    @property
+    def name(self) -> str:
+        return self._formatter.name
+
+    def format(self, value: Any) -> Any:
+        with span(self.name, "format"):
+            return self._formatter.format(value)
@@ -1,6 +1,6 @@
 from pathlib import Path
 import re
-from typing import Final
+from typing import Final, Optional
 
 import pytest
 
@@ -110,3 +110,61 @@ def httpserver_profile_urls(testdata_dir, httpserver):
     prepare(r"*/sync$", "text/plain", False)
 
     return [httpserver.url_for("/profile1"), httpserver.url_for("/profile2")]
+
+
+REVIEW_HTML: Final = """
+<div class="review"><div class="a-section celwidget">
+  <div class="a-row">
+    <a class="a-profile" href="/profile{number}"><span>Name</span></a>
+  </div>
+  <div class="a-row">
+    <a class="a-link-normal" title="{rating}.0 out of 5 stars" href="#">stars</a>
+    <a class="review-title" href="#"><span>Title {number}</span></a>
+  </div>
+  <span class="a-size-base a-color-secondary">
+    Reviewed in the United States on January 3, 2023
+  </span>
+  <span data-hook="avp-badge">Verified Purchase</span>
+  <div class="a-row review-data"><span class="review-text">Body {number}</span></div>
+  <span data-hook="review-voting-widget">
+    <span class="a-size-base">{number} people found this helpful</span>
+  </span>
+</div></div>
+"""
+
+
+def review_page_html(
+    num_reviews: int, num_ratings: int = 42, num_filtered_reviews: Optional[int] = None
+) -> str:
+    reviews = "".join(
+        REVIEW_HTML.format(number=i + 2, rating=1 + i % 5) for i in range(num_reviews)
+    )
+    filter_info = (
+        ""
+        if num_filtered_reviews is None
+        else '<div data-hook="cr-filter-info-review-rating-count">'
+        f"{num_ratings:,} total ratings, {num_filtered_reviews:,} with reviews</div>"
+    )
+    return f"""<html><body>
+<h1><a data-hook="product-link" href="#">Product Title</a></h1>
+<span data-hook="rating-out-of-text">4.5 out of 5</span>
+<div data-hook="total-review-count">
+  <span class="a-size-base">{num_ratings} global ratings</span>
+</div>
+{filter_info}
+{reviews}
+</body></html>"""
+
+
+@pytest.fixture()
+def httpserver_product_url(httpserver):
+    """Product with one page of reviews, review pages are requested with pageNumber"""
+    httpserver.expect_request(
+        "/product-reviews/ID123ABC/ref=cm_cr_arp_d_paging_btm_next_1",
+        query_string="pageNumber=1",
+    ).respond_with_data(review_page_html(3), content_type="text/html")
+    httpserver.expect_request(
+        "/product-reviews/ID123ABC/ref=cm_cr_arp_d_paging_btm_next_2",
+        query_string="pageNumber=2",
+    ).respond_with_data(review_page_html(0), content_type="text/html")
+    return httpserver.url_for("/product-reviews/ID123ABC/")
@@ -0,0 +1,105 @@
+from amarps.asset_cache import AssetCache, CACHE_HEADER, is_static_asset
+import pytest
+
+
+ASSET_URL = "https://m.media-amazon.com/images/I/21abc.js"
+
+
+class FakeRequest:
+    def __init__(self, url, method="GET"):
+        self.url = url
+        self.method = method
+        self.response = None
+
+    def create_response(self, status_code, headers, body):
+        self.response = FakeResponse(status_code, headers, body)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        (ASSET_URL, True),
+        ("https://images-na.ssl-images-amazon.com/images/G/01/x.CSS", True),
+        ("https://m.media-amazon.com/images/I/21abc.js?v=1", True),
+        ("https://www.amazon.com/product-reviews/B07ZPL752N/", False),
+        ("https://www.amazon.com/script.js", False),
+        ("https://m.media-amazon.com/api/data", False),
+    ],
+)
+def test_is_static_asset(url, expected):
+    assert is_static_asset(url) == expected
+
+
+def test_AssetCache_put_get(tmp_path):
+    cache = AssetCache(tmp_path)
+    assert cache.get(ASSET_URL) is None
+
+    cache.put(ASSET_URL, 200, {"Content-Encoding": "gzip"}, b"\x1f\x8b\nbody")
+    expected = (200, {"Content-Encoding": "gzip"}, b"\x1f\x8b\nbody")
+    assert cache.get(ASSET_URL) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert AssetCache(tmp_path).get(ASSET_URL) == cache.get(ASSET_URL)
+
+
+def test_AssetCache_evicts_least_recently_used(tmp_path):
+    cache = AssetCache(tmp_path)
+    cache.put(f"{ASSET_URL}?0", 200, {}, b"x" * 50)
+    cache.max_size = 3 * cache.size
+    for i in range(1, 3):
+        cache.put(f"{ASSET_URL}?{i}", 200, {}, b"x" * 50)
+    cache.get(f"{ASSET_URL}?0")
+    cache.put(f"{ASSET_URL}?3", 200, {}, b"x" * 50)
+
+    assert cache.size <= cache.max_size
+    assert cache.get(f"{ASSET_URL}?0") is not None
+    assert cache.get(f"{ASSET_URL}?1") is None
+    assert cache.get(f"{ASSET_URL}?3") is not None
+    assert len(list(tmp_path.glob("*.asset"))) == len(cache._sizes)
+
+
+def test_AssetCache_skips_too_large_assets(tmp_path):
+    cache = AssetCache(tmp_path, max_size=100)
+    cache.put(ASSET_URL, 200, {}, b"x" * 200)
+    assert cache.get(ASSET_URL) is None
+    assert cache.size == 0
+
+
+def test_AssetCache_interceptors(tmp_path):
+    cache = AssetCache(tmp_path)
+    request = FakeRequest(ASSET_URL)
+    cache.request_interceptor(request)
+    assert request.response is None
+
+    cache.response_interceptor(
+        request, FakeResponse(200, {"Content-Type": "text/javascript"}, b"body")
+    )
+    request = FakeRequest(ASSET_URL)
+    cache.request_interceptor(request)
+    assert request.response.body == b"body"
+    assert request.response.headers[CACHE_HEADER] == "hit"
+
+
+@pytest.mark.parametrize(
+    "request_,response",
+    [
+        (FakeRequest(ASSET_URL, "POST"), FakeResponse(200, {}, b"body")),
+        (FakeRequest(ASSET_URL), FakeResponse(404, {}, b"body")),
+        (FakeRequest(ASSET_URL), FakeResponse(200, {CACHE_HEADER: "hit"}, b"body")),
+        (
+            FakeRequest(ASSET_URL),
+            FakeResponse(200, {"Cache-Control": "no-store"}, b"body"),
+        ),
+        (FakeRequest("https://www.amazon.com/"), FakeResponse(200, {}, b"body")),
+    ],
+)
+def test_AssetCache_does_not_store(tmp_path, request_, response):
+    cache = AssetCache(tmp_path)
+    cache.response_interceptor(request_, response)
+    assert cache.size == 0
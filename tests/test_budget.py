@@ -0,0 +1,61 @@
+from amarps.budget import Budget, sort_by_priority
+from amarps.records import Review
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_Budget_unlimited():
+    budget = Budget()
+    for _ in range(1000):
+        budget.spend()
+    assert not budget.exhausted
+
+
+def test_Budget_max_requests():
+    budget = Budget(max_requests=2)
+    budget.spend()
+    assert not budget.exhausted
+    budget.spend()
+    assert budget.exhausted
+    assert budget.requests == 2
+
+
+def test_Budget_max_runtime():
+    clock = FakeClock()
+    budget = Budget(max_runtime=60, clock=clock)
+    clock.now = 59.0
+    assert not budget.exhausted
+    clock.now = 60.0
+    assert budget.exhausted
+    assert budget.runtime == 60.0
+
+
+def test_sort_by_priority():
+    reviews = [
+        Review({"title": "a", "found_helpful": 0, "rating": 3, "profile_link": "1"}),
+        Review({"title": "b", "found_helpful": 7, "rating": 4}),
+        Review({"title": "c", "found_helpful": 0, "rating": 1, "profile_link": "2"}),
+        Review({"title": "d", "found_helpful": 7, "rating": 5}),
+    ]
+
+    def titles(criteria):
+        return [
+            r.title for r in sort_by_priority(reviews, criteria, lambda p: p == "2")
+        ]
+
+    assert titles([]) == ["a", "b", "c", "d"]
+    assert titles(["found_helpful"]) == ["b", "d", "a", "c"]
+    assert titles(["found_helpful", "rating_extremes"]) == ["d", "b", "c", "a"]
+    assert titles(["uncached"]) == ["a", "b", "d", "c"]
+
+
+def test_sort_by_priority_invalid_criterion():
+    with pytest.raises(ValueError):
+        sort_by_priority([], ["unknown"], lambda _: False)
@@ -0,0 +1,152 @@
+import sqlite3
+
+from amarps.database import Database
+from amarps.records import Profile, Review
+import pytest
+
+
+PRODUCT_URL = "https://www.amazon.com/product-reviews/ID123ABC/"
+
+
+@pytest.fixture()
+def database_path(tmp_path):
+    return tmp_path / "output.db"
+
+
+@pytest.fixture()
+def database(database_path):
+    database = Database(database_path)
+    yield database
+    database.close()
+
+
+@pytest.fixture()
+def profile():
+    return {
+        "profile_name": "NAME1",
+        "profile_influence": 14,
+        "profile_num_reviews": 53,
+        "profile_image": True,
+        "profile_reviews": [
+            {"title": "Title 1", "rating": 5, "review_link": "https://link/1"},
+            {"title": "Title 2", "rating": 1, "review_link": "https://link/2"},
+        ],
+    }
+
+
+@pytest.fixture()
+def reviews(profile):
+    reviews = [
+        {
+            "title": "Review 1",
+            "body": "Content 1",
+            "date": "2023/01/03",
+            "rating": 4,
+            "found_helpful": 2,
+            "verified_purchase": True,
+            "profile_link": "https://profile/1",
+            "url": PRODUCT_URL + "page1",
+        },
+        {
+            "title": "Review 2",
+            "body": "Content 2",
+            "date": "2023/01/04",
+            "rating": 3,
+            "found_helpful": 0,
+            "verified_purchase": False,
+            "profile_link": None,
+            "url": PRODUCT_URL + "page1",
+        },
+    ]
+    reviews = [Review(r) for r in reviews]
+    reviews[0].profile = Profile(profile)
+    return reviews
+
+
+def _query(path, sql):
+    with sqlite3.connect(path) as connection:
+        return connection.execute(sql).fetchall()
+
+
+def test_Database_add_reviews(database, database_path, reviews):
+    database.add_product(PRODUCT_URL, {"product_title": "Title", "num_ratings": 2})
+    database.add_reviews(PRODUCT_URL, reviews)
+
+    assert _query(database_path, "SELECT url, product_title FROM products") == [
+        (PRODUCT_URL, "Title")
+    ]
+    assert _query(database_path, "SELECT title, profile_id FROM reviews") == [
+        ("Review 1", 1),
+        ("Review 2", None),
+    ]
+    assert _query(database_path, "SELECT url, profile_name FROM profiles") == [
+        ("https://profile/1", "NAME1")
+    ]
+    assert len(_query(database_path, "SELECT * FROM profile_reviews")) == 2
+
+
+def test_Database_upserts_profiles(database, database_path, profile):
+    database.add_profile("https://profile/1", profile)
+    profile["profile_influence"] = 15
+    profile["profile_reviews"] = profile["profile_reviews"][:1]
+    database.add_profile("https://profile/1", profile)
+    database.add_product(PRODUCT_URL, {})
+    database.add_reviews(
+        PRODUCT_URL,
+        [Review({"title": "T", "profile_link": "https://profile/1", "url": "u"})],
+    )
+
+    assert _query(database_path, "SELECT profile_influence FROM profiles") == [(15,)]
+    assert len(_query(database_path, "SELECT * FROM profile_reviews")) == 1
+
+
+def test_Database_failed_profile_keeps_data(database, database_path, profile):
+    database.add_profile("https://profile/1", profile)
+    database.add_profile("https://profile/1", {"profile_error": "HTTP error: 503"})
+    database.add_profile("https://profile/2", {"profile_error": "HTTP error: 503"})
+
+    assert _query(
+        database_path, "SELECT url, profile_name, profile_error FROM profiles"
+    ) == [
+        ("https://profile/1", "NAME1", None),
+        ("https://profile/2", None, "HTTP error: 503"),
+    ]
+    assert len(_query(database_path, "SELECT * FROM profile_reviews")) == 2
+
+
+def test_Database_reviews_without_title_and_date(database, database_path):
+    database.add_product(PRODUCT_URL, {})
+    reviews = [Review({"rating": 5, "profile_link": "https://profile/1", "url": "u"})]
+    database.add_reviews(PRODUCT_URL, reviews)
+    database.add_reviews(PRODUCT_URL, reviews)
+
+    assert len(_query(database_path, "SELECT * FROM reviews")) == 1
+
+
+def test_Database_migrates_reviews_unique(database_path):
+    with sqlite3.connect(database_path) as connection:
+        connection.executescript(
+            "CREATE TABLE reviews (id INTEGER PRIMARY KEY, product_id INTEGER, "
+            "profile_id INTEGER, url TEXT, title TEXT, date TEXT);"
+            "CREATE UNIQUE INDEX reviews_unique "
+            "ON reviews(product_id, IFNULL(profile_id, 0), title, date);"
+            "INSERT INTO reviews (product_id, url) VALUES (1, 'u'), (1, 'u');"
+        )
+    Database(database_path).close()
+
+    assert len(_query(database_path, "SELECT * FROM reviews")) == 1
+
+
+def test_Database_reopen_keeps_data(database_path, reviews):
+    database = Database(database_path)
+    database.add_product(PRODUCT_URL, {})
+    database.add_reviews(PRODUCT_URL, reviews)
+    database.close()
+
+    database = Database(database_path)
+    database.add_product(PRODUCT_URL, {"product_title": "New"})
+    database.add_reviews(PRODUCT_URL, reviews)
+    database.close()
+
+    assert _query(database_path, "SELECT product_title FROM products") == [("New",)]
+    assert len(_query(database_path, "SELECT * FROM reviews")) == 2
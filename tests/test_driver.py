@@ -0,0 +1,124 @@
+import os
+import threading
+
+from amarps.driver import _get_process_tree, _get_rss, DriverManager
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+
+class FakeDriver:
+    instances = 0
+
+    def __init__(self):
+        FakeDriver.instances += 1
+        self.number = FakeDriver.instances
+        self.quitted = False
+        self.timeouts = {}
+
+    def set_page_load_timeout(self, seconds):
+        self.timeouts["page_load"] = seconds
+
+    def set_script_timeout(self, seconds):
+        self.timeouts["script"] = seconds
+
+    def quit(self):
+        self.quitted = True
+
+
+@pytest.fixture()
+def drivers():
+    return DriverManager(FakeDriver, page_load_timeout=0.5, script_timeout=0.1)
+
+
+def test_DriverManager_sets_timeouts(drivers):
+    assert drivers.driver.timeouts == {"page_load": 0.5, "script": 0.1}
+
+
+def test_DriverManager_start(drivers):
+    assert not drivers.is_started
+    drivers.start()
+    assert drivers.is_started
+    first = drivers.driver
+    drivers.start()
+    assert drivers.driver is first
+
+
+def test_DriverManager_keeps_proxy_after_restart(drivers):
+    drivers.proxy = {"http": "http://proxy"}
+    drivers.restart()
+    assert drivers.driver.proxy == {"http": "http://proxy"}
+
+
+def test_DriverManager_recycles_after_max_pages():
+    drivers = DriverManager(FakeDriver, max_pages=2)
+    numbers = [drivers.run(lambda driver: driver.number) for _ in range(5)]
+    assert numbers[0] == numbers[1] != numbers[2] == numbers[3] != numbers[4]
+
+
+def test_DriverManager_counts_pages_of_action():
+    drivers = DriverManager(FakeDriver, max_pages=3)
+    numbers = [drivers.run(lambda driver: driver.number, 2) for _ in range(3)]
+    assert numbers[0] == numbers[1] != numbers[2]
+
+
+def test_DriverManager_recycles_when_rss_too_high():
+    drivers = DriverManager(FakeDriver, max_rss=1)
+    drivers.get_rss = lambda: 2
+    first = drivers.driver
+    drivers.run(lambda driver: None)
+    assert first.quitted
+    assert drivers.driver is not first
+
+
+def test_DriverManager_retries_on_timeout(drivers):
+    drivers_used = []
+
+    def action(driver):
+        drivers_used.append(driver)
+        if len(drivers_used) == 1:
+            raise TimeoutException("timeout")
+        return "html"
+
+    assert drivers.run(action) == "html"
+    assert drivers_used[0].quitted
+    assert drivers_used[0] is not drivers_used[1]
+
+
+def test_DriverManager_gives_up_after_max_retries(drivers):
+    def action(driver):
+        raise TimeoutException("timeout")
+
+    with pytest.raises(TimeoutException):
+        drivers.run(action)
+
+
+def test_DriverManager_does_not_retry_other_errors(drivers):
+    def action(driver):
+        raise KeyError("error")
+
+    first = drivers.driver
+    with pytest.raises(KeyError):
+        drivers.run(action)
+    assert drivers.driver is first
+
+
+def test_DriverManager_watchdog_aborts_hung_action(drivers):
+    released = []
+
+    def action(driver):
+        if not released:
+            released.append(True)
+            event = threading.Event()
+            # stands in for a driver command which fails after the process is killed
+            event.wait(2)
+            raise ConnectionError("browser killed")
+        return "html"
+
+    assert drivers.run(action) == "html"
+
+
+def test_get_process_tree_and_rss():
+    pid = os.getpid()
+    assert _get_process_tree(pid)[0] == pid
+    assert _get_rss(pid) > 0
+    assert _get_rss(-1) == 0
@@ -45,3 +45,45 @@ def test_WaitHandler_interrupt_succeeds(call_sigint):
     start = time.time()
     handler.wait(33)
     assert time.time() - start < 7
+
+
+def test_WaitHandler_resume_file(tmp_path):
+    resume_file = tmp_path / "resume"
+    handler = WaitHandler(resume_file, poll_interval=0.1)
+    threading.Timer(0.5, resume_file.touch).start()
+    start = time.time()
+    assert handler.wait(10)
+    assert time.time() - start < 5
+    assert not resume_file.exists()
+
+
+def test_WaitHandler_timeout():
+    assert not WaitHandler().wait(0.1)
+
+
+def test_WaitHandler_resume_on_other_thread():
+    result = []
+
+    def wait():
+        handler = WaitHandler()
+        handlers.append(handler)
+        result.append(handler.wait(10))
+
+    handlers = []
+    thread = threading.Thread(target=wait)
+    thread.start()
+    while not handlers:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    handlers[0].resume()
+    thread.join(5)
+    assert result == [True]
+
+
+def test_WaitHandler_resume_before_wait():
+    handler = WaitHandler()
+    handler.resume()
+    start = time.time()
+    assert handler.wait(1.0)
+    assert time.time() - start < 0.5
+    assert not handler.wait(0.1)
@@ -0,0 +1,45 @@
+import gzip
+import json
+
+from amarps.html_dump import HtmlPageBuffer
+
+
+def _read_dumps(directory):
+    return [
+        json.loads(gzip.decompress(path.read_bytes()))
+        for path in sorted(directory.glob("*.json.gz"))
+    ]
+
+
+def test_HtmlPageBuffer_keeps_last_pages(tmp_path):
+    buffer = HtmlPageBuffer(tmp_path / "dump", size=2)
+    for i in range(3):
+        buffer.add(f"https://amazon.com/page/{i}", 200, f"<html>{i}</html>")
+    assert len(buffer) == 2
+    assert list((tmp_path / "dump").iterdir()) == []
+
+    buffer.dump("HTTP error: 503")
+
+    dumps = _read_dumps(tmp_path / "dump")
+    assert [d["url"] for d in dumps] == [
+        "https://amazon.com/page/1",
+        "https://amazon.com/page/2",
+    ]
+    assert dumps[1]["html"] == "<html>2</html>"
+    assert dumps[1]["status"] == 200
+    assert dumps[1]["reason"] == "HTTP error: 503"
+    assert len(buffer) == 0
+
+
+def test_HtmlPageBuffer_dump_empty(tmp_path):
+    buffer = HtmlPageBuffer(tmp_path)
+    buffer.dump("No data could be extracted")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_HtmlPageBuffer_unique_file_names(tmp_path):
+    buffer = HtmlPageBuffer(tmp_path)
+    for _ in range(2):
+        buffer.add("https://amazon.com/profile", None, "<html></html>")
+        buffer.dump("profile error")
+    assert len(_read_dumps(tmp_path)) == 2
@@ -0,0 +1,123 @@
+import threading
+
+from amarps.locales import (
+    current_locale,
+    DE,
+    DEFAULT,
+    EN,
+    ES,
+    FR,
+    get_locale,
+    IT,
+    use_locale,
+)
+from amarps.scraper import FoundHelpful, NumRatings, ReviewDate, VerifiedPurchase
+import pytest
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://www.amazon.com/product-reviews/B07ZPL752N/", EN),
+        ("https://www.amazon.co.uk/product-reviews/B07ZPL752N/", EN),
+        ("https://www.amazon.de/gp/profile/amzn1.account.A/", DE),
+        ("https://amazon.fr/product-reviews/B07ZPL752N/", FR),
+        ("http://127.0.0.1:8080/product-reviews/B07ZPL752N/", DEFAULT),
+        ("https://www.notamazon.com/", DEFAULT),
+    ],
+)
+def test_get_locale(url, expected):
+    assert get_locale(url) is expected
+
+
+@pytest.mark.parametrize(
+    "locale,number,expected",
+    [
+        (EN, "1,384", 1384),
+        (EN, "1,384,000", 1384000),
+        (EN, "1.384", None),
+        (EN, "13,84", None),
+        (DE, "1.384", 1384),
+        (DE, "1,384", None),
+        (FR, "1 384", 1384),
+        (DEFAULT, "1.384", 1384),
+        (DEFAULT, "1,384", 1384),
+        (DEFAULT, "2.3", None),
+    ],
+)
+def test_Locale_parse_integer(locale, number, expected):
+    assert locale.parse_integer(number) == expected
+
+
+@pytest.mark.parametrize(
+    "locale,rating,expected",
+    [
+        (EN, "4.2 out of 5 stars", 4.2),
+        (EN, "4,2 von 5 Sternen", None),
+        (DE, "4,2 von 5 Sternen", 4.2),
+        (DEFAULT, "4,2 von 5 Sternen", 4.2),
+        (DEFAULT, "4.2 out of 5 stars", 4.2),
+    ],
+)
+def test_Locale_parse_rating(locale, rating, expected):
+    assert locale.parse_rating(rating) == expected
+
+
+@pytest.mark.parametrize(
+    "locale,found_helpful,expected",
+    [
+        (EN, "One person found this helpful", 1),
+        (EN, "1,384 people found this helpful", 1384),
+        (DE, "Eine Person fand das hilfreich", 1),
+        (FR, "Une personne a trouvé cela utile", 1),
+        (FR, "1\u202f234 personnes ont trouvé cela utile", 1234),
+        (IT, "Una persona l'ha trovato utile", 1),
+        (IT, "1.234 persone l'hanno trovato utile", 1234),
+        (ES, "A una persona le ha parecido esto útil", 1),
+        (ES, "A 12 personas les ha parecido esto útil", 12),
+        (DEFAULT, "A 12 personas les ha parecido esto útil", 12),
+        (DEFAULT, "12 people found this helpful", 12),
+        (ES, "12 people found this helpful", None),
+    ],
+)
+def test_Locale_parse_found_helpful(locale, found_helpful, expected):
+    assert locale.parse_found_helpful(found_helpful) == expected
+
+
+@pytest.mark.parametrize(
+    "locale,filter_info,expected",
+    [
+        (EN, "1,234 total ratings, 567 with reviews", 567),
+        (DE, "1.234 Sternebewertungen insgesamt, 1.067 mit Rezensionen", 1067),
+        (FR, "1\u202f234 évaluations au total, 567 avec avis", 567),
+        (DEFAULT, "no numbers", None),
+    ],
+)
+def test_Locale_parse_num_filtered_reviews(locale, filter_info, expected):
+    assert locale.parse_num_filtered_reviews(filter_info) == expected
+
+
+def test_formatters_use_locale():
+    with use_locale(DE):
+        assert FoundHelpful().format("Eine Person fand das hilfreich") == 1
+        assert FoundHelpful().format("1.234 Personen fanden das hilfreich") == 1234
+        assert NumRatings().format("1.234 globale Sternebewertungen") == 1234
+        assert VerifiedPurchase().format("Verifizierter Kauf")
+        assert not VerifiedPurchase().format("Verified Purchase")
+        assert ReviewDate().format("Rezension aus Deutschland vom 3. Mai 2023") == (
+            "2023/05/03"
+        )
+    with use_locale(FR):
+        assert NumRatings().format("1 234 évaluations globales") == 1234
+        assert VerifiedPurchase().format("Achat vérifié")
+    assert current_locale() is DEFAULT
+
+
+def test_use_locale_is_local_to_thread():
+    seen = []
+    with use_locale(DE):
+        thread = threading.Thread(target=lambda: seen.append(current_locale()))
+        thread.start()
+        thread.join()
+        assert current_locale() is DE
+    assert seen == [DEFAULT]
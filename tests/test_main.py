@@ -1,5 +1,7 @@
 import json
 import re
+import subprocess
+import sys
 
 from amarps import __version__, main
 import click.testing
@@ -177,3 +179,45 @@ def test_main_download_profile_e2e_succeeds(output_json_file):
     assert not profile_data["profile_image"]
 
     assert len(profile_data["profile_reviews"]) >= 1
+
+
+def test_main_import_defers_heavy_modules():
+    heavy_modules = [
+        "dateparser",
+        "requests",
+        "selectorlib",
+        "selenium",
+        "seleniumwire",
+    ]
+    code = (
+        "import sys, amarps.main, amarps.server; "
+        f"print([m for m in {heavy_modules!r} if m in sys.modules])"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.strip() == "[]"
+
+
+def test_main_layout_profiles(httpserver_product_url, output_json_file):
+    runner = click.testing.CliRunner()
+    result = runner.invoke(
+        main.main,
+        [
+            "--output",
+            output_json_file,
+            "--layout",
+            "profiles",
+            "--no-profiles",
+            "--preflight",
+            "--start-page",
+            "1",
+            "--stop-page",
+            "1",
+            httpserver_product_url,
+        ],
+    )
+    assert result.exit_code == 0
+
+    data = json.loads(output_json_file.read_text())
+    assert data["profiles"] == {}
+    assert [r["title"] for r in data["reviews"]] == ["Title 2", "Title 3", "Title 4"]
+    assert all("profile_name" not in r for r in data["reviews"])
@@ -0,0 +1,121 @@
+import io
+import logging
+
+from amarps.progress import estimate_pages, Progress
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+@pytest.fixture()
+def clock():
+    return Clock()
+
+
+@pytest.mark.parametrize(
+    "num_ratings,start_page,stop_page,expected",
+    [
+        (95, 0, None, 10),
+        (95, 1, None, 9),
+        (95, 1, 3, 3),
+        (0, 0, None, 1),
+        ("95", 0, None, None),
+        (None, 0, None, None),
+    ],
+)
+def test_estimate_pages(num_ratings, start_page, stop_page, expected):
+    assert estimate_pages(num_ratings, start_page, stop_page) == expected
+
+
+def test_Progress_rates_and_eta(clock):
+    progress = Progress(io.StringIO(), clock=clock)
+    progress.start(total_pages=10)
+    for _ in range(4):
+        clock.now += 30
+        progress.page_done(10)
+    progress.profile_fetched()
+    progress.cache_hit()
+
+    snapshot = progress.snapshot()
+    assert snapshot["pages"] == 4
+    assert snapshot["profiles"] == 1
+    assert snapshot["cache_hits"] == 1
+    assert snapshot["pages_per_min"] == 2.0
+    assert snapshot["reviews_per_min"] == 20.0
+    assert snapshot["eta"] == pytest.approx(180)
+    assert snapshot["trend"] == "steady"
+
+
+def test_Progress_detects_slow_down(clock):
+    progress = Progress(io.StringIO(), window=60, clock=clock)
+    for _ in range(20):
+        clock.now += 6
+        progress.page_done(10)
+    for _ in range(3):
+        clock.now += 30
+        progress.page_done(10)
+
+    assert progress.snapshot()["trend"] == "slowing down"
+
+
+def test_Progress_without_total(clock):
+    progress = Progress(Terminal(), clock=clock)
+    clock.now += 1
+    progress.page_done(10)
+    assert progress.snapshot()["eta"] is None
+
+
+def test_Progress_bar_on_terminal(clock):
+    terminal = Terminal()
+    progress = Progress(terminal, clock=clock)
+    progress.start(total_pages=2)
+    clock.now += 60
+    progress.page_done(10)
+    progress.finish()
+
+    lines = terminal.getvalue()
+    assert "[###############---------------] 1/2 pages" in lines
+    assert "ETA 0:01:00" in lines
+    assert lines.endswith("\n")
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture()
+def progress_log_messages():
+    handler = ListHandler()
+    logger = logging.getLogger("amarps.progress")
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler.messages
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+
+
+def test_Progress_logs_periodically(clock, progress_log_messages):
+    progress = Progress(io.StringIO(), interval=10, clock=clock)
+    progress.page_done(10)
+    clock.now += 11
+    progress.page_done(10)
+    progress.page_done(10)
+    assert len(progress_log_messages) == 1
+    assert '"pages": 2' in progress_log_messages[0]
@@ -0,0 +1,95 @@
+from amarps.proxies import is_proxy_failure, ProxyPool
+from amarps.scraper import ImageSrcToBool
+import pytest
+import requests
+
+
+UNREACHABLE_PROXY = "http://127.0.0.1:9"
+
+
+@pytest.fixture()
+def proxy_url(httpserver):
+    """Local stand-in proxy, it receives the requests for any host"""
+    httpserver.expect_request("/image.jpg").respond_with_data(
+        b"0" * 100, content_type="image/jpeg"
+    )
+    httpserver.expect_request("/blocked").respond_with_data("blocked", 503)
+    return httpserver.url_for("/").rstrip("/")
+
+
+def test_ProxyPool_from_file(tmp_path):
+    proxies_file = tmp_path / "proxies.txt"
+    proxies_file.write_text("# comment\nhttp://proxy1:8080\n\n http://proxy2:8080 \n")
+    pool = ProxyPool.from_file(proxies_file, quarantine_time=1)
+    assert [p.url for p in pool.proxies] == ["http://proxy1:8080", "http://proxy2:8080"]
+    assert pool.quarantine_time == 1
+
+
+def test_ProxyPool_empty():
+    with pytest.raises(ValueError):
+        ProxyPool([])
+
+
+def test_ProxyPool_prefers_healthy_proxy():
+    pool = ProxyPool(["http://slow", "http://fast", "http://blocked"])
+    slow, fast, blocked = pool.proxies
+    pool.report(slow, 2.0, False)
+    pool.report(fast, 0.5, False)
+    pool.report(blocked, 0.1, True)
+    assert pool.get() is fast
+
+
+def test_ProxyPool_tries_unused_proxy_first():
+    pool = ProxyPool(["http://used", "http://unused"])
+    pool.report(pool.proxies[0], 0.1, False)
+    assert pool.get() is pool.proxies[1]
+
+
+def test_ProxyPool_quarantine():
+    pool = ProxyPool(["http://a", "http://b"], min_requests=2, quarantine_time=60)
+    bad = pool.proxies[0]
+    for _ in range(4):
+        pool.report(bad, 0.01, True)
+    pool.report(pool.proxies[1], 10.0, False)
+
+    assert pool.get() is pool.proxies[1]
+
+    pool.proxies[1].quarantined_until = bad.quarantined_until + 1
+    assert pool.get() is bad
+
+
+def test_ProxyPool_request_local_proxy(proxy_url):
+    pool = ProxyPool([proxy_url])
+    response = pool.request("http://amazon.invalid/image.jpg")
+    assert response.ok
+    assert pool.proxies[0].requests == 1
+    assert pool.proxies[0].block_rate == 0.0
+
+
+def test_ProxyPool_request_blocked(proxy_url):
+    pool = ProxyPool([proxy_url])
+    assert pool.request("http://amazon.invalid/blocked").status_code == 503
+    assert pool.proxies[0].block_rate > 0.0
+
+
+@pytest.mark.parametrize(
+    "status, failure",
+    [(200, False), (404, False), (403, True), (502, True), (504, True), (None, True)],
+)
+def test_is_proxy_failure(status, failure):
+    assert is_proxy_failure(status) is failure
+
+
+def test_ProxyPool_request_unreachable_proxy(proxy_url):
+    pool = ProxyPool(
+        [UNREACHABLE_PROXY, proxy_url], max_block_rate=0.1, min_requests=1
+    )
+    with pytest.raises(requests.RequestException):
+        pool.request("http://amazon.invalid/image.jpg")
+    assert pool.proxies[0].quarantined_until > 0
+    assert pool.request("http://amazon.invalid/image.jpg").ok
+
+
+def test_format_ImageSrcToBool_with_proxy(proxy_url):
+    formatter = ImageSrcToBool(ProxyPool([proxy_url]))
+    assert formatter.format("http://amazon.invalid/image.jpg") is True
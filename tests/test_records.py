@@ -0,0 +1,121 @@
+from functools import partial
+import json
+import sys
+
+from amarps.records import (
+    collect_profiles,
+    Profile,
+    ProfileReview,
+    Review,
+    to_json,
+)
+import pytest
+
+
+PROFILE: dict = {
+    "profile_name": "NAME1",
+    "profile_influence": 14,
+    "profile_num_reviews": 53,
+    "profile_image": True,
+    "profile_reviews": [
+        {
+            "body": "Body",
+            "date": "2023/01/03",
+            "found_helpful": 0,
+            "rating": 5,
+            "review_link": None,
+            "title": "Title",
+            "verified_purchase": True,
+        }
+    ],
+}
+
+REVIEW: dict = {
+    "body": "Content 1",
+    "date": "2023/01/03",
+    "found_helpful": 2,
+    "profile_link": "https://profile/1",
+    "rating": 4,
+    "title": "Review 1",
+    "verified_purchase": False,
+    "url": "https://page/1",
+}
+
+
+def test_Profile_to_dict_keeps_shape():
+    profile = Profile(PROFILE)
+    assert type(profile.profile_reviews[0]) is ProfileReview
+    assert profile.to_dict() == PROFILE
+
+
+def test_Profile_to_dict_error_only():
+    assert Profile({"profile_error": "HTTP error: 403"}).to_dict() == {
+        "profile_error": "HTTP error: 403"
+    }
+
+
+def test_Review_to_dict_merges_profile():
+    review = Review(REVIEW)
+    assert review.to_dict() == REVIEW
+    review.profile = Profile(PROFILE)
+    assert review.to_dict() == {**REVIEW, **PROFILE}
+    assert list(review.to_dict().keys()) == [*REVIEW.keys(), *PROFILE.keys()]
+
+
+def test_Review_shares_profile():
+    profile = Profile(PROFILE)
+    reviews = [Review(REVIEW), Review(REVIEW)]
+    for r in reviews:
+        r.profile = profile
+    assert reviews[0].profile is reviews[1].profile
+
+
+def test_Review_ignores_unknown_keys():
+    review = Review({**REVIEW, "unknown": 1})
+    assert "unknown" not in review
+    assert review.get("unknown") is None
+
+
+def test_Review_is_compact():
+    assert not hasattr(Review(REVIEW), "__dict__")
+    assert sys.getsizeof(Review(REVIEW)) < sys.getsizeof(dict(REVIEW))
+
+
+def test_to_json():
+    review = Review(REVIEW)
+    review.profile = Profile(PROFILE)
+    data = {"reviews": [review]}
+    assert json.loads(json.dumps(data, default=to_json)) == {
+        "reviews": [{**REVIEW, **PROFILE}]
+    }
+
+
+def test_to_json_without_inline_profiles():
+    review = Review(REVIEW)
+    review.profile = Profile(PROFILE)
+    data = {"reviews": [review], "profiles": collect_profiles([review])}
+    assert json.loads(
+        json.dumps(data, default=partial(to_json, inline_profiles=False))
+    ) == {"reviews": [REVIEW], "profiles": {REVIEW["profile_link"]: PROFILE}}
+
+
+def test_collect_profiles():
+    profile = Profile(PROFILE)
+    reviews = [Review(REVIEW), Review(REVIEW), Review({**REVIEW, "profile_link": None})]
+    for r in reviews[1:]:
+        r.profile = profile
+    assert collect_profiles(reviews) == {REVIEW["profile_link"]: profile}
+
+
+def test_to_json_fails():
+    with pytest.raises(TypeError):
+        json.dumps({"a": object()}, default=to_json)
+
+
+def test_Profile_replace():
+    profile = Profile({"profile_error": "HTTP error: 500"})
+    review = Review(REVIEW)
+    review.profile = profile
+    profile.replace(PROFILE)
+    assert review.to_dict() == {**REVIEW, **PROFILE}
+    assert type(profile.profile_reviews[0]) is ProfileReview
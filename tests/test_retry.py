@@ -0,0 +1,92 @@
+from threading import Event, Timer
+import time
+
+from amarps.retry import RetryQueue
+import pytest
+
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ValueError(f"failure {self.calls}")
+
+
+def test_RetryQueue_empty():
+    assert RetryQueue(backoff=0).drain() == []
+
+
+def test_RetryQueue_retry_succeeds():
+    queue = RetryQueue(max_attempts=3, backoff=0)
+    flaky = Flaky(failures=2)
+    queue.add("profile", "url", ValueError("failure 0"), flaky)
+    assert len(queue) == 1
+
+    assert queue.drain() == []
+    assert flaky.calls == 3
+    assert len(queue) == 0
+
+
+def test_RetryQueue_reports_permanent_failures():
+    queue = RetryQueue(max_attempts=2, backoff=0)
+    queue.add("review_page", "url1", ValueError("failure 0"), Flaky(failures=5))
+    queue.add("profile", "url2", ValueError("failure 0"), Flaky(failures=0))
+
+    assert queue.drain() == [
+        {"kind": "review_page", "url": "url1", "error": "failure 2", "attempts": 2}
+    ]
+
+
+def test_RetryQueue_collects_failures_of_all_drains():
+    queue = RetryQueue(max_attempts=1, backoff=0)
+    queue.add("review_page", "url1", ValueError("failure 0"), Flaky(failures=5))
+    queue.drain()
+    queue.add_failure("review_page", "url2", "not requested")
+    queue.drain()
+
+    assert [f["url"] for f in queue.failures] == ["url1", "url2"]
+    assert queue.failures[1]["attempts"] == 0
+
+
+def test_RetryQueue_retries_items_added_while_draining():
+    queue = RetryQueue(max_attempts=2, backoff=0)
+    profile = Flaky(failures=0)
+
+    def review_page():
+        queue.add("profile", "url2", ValueError("failure 0"), profile)
+
+    queue.add("review_page", "url1", ValueError("failure 0"), review_page)
+    assert queue.drain() == []
+    assert profile.calls == 1
+
+
+def test_RetryQueue_raises_unexpected_errors():
+    queue = RetryQueue(backoff=0)
+    queue.add("profile", "url", ValueError("failure 0"), Flaky(failures=1))
+    with pytest.raises(ValueError):
+        queue.drain(errors=(KeyError,))
+
+
+def test_RetryQueue_stops_early():
+    queue = RetryQueue(max_attempts=3, backoff=0)
+    flaky = Flaky(failures=5)
+    queue.add("profile", "url", ValueError("failure 0"), flaky)
+
+    assert queue.drain(stop=lambda: flaky.calls >= 1) == [
+        {"kind": "profile", "url": "url", "error": "failure 1", "attempts": 1}
+    ]
+
+
+def test_RetryQueue_cancelled_ends_backoff():
+    cancelled = Event()
+    queue = RetryQueue(backoff=60, cancelled=cancelled)
+    queue.add("profile", "url", ValueError("failure 0"), Flaky(failures=0))
+    Timer(0.1, cancelled.set).start()
+
+    start = time.monotonic()
+    assert len(queue.drain(stop=cancelled.is_set)) == 1
+    assert time.monotonic() - start < 5
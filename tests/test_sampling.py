@@ -0,0 +1,50 @@
+from amarps.sampling import allocate, count_pages, Sample
+import pytest
+
+
+@pytest.mark.parametrize(
+    "num_ratings,expected", [(None, 0), ("42", 0), (0, 0), (1, 1), (10, 1), (42, 5)]
+)
+def test_count_pages(num_ratings, expected):
+    assert count_pages(num_ratings) == expected
+
+
+def test_allocate_proportionally():
+    assert allocate(10, {"a": 50, "b": 30, "c": 20}) == {"a": 5, "b": 3, "c": 2}
+    assert allocate(4, {"a": 5, "b": 3, "c": 2}) == {"a": 2, "b": 1, "c": 1}
+    assert allocate(3, {"a": 0, "b": 10}) == {"a": 0, "b": 3}
+
+
+def test_allocate_all_pages():
+    assert allocate(100, {"a": 5, "b": 3}) == {"a": 5, "b": 3}
+
+
+def test_Sample_draw_pages():
+    pages = Sample(6, seed=42).draw_pages({"one_star": 10, "five_star": 20})
+
+    assert len(pages["one_star"]) == 2
+    assert len(pages["five_star"]) == 4
+    assert pages["one_star"] == sorted(set(pages["one_star"]))
+    assert all(1 <= p <= 20 for p in pages["five_star"])
+    assert Sample(6, seed=42).draw_pages({"one_star": 10, "five_star": 20}) == pages
+
+
+def test_Sample_draw_pages_skips_empty_strata():
+    assert Sample(3, stratify=False).draw_pages({None: 0}) == {}
+
+
+def test_Sample_includes_profile():
+    sample = Sample(1, seed=0, profile_fraction=0.5)
+    included = [sample.includes_profile(f"https://profile/{i}") for i in range(100)]
+
+    assert 20 < sum(included) < 80
+    assert sample.includes_profile("https://profile/7") == included[7]
+    assert sample.profile_weight == 2.0
+
+
+@pytest.mark.parametrize(
+    "num_pages,profile_fraction", [(0, 1.0), (1, -0.1), (1, 1.5)]
+)
+def test_Sample_invalid(num_pages, profile_fraction):
+    with pytest.raises(ValueError):
+        Sample(num_pages, profile_fraction=profile_fraction)
@@ -1,17 +1,36 @@
+import asyncio
+from concurrent.futures import Future
 from copy import deepcopy
-
+import sqlite3
+import threading
+import time
+
+from amarps.database import Database
+from amarps.proxies import ProxyPool
+from amarps.records import Review
+from amarps.retry import RetryQueue
+from amarps.sampling import Sample
 from amarps.scraper import (
     _convert_date,
+    _get_page_url,
     AverageRating,
+    CaptchaError,
     FoundHelpful,
     HttpError,
+    is_captcha,
     MyInteger,
     NumRatings,
     ProfileReviewDate,
     ReviewDate,
     Scraper,
 )
+from amarps.sessions import SessionPool
+from amarps.tabs import TabPage
+from amarps.trace import start_tracing, stop_tracing
+from conftest import review_page_html
 import pytest
+import requests
+from selenium.common.exceptions import TimeoutException
 
 
 @pytest.fixture()
@@ -260,3 +279,640 @@ def test_format_NumRatings(value, expected):
 @pytest.mark.parametrize("value", ["", "1234", "123 ", "1 word", "1 globa"])
 def test_format_NumRatings_invalid(value):
     assert NumRatings().format(value) == value
+
+
+@pytest.fixture()
+def lazy_arr():
+    return Scraper(have_browser_headless=True)
+
+
+def test_extract_preflight_answers_without_browser(lazy_arr, httpserver_product_url):
+    data = lazy_arr.extract(httpserver_product_url, False, 1, 1, 0, preflight=True)
+
+    assert not lazy_arr._drivers.is_started
+    assert data["product_title"] == "Product Title"
+    assert data["num_ratings"] == 42
+    assert data["failures"] == []
+    assert [r.title for r in data["reviews"]] == ["Title 2", "Title 3", "Title 4"]
+    assert [r.rating for r in data["reviews"]] == [1, 2, 3]
+    assert data["reviews"][0].date == "2023/01/03"
+    assert data["reviews"][0].verified_purchase
+    assert data["reviews"][0].found_helpful == 2
+
+
+def test_extract_preflight_skips_product_without_reviews(
+    lazy_arr, httpserver_product_url
+):
+    data = lazy_arr.extract(httpserver_product_url, True, 2, None, 0, preflight=True)
+
+    assert not lazy_arr._drivers.is_started
+    assert data["product_title"] == "Product Title"
+    assert data["reviews"] == []
+
+
+def test_extract_preflight_skips_missing_product(lazy_arr, httpserver):
+    httpserver.expect_request(
+        "/product-reviews/MISSING/ref=cm_cr_arp_d_paging_btm_next_1"
+    ).respond_with_data("status code 404", 404)
+    url = httpserver.url_for("/product-reviews/MISSING/")
+
+    data = lazy_arr.extract(url, True, 1, None, 0, preflight=True)
+
+    assert not lazy_arr._drivers.is_started
+    assert data["reviews"] == []
+    assert data["failures"][0]["error"] == "HTTP error: 404"
+
+
+def test_extract_trace(httpserver_product_url):
+    tracer = start_tracing()
+    try:
+        arr = Scraper(have_browser_headless=True)
+        arr.extract(httpserver_product_url, False, 1, 1, 0, preflight=True)
+    finally:
+        stop_tracing()
+
+    names = {e["name"] for e in tracer.to_dict()["traceEvents"]}
+    assert {"probe", "ReviewDate", "FoundHelpful"} <= names
+
+
+def test_extract_review_fields(httpserver_product_url, monkeypatch):
+    arr = Scraper(have_browser_headless=True, review_fields=["title", "rating"])
+    monkeypatch.setattr(
+        arr, "_download_profile_data", lambda url, page: {"profile_name": url}
+    )
+    data = arr.extract(httpserver_product_url, True, 1, 1, 0, preflight=True)
+
+    host = httpserver_product_url.split("/product")[0]
+    assert data["product_title"] == "Product Title"
+    assert [r.to_dict() for r in data["reviews"]] == [
+        {
+            "title": f"Title {i}",
+            "rating": i - 1,
+            "profile_link": f"{host}/profile{i}",
+            "url": data["reviews"][0].url,
+            "profile_name": f"{host}/profile{i}",
+        }
+        for i in range(2, 5)
+    ]
+
+
+def test_Scraper_profile_fields():
+    arr = Scraper(profile_fields=["profile_influence", "profile_num_reviews"])
+    assert list(arr._profile_extractor.config) == [
+        "profile_influence",
+        "profile_num_reviews",
+    ]
+
+
+@pytest.mark.parametrize(
+    "fields", [{"review_fields": ["unknown"]}, {"profile_fields": ["body"]}]
+)
+def test_Scraper_invalid_fields(fields):
+    with pytest.raises(ValueError):
+        Scraper(**fields)
+
+
+def test_is_captcha():
+    assert is_captcha(
+        '<form method="get" action="/errors/validateCaptcha" name="">'
+    )
+    assert is_captcha('<input id="captchacharacters" name="field-keywords">')
+    assert not is_captcha("<html><body>Product Title</body></html>")
+
+
+def test_get_html_data_captcha_raises_without_display(lazy_arr, monkeypatch):
+    monkeypatch.setattr(
+        lazy_arr,
+        "_get_html_page",
+        lambda *args: '<form action="/errors/validateCaptcha"></form>',
+    )
+    with pytest.raises(CaptchaError):
+        lazy_arr._get_html_data("https://product/", 0)
+
+
+def test_get_html_data_captcha_waits_for_human(monkeypatch):
+    arr = Scraper(captcha_timeout=10)
+    pages = ['<form action="/errors/validateCaptcha"></form>', "<html></html>"]
+    monkeypatch.setattr(arr, "_get_html_page", lambda *args: pages.pop(0))
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(arr._get_html_data("https://product/", 0))
+    )
+    thread.start()
+    while not arr.needs_human:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    arr.resume()
+    thread.join(5)
+
+    assert result == ["<html></html>"]
+    assert not arr.needs_human
+
+
+class FakeDriverManager:
+    def __init__(self):
+        self.driver = self
+        self.restarts = 0
+        self.calls = []
+
+    def get_cookies(self):
+        return [{"name": "session-id", "value": str(self.restarts)}]
+
+    def restart(self):
+        self.restarts += 1
+        self.calls.append("restart")
+
+    def close(self):
+        self.calls.append("close")
+
+
+def test_get_html_data_sessions(tmp_path, monkeypatch):
+    pool = SessionPool(tmp_path, 2, max_pages=2)
+    arr = Scraper(have_browser_headless=True, session_pool=pool)
+    arr._drivers = FakeDriverManager()
+    monkeypatch.setattr(arr, "_get_html_page", lambda *args: "<html></html>")
+
+    arr._get_html_data("https://product/", 0)
+    assert pool.current.load_cookies() == [{"name": "session-id", "value": "0"}]
+    assert arr._get_session_cookies() == {"session-id": "0"}
+    arr._get_html_data("https://product/", 0)
+    assert arr._drivers.restarts == 1
+    assert pool.current is pool.sessions[1]
+
+
+def test_get_html_data_captcha_invalidates_session(tmp_path, monkeypatch):
+    pool = SessionPool(tmp_path, 2)
+    pool.current.save_cookies([{"name": "session-id", "value": "0"}])
+    arr = Scraper(have_browser_headless=True, session_pool=pool)
+    arr._drivers = FakeDriverManager()
+    monkeypatch.setattr(
+        arr, "_get_html_page", lambda *args: '<form action="/errors/validateCaptcha">'
+    )
+    invalidate = pool.invalidate
+    monkeypatch.setattr(
+        pool,
+        "invalidate",
+        lambda: arr._drivers.calls.append("invalidate") or invalidate(),
+    )
+
+    with pytest.raises(CaptchaError):
+        arr._get_html_data("https://product/", 0)
+    assert arr._drivers.calls == ["close", "invalidate", "restart"]
+    assert pool.sessions[0].load_cookies() == []
+    assert pool.current is pool.sessions[1]
+
+
+class FakeListing:
+    """Stand-in for _get_data serving review pages with the page in the title"""
+
+    def __init__(self, num_ratings):
+        self.num_ratings = num_ratings
+        self.urls = []
+
+    def __call__(self, url):
+        self.urls.append(url)
+        star = url.split("filterByStar=")[1] if "filterByStar=" in url else None
+        page = url.split("pageNumber=")[1].split("&")[0]
+        return {
+            "num_ratings": self.num_ratings.get(star, self.num_ratings[None]),
+            "reviews": [
+                {"title": f"{star} {page}", "profile_link": f"https://profile/{i}"}
+                for i in range(2)
+            ],
+        }
+
+
+def test_extract_sample(lazy_arr, monkeypatch):
+    listing = FakeListing({None: 1000})
+    monkeypatch.setattr(lazy_arr, "_get_data", listing)
+
+    data = lazy_arr.extract_sample(
+        "https://product/", Sample(5, seed=1, stratify=False, profile_fraction=0), 0
+    )
+
+    assert len(set(listing.urls)) == len(listing.urls) <= 6
+    assert len(data["reviews"]) == 10
+    assert {r.sampling_weight for r in data["reviews"]} == {20.0}
+    assert all("profile" not in r for r in data["reviews"])
+    assert data["sampling"]["seed"] == 1
+
+
+def test_extract_sample_stratified(lazy_arr, monkeypatch):
+    num_reviews = {
+        "one_star": 100,
+        "two_star": 0,
+        "three_star": 0,
+        "four_star": 0,
+        "five_star": 300,
+    }
+    monkeypatch.setattr(lazy_arr, "_get_data", FakeListing({None: 1000}))
+    # all strata show the total of the product, only the filter info differs
+    monkeypatch.setattr(
+        lazy_arr,
+        "_get_html_data",
+        lambda url, scroll_depth: review_page_html(
+            2, 1000, num_reviews[url.split("filterByStar=")[1]]
+        ).replace("Title ", url.split("filterByStar=")[1] + " "),
+    )
+    monkeypatch.setattr(
+        lazy_arr, "_get_profile", lambda url, retry_queue: {"profile_name": url}
+    )
+
+    data = lazy_arr.extract_sample("https://product/", Sample(8, seed=2), 0)
+
+    stars = [r.title.split()[0] for r in data["reviews"]]
+    assert stars.count("one_star") == 4
+    assert stars.count("five_star") == 12
+    weights = {s: r.sampling_weight for s, r in zip(stars, data["reviews"])}
+    assert weights == {"one_star": 5.0, "five_star": 5.0}
+    assert all(r.profile_sampling_weight == 1.0 for r in data["reviews"])
+    assert data["sampling"]["stratified"]
+
+
+def test_extract_sample_without_filter_info_is_not_stratified(lazy_arr, monkeypatch):
+    monkeypatch.setattr(lazy_arr, "_get_data", FakeListing({None: 1000}))
+    monkeypatch.setattr(
+        lazy_arr, "_get_html_data", lambda url, scroll_depth: review_page_html(2, 1000)
+    )
+
+    data = lazy_arr.extract_sample(
+        "https://product/", Sample(3, seed=2, profile_fraction=0), 0
+    )
+
+    assert not data["sampling"]["stratified"]
+    assert len(data["reviews"]) == 6
+    assert all(r.title.startswith("None") for r in data["reviews"])
+
+
+class FakePages:
+    """Stand-in for _get_data serving num_pages pages with 2 reviews each"""
+
+    def __init__(self, num_pages):
+        self.num_pages = num_pages
+        self.calls = 0
+
+    def __call__(self, url):
+        self.calls += 1
+        page = int(url.split("pageNumber=")[1])
+        if page >= self.num_pages:
+            return {"product_title": "Product", "reviews": None}
+        return {
+            "product_title": "Product",
+            "reviews": [{"title": f"{page} {i}"} for i in range(2)],
+        }
+
+
+class FlakyPages(FakePages):
+    """FakePages whose pages in failing fail the given number of times"""
+
+    def __init__(self, num_pages, failing, failures):
+        super().__init__(num_pages)
+        self.failures = {page: failures for page in failing}
+
+    def __call__(self, url):
+        page = int(url.split("pageNumber=")[1])
+        if self.failures.get(page, 0) > 0:
+            self.failures[page] -= 1
+            raise HttpError(500)
+        return super().__call__(url)
+
+
+def test_extract_resumes_after_failed_pages_are_retried(monkeypatch):
+    arr = Scraper(have_browser_headless=True, retry_backoff=0)
+    monkeypatch.setattr(arr, "_get_data", FlakyPages(9, range(2, 6), 1))
+
+    data = arr.extract("https://product/", False, 0, None, 0)
+    assert data["failures"] == []
+    assert [r.title for r in data["reviews"]] == [
+        f"{page} {i}" for page in range(9) for i in range(2)
+    ]
+
+
+def test_extract_reports_truncation(monkeypatch):
+    arr = Scraper(have_browser_headless=True, retry_attempts=1, retry_backoff=0)
+    monkeypatch.setattr(arr, "_get_data", FlakyPages(9, range(2, 6), 2))
+
+    data = arr.extract("https://product/", False, 0, None, 0)
+    assert [f["url"].split("pageNumber=")[1] for f in data["failures"]] == [
+        "2",
+        "3",
+        "4",
+        "5",
+        "6",
+    ]
+    assert data["failures"][-1]["attempts"] == 0
+    assert len(data["reviews"]) == 4
+
+
+def test_iter_reviews(lazy_arr, monkeypatch):
+    monkeypatch.setattr(lazy_arr, "_get_data", FakePages(5))
+
+    reviews = lazy_arr.iter_reviews("https://product/", False)
+    titles = []
+    while True:
+        try:
+            titles.append(next(reviews).title)
+        except StopIteration as e:
+            result = e.value
+            break
+
+    assert titles == [f"{page} {i}" for page in range(5) for i in range(2)]
+    assert result["product_title"] == "Product"
+    assert result["failures"] == []
+    assert "reviews" not in result
+
+
+def test_iter_reviews_database(tmp_path, monkeypatch):
+    arr = Scraper(have_browser_headless=True, database=Database(tmp_path / "out.db"))
+    monkeypatch.setattr(arr, "_get_data", FakePages(3))
+
+    assert len(list(arr.iter_reviews("https://product/", False))) == 6
+    connection = sqlite3.connect(str(tmp_path / "out.db"))
+    assert connection.execute("SELECT COUNT(*) FROM reviews").fetchone() == (6,)
+
+
+def test_iter_reviews_releases_profiles(lazy_arr, monkeypatch):
+    monkeypatch.setattr(lazy_arr, "_get_data", FakeListing({None: 1000}))
+    monkeypatch.setattr(
+        lazy_arr, "_download_profile_data", lambda url, page: {"profile_name": url}
+    )
+
+    reviews = lazy_arr.iter_reviews("https://product/", True, 0, 2)
+    assert next(reviews).profile.to_dict() == {"profile_name": "https://profile/0"}
+    assert len(list(reviews)) == 5
+    assert lazy_arr._profiles == {}
+
+
+def test_cancel_ends_wait_for_human(lazy_arr):
+    thread = threading.Thread(target=lazy_arr._wait_for_human, args=("Wait", 60))
+    thread.start()
+    while not lazy_arr.needs_human:
+        time.sleep(0.01)
+    lazy_arr.cancel()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_iter_reviews_passes_on_retried_profiles(monkeypatch):
+    arr = Scraper(have_browser_headless=True, retry_backoff=0)
+    monkeypatch.setattr(arr, "_get_data", FakeListing({None: 1000}))
+    attempts = []
+
+    def download_profile(url, html_page=None):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise HttpError(500)
+        return {"profile_name": url}
+
+    monkeypatch.setattr(arr, "_download_profile_data", download_profile)
+    retried = []
+    reviews = list(
+        arr.iter_reviews(
+            "https://product/", True, 0, 0, on_profile=lambda *p: retried.append(p)
+        )
+    )
+
+    assert reviews[0].profile.to_dict() == {"profile_error": "HTTP error: 500"}
+    assert [(url, p.to_dict()) for url, p in retried] == [
+        ("https://profile/0", {"profile_name": "https://profile/0"})
+    ]
+
+
+def test_iter_reviews_backpressure_and_cancel(lazy_arr, monkeypatch):
+    pages = FakePages(100)
+    monkeypatch.setattr(lazy_arr, "_get_data", pages)
+
+    reviews = lazy_arr.iter_reviews("https://product/", False, buffer_pages=1)
+    assert next(reviews).title == "0 0"
+    time.sleep(0.2)
+    assert pages.calls <= 4
+
+    reviews.close()
+    assert pages.calls <= 4
+
+
+def test_iter_reviews_error(lazy_arr, monkeypatch):
+    def fail(url):
+        raise RuntimeError("Failed")
+
+    monkeypatch.setattr(lazy_arr, "_get_data", fail)
+    with pytest.raises(RuntimeError):
+        list(lazy_arr.iter_reviews("https://product/", False))
+
+
+def test_aiter_reviews(lazy_arr, monkeypatch):
+    pages = FakePages(100)
+    monkeypatch.setattr(lazy_arr, "_get_data", pages)
+
+    async def take(n):
+        titles = []
+        reviews = lazy_arr.aiter_reviews("https://product/", False, buffer_pages=1)
+        async for review in reviews:
+            titles.append(review.title)
+            if len(titles) == n:
+                break
+        await reviews.aclose()
+        return titles
+
+    assert asyncio.run(take(3)) == ["0 0", "0 1", "1 0"]
+    assert pages.calls <= 5
+
+
+def test_extract_tabs(httpserver_product_url, monkeypatch):
+    arr = Scraper(have_browser_headless=True, tabs=3, retry_backoff=0)
+    full_page = requests.get(_get_page_url(httpserver_product_url, 1)).text
+    empty_page = requests.get(_get_page_url(httpserver_product_url, 2)).text
+    batches = []
+
+    def download(urls, scroll_depth, check_status=True):
+        batches.append(urls)
+        pages = [int(url.split("pageNumber=")[1]) for url in urls]
+        if len(batches) == 2:
+            return [HttpError(503)] + [full_page] * 2
+        return [full_page if page < 4 else empty_page for page in pages]
+
+    monkeypatch.setattr(arr, "_download_tab_pages", download)
+    data = arr.extract(httpserver_product_url, False, 0, None, 0)
+
+    assert [len(b) for b in batches] == [1, 3, 3, 1]
+    assert batches[3] == batches[1][:1]
+    assert data["failures"] == []
+    assert [r.url for r in data["reviews"]] == [
+        _get_page_url(httpserver_product_url, page)
+        for page in range(4)
+        for _ in range(3)
+    ]
+
+
+def test_attach_profiles_tabs(monkeypatch):
+    arr = Scraper(
+        have_browser_headless=True, tabs=2, profile_fields=["profile_num_reviews"]
+    )
+    batches = []
+
+    def download(urls, scroll_depth, check_status=True):
+        batches.append(urls)
+        return [
+            '<div class="a-row"><div class="a-section"><div class="a-section">'
+            '<div class="impact-cell"><span class="impact-text">'
+            f"{url.rsplit('/', 1)[1]}</span></div></div></div></div>"
+            for url in urls
+        ]
+
+    monkeypatch.setattr(arr, "_download_tab_pages", download)
+    urls = [f"https://profile/{i}" for i in [1, 2, 1, 3]]
+    reviews = [Review({"profile_link": url}) for url in urls]
+    arr._attach_profiles(reviews, RetryQueue())
+
+    assert batches == [urls[:2], urls[3:]]
+    assert [r.profile.to_dict()["profile_num_reviews"] for r in reviews] == [1, 2, 1, 3]
+    assert reviews[0].profile is reviews[2].profile
+
+
+def test_extract_parse_workers(httpserver_product_url, monkeypatch):
+    arr = Scraper(have_browser_headless=True, parse_workers=2, retry_backoff=0)
+    full_page = requests.get(_get_page_url(httpserver_product_url, 1)).text
+    empty_page = requests.get(_get_page_url(httpserver_product_url, 2)).text
+    downloaded = []
+
+    def download(url, scroll_depth):
+        page = int(url.split("pageNumber=")[1])
+        downloaded.append(page)
+        if page == 1 and downloaded.count(1) == 1:
+            raise HttpError(503)
+        return full_page if page < 4 else empty_page
+
+    monkeypatch.setattr(arr, "_get_html_data", download)
+    data = arr.extract(httpserver_product_url, False, 0, None, 0)
+
+    assert downloaded[:5] == [0, 1, 2, 3, 4]
+    assert downloaded[-1] == 1
+    assert max(downloaded) <= 6
+    assert data["failures"] == []
+    assert [r.url for r in data["reviews"]] == [
+        _get_page_url(httpserver_product_url, page)
+        for page in range(4)
+        for _ in range(3)
+    ]
+    assert data["reviews"][0].date == "2023/01/03"
+
+
+def test_attach_profiles_parse_workers(monkeypatch):
+    arr = Scraper(
+        have_browser_headless=True,
+        parse_workers=1,
+        profile_fields=["profile_num_reviews"],
+    )
+    monkeypatch.setattr(
+        arr,
+        "_get_html_data",
+        lambda url, scroll_depth: (
+            '<div class="a-row"><div class="a-section"><div class="a-section">'
+            '<div class="impact-cell"><span class="impact-text">'
+            f"{url.rsplit('/', 1)[1]}</span></div></div></div></div>"
+        ),
+    )
+    reviews = [Review({"profile_link": f"https://profile/{i}"}) for i in [1, 2, 1]]
+    arr._attach_profiles(reviews, RetryQueue())
+
+    assert [r.profile.to_dict()["profile_num_reviews"] for r in reviews] == [1, 2, 1]
+
+
+def test_attach_profiles_parse_workers_in_flight(monkeypatch):
+    arr = Scraper(have_browser_headless=True, parse_workers=2)
+    events = []
+
+    def download(url, scroll_depth):
+        events.append(f"download {url[-1]}")
+        return "<html></html>"
+
+    def submit(kind, url, html_page):
+        future = Future()
+        future.set_result({"profile_name": url})
+        return future
+
+    get_profile = arr._get_profile
+
+    def attach(url, retry_queue=None, html_page=None):
+        events.append(f"attach {url[-1]}")
+        return get_profile(url, retry_queue, html_page)
+
+    monkeypatch.setattr(arr, "_get_html_data", download)
+    monkeypatch.setattr(arr, "_submit_extraction", submit)
+    monkeypatch.setattr(arr, "_get_profile", attach)
+    reviews = [Review({"profile_link": f"https://profile/{i}"}) for i in range(4)]
+    arr._attach_profiles(reviews, RetryQueue())
+
+    assert events == [
+        "download 0",
+        "download 1",
+        "download 2",
+        "attach 0",
+        "download 3",
+        "attach 1",
+        "attach 2",
+        "attach 3",
+    ]
+    assert [r.profile.profile_name for r in reviews] == [
+        f"https://profile/{i}" for i in range(4)
+    ]
+
+
+class FakeLoadDriverManager:
+    def __init__(self, result):
+        self.result = result
+
+    def run(self, action, pages=1):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize(
+    "result, status",
+    [
+        ("<html></html>", 502),
+        ("<html></html>", None),
+        (TimeoutException("Timed out"), None),
+    ],
+)
+def test_get_html_data_reports_failing_proxy(monkeypatch, result, status):
+    pool = ProxyPool(["http://proxy:8080"])
+    arr = Scraper(have_browser_headless=True, proxy_pool=pool)
+    arr._drivers = FakeLoadDriverManager(result)
+    monkeypatch.setattr(arr, "_get_status", lambda: status)
+
+    try:
+        arr._get_html_data("https://product/", 0)
+    except (HttpError, TimeoutException):
+        pass
+    assert pool.proxies[0].requests == 1
+    assert pool.proxies[0].block_rate > 0.0
+
+
+def test_get_html_data_reports_healthy_proxy(monkeypatch):
+    pool = ProxyPool(["http://proxy:8080"])
+    arr = Scraper(have_browser_headless=True, proxy_pool=pool)
+    arr._drivers = FakeLoadDriverManager("<html></html>")
+    monkeypatch.setattr(arr, "_get_status", lambda: 200)
+
+    arr._get_html_data("https://product/", 0)
+    assert pool.proxies[0].requests == 1
+    assert pool.proxies[0].block_rate == 0.0
+
+
+def test_get_tab_pages_reports_failing_proxy():
+    pool = ProxyPool(["http://proxy:8080"])
+    arr = Scraper(have_browser_headless=True, proxy_pool=pool, tabs=2)
+    ok, timed_out = TabPage("https://profile/1"), TabPage("https://profile/2")
+    ok.html, ok.status = "<html></html>", 200
+    timed_out.error = TimeoutException("Timed out")
+    arr._drivers = FakeLoadDriverManager([ok, timed_out])
+
+    html_pages = arr._get_tab_pages([ok.url, timed_out.url], 0)
+    assert html_pages == [ok.html, timed_out.error]
+    assert pool.proxies[0].requests == 2
+    assert pool.proxies[0].block_rate > 0.0
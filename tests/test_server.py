@@ -0,0 +1,262 @@
+import json
+import threading
+
+from amarps.records import Profile, Review
+from amarps.server import create_server, ScraperPool, serve
+from click.testing import CliRunner
+import pytest
+import requests
+
+
+class FakeScraper:
+    def __init__(self):
+        self.cleared = 0
+        self.needs_human = False
+        self.warmed_up = False
+        self.max_requests = None
+        self.max_runtime = None
+
+    def warm_up(self):
+        self.warmed_up = True
+
+    def resume(self):
+        self.needs_human = False
+
+    def clear_profile_cache(self):
+        self.cleared += 1
+
+    def get_profile_data(self, url):
+        return {"profile_name": url}
+
+    def extract(
+        self,
+        link,
+        profiles,
+        start_page,
+        stop_page,
+        sleep_time,
+        on_page,
+        preflight,
+        profile_priority=None,
+        on_profile=None,
+    ):
+        if link == "fail":
+            raise RuntimeError("Failed")
+        for page in range(start_page, stop_page + 1):
+            review = Review(
+                {"title": f"{link} {page}", "url": link, "profile_link": "profile"}
+            )
+            review.profile = Profile(self.get_profile_data("profile"))
+            on_page([review])
+        if link == "retry":
+            on_profile("profile", Profile({"profile_name": "retried"}))
+        return {
+            "product_title": link,
+            "profile_priority": profile_priority,
+            "max_requests": self.max_requests,
+            "reviews": [],
+        }
+
+    def extract_sample(self, link, sample, sleep_time, on_page, on_profile=None):
+        on_page([Review({"title": f"{link} sample", "sampling_weight": 2.0})])
+        return {
+            "product_title": link,
+            "sampling": {
+                "seed": sample.seed,
+                "profile_fraction": sample.profile_fraction,
+            },
+            "reviews": [],
+        }
+
+
+RESULT = {"profile_priority": None, "max_requests": None}
+
+
+@pytest.fixture()
+def server_url():
+    server = create_server(ScraperPool(FakeScraper, 2), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post_job(server_url, job):
+    response = requests.post(f"{server_url}/jobs", json=job, stream=True)
+    return response, [json.loads(line) for line in response.iter_lines()]
+
+
+def test_serve_product_job(server_url):
+    response, lines = _post_job(
+        server_url, {"link": "product", "start_page": 1, "stop_page": 2}
+    )
+    assert response.status_code == 200
+    review = {"url": "product", "profile_link": "profile", "profile_name": "profile"}
+    assert lines == [
+        {"reviews": [{**review, "title": "product 1"}]},
+        {"reviews": [{**review, "title": "product 2"}]},
+        {"result": {**RESULT, "product_title": "product"}},
+    ]
+
+
+def test_serve_product_job_layout_profiles(server_url):
+    _, lines = _post_job(
+        server_url,
+        {"link": "product", "start_page": 1, "stop_page": 2, "layout": "profiles"},
+    )
+    review = {"url": "product", "profile_link": "profile"}
+    assert lines == [
+        {
+            "reviews": [{**review, "title": "product 1"}],
+            "profiles": {"profile": {"profile_name": "profile"}},
+        },
+        {"reviews": [{**review, "title": "product 2"}], "profiles": {}},
+        {"result": {**RESULT, "product_title": "product"}},
+    ]
+
+
+def test_serve_product_job_retried_profile(server_url):
+    _, lines = _post_job(server_url, {"link": "retry", "start_page": 1, "stop_page": 1})
+    assert lines[1:] == [
+        {"profiles": {"profile": {"profile_name": "retried"}}},
+        {"result": {**RESULT, "product_title": "retry"}},
+    ]
+
+
+def test_serve_product_job_options(server_url):
+    _, lines = _post_job(
+        server_url,
+        {
+            "link": "product",
+            "stop_page": 0,
+            "profile_priority": ["found_helpful"],
+            "max_requests": 5,
+        },
+    )
+    assert lines[-1] == {
+        "result": {
+            "product_title": "product",
+            "profile_priority": ["found_helpful"],
+            "max_requests": 5,
+        }
+    }
+
+
+def test_serve_sample_job(server_url):
+    _, lines = _post_job(
+        server_url,
+        {"link": "product", "sample": 3, "sample_seed": 1, "profiles": False},
+    )
+    assert lines == [
+        {"reviews": [{"title": "product sample", "sampling_weight": 2.0}]},
+        {
+            "result": {
+                "product_title": "product",
+                "sampling": {"seed": 1, "profile_fraction": 0},
+            }
+        },
+    ]
+
+
+def test_serve_profile_job(server_url):
+    _, lines = _post_job(server_url, {"link": "profile", "profile_link": True})
+    assert lines == [{"result": {"profile_name": "profile"}}]
+
+
+def test_serve_failing_job(server_url):
+    _, lines = _post_job(server_url, {"link": "fail", "stop_page": 1})
+    assert lines == [{"result": {"error": "Failed"}}]
+
+
+@pytest.mark.parametrize(
+    "job",
+    [
+        [],
+        {"start_page": 1},
+        {"link": "a", "unknown": 1},
+        {"link": "a", "layout": "a"},
+        {"link": "a", "profile_priority": ["unknown"]},
+        {"link": "a", "profile_priority": "reviews"},
+        {"link": "a", "sample_profiles": 2},
+    ],
+)
+def test_serve_invalid_job(server_url, job):
+    response = requests.post(f"{server_url}/jobs", json=job)
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_serve_status(server_url):
+    response = requests.get(f"{server_url}/status")
+    assert response.json() == {
+        "queue_depth": 0,
+        "running": 0,
+        "scrapers": 2,
+        "needs_human": 0,
+    }
+
+
+def test_serve_resume(server_url):
+    response = requests.post(f"{server_url}/resume")
+    assert response.json() == {"resumed": 0}
+
+
+def test_ScraperPool_warms_up_scrapers():
+    pool = ScraperPool(FakeScraper, 2)
+    assert all(s.warmed_up for s in pool._all_scrapers)
+
+
+def test_ScraperPool_resume():
+    pool = ScraperPool(FakeScraper, 2)
+    pool._all_scrapers[1].needs_human = True
+    assert pool.status()["needs_human"] == 1
+
+    assert pool.resume() == 1
+    assert pool.status()["needs_human"] == 0
+
+
+def test_serve_unknown_path(server_url):
+    assert requests.get(f"{server_url}/unknown").status_code == 404
+
+
+def test_ScraperPool_queue_depth():
+    pool = ScraperPool(FakeScraper, 1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_job(scraper):
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=pool.run, args=(blocking_job,))
+    thread.start()
+    started.wait(5)
+    waiting = threading.Thread(target=pool.run, args=(lambda scraper: None,))
+    waiting.start()
+    while pool.status()["queue_depth"] == 0:
+        pass
+
+    assert pool.status()["queue_depth"] == 1
+    assert pool.status()["running"] == 1
+    release.set()
+    thread.join()
+    waiting.join()
+    assert pool.status() == {
+        "queue_depth": 0,
+        "running": 0,
+        "scrapers": 1,
+        "needs_human": 0,
+    }
+
+
+def test_serve_rejects_unknown_review_fields():
+    result = CliRunner().invoke(serve, ["--review-fields", "unknown"])
+    assert result.exit_code == 2
+    assert "--review-fields" in result.output
+
+
+def test_serve_rejects_zero_workers():
+    result = CliRunner().invoke(serve, ["--workers", "0"])
+    assert result.exit_code == 2
+    assert "--workers" in result.output
@@ -0,0 +1,47 @@
+from amarps.sessions import SessionPool
+import pytest
+
+
+def test_Session_cookies(tmp_path):
+    session = SessionPool(tmp_path, 1).current
+    assert session.user_data_dir.is_dir()
+    assert session.load_cookies() == []
+
+    cookies = [{"name": "session-id", "value": "123", "domain": ".amazon.com"}]
+    session.save_cookies(cookies)
+    assert SessionPool(tmp_path, 1).current.load_cookies() == cookies
+
+
+def test_Session_invalidate(tmp_path):
+    session = SessionPool(tmp_path, 1).current
+    session.save_cookies([{"name": "session-id", "value": "123"}])
+    (session.user_data_dir / "Cookies").write_text("")
+
+    session.invalidate()
+    assert session.load_cookies() == []
+    assert list(session.user_data_dir.iterdir()) == []
+
+
+def test_SessionPool_rotates(tmp_path):
+    pool = SessionPool(tmp_path, 2, max_pages=2)
+    first = pool.current
+    assert not pool.page_done()
+    assert pool.page_done()
+
+    assert pool.rotate() is not first
+    assert pool.pages == 0
+    assert pool.rotate() is first
+
+
+def test_SessionPool_invalidate(tmp_path):
+    pool = SessionPool(tmp_path, 2)
+    first = pool.current
+    first.save_cookies([{"name": "session-id", "value": "123"}])
+
+    assert pool.invalidate() is not first
+    assert first.load_cookies() == []
+
+
+def test_SessionPool_invalid_size(tmp_path):
+    with pytest.raises(ValueError):
+        SessionPool(tmp_path, 0)
@@ -0,0 +1,129 @@
+from amarps.tabs import _IS_LOADED_SCRIPT, _NAVIGATE_SCRIPT, get_status, TabLoader
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+
+class FakeTab:
+    def __init__(self):
+        self.url = "about:blank"
+        self.polls_until_loaded = 0
+        self.scrolled = False
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current = handle
+
+    def new_window(self, kind):
+        handle = f"tab{len(self.driver.tabs)}"
+        self.driver.tabs[handle] = FakeTab()
+        self.driver.current = handle
+
+
+class FakeDriver:
+    """Browser with tabs, a page loads after as many polls as its page number"""
+
+    def __init__(self, statuses=None):
+        self.tabs = {"tab0": FakeTab()}
+        self.current = "tab0"
+        self.switch_to = FakeSwitchTo(self)
+        self.statuses = statuses or {}
+        self.log = []
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def current_url(self):
+        return self.tabs[self.current].url
+
+    @property
+    def page_source(self):
+        return f"<html>{self.current_url}</html>"
+
+    def execute_script(self, script, *args):
+        tab = self.tabs[self.current]
+        if script == _NAVIGATE_SCRIPT:
+            self.log.append(("navigate", args[0]))
+            tab.url = args[0]
+            tab.polls_until_loaded = int(args[0].rsplit("/", 1)[1])
+        elif script == _IS_LOADED_SCRIPT:
+            tab.polls_until_loaded -= 1
+            return tab.polls_until_loaded < 0
+        elif script.startswith("window.scrollTo"):
+            self.log.append(("read", tab.url))
+        elif "navigation" in script:
+            return self.statuses.get(tab.url, 200)
+
+
+@pytest.fixture()
+def loader(monkeypatch):
+    monkeypatch.setattr("amarps.tabs.random.random", lambda: 0)
+    return TabLoader(3, page_load_timeout=5, poll_interval=0)
+
+
+def test_TabLoader_loads_pages_at_the_same_time(loader):
+    driver = FakeDriver({"https://page/1": 404})
+    urls = ["https://page/2", "https://page/0", "https://page/1"]
+
+    pages = loader.load(urls, 100, driver)
+
+    assert [p.url for p in pages] == urls
+    assert [p.html for p in pages] == [f"<html>{url}</html>" for url in urls]
+    assert [p.status for p in pages] == [200, 200, 404]
+    assert all(p.error is None for p in pages)
+    assert len(driver.tabs) == 3
+    assert [action for action, _ in driver.log[:3]] == ["navigate"] * 3
+    assert [url for action, url in driver.log if action == "read"] == [
+        "https://page/0",
+        "https://page/1",
+        "https://page/2",
+    ]
+
+
+def test_TabLoader_reuses_tabs(loader):
+    driver = FakeDriver()
+    loader.load(["https://page/0", "https://page/0"], 0, driver)
+    loader.load(["https://page/0"], 0, driver)
+    assert len(driver.tabs) == 2
+
+
+def test_TabLoader_times_out_slow_pages(loader):
+    loader.page_load_timeout = 0
+    driver = FakeDriver()
+
+    pages = loader.load(["https://page/0", "https://page/1000000"], 0, driver)
+
+    assert pages[0].html is not None
+    assert isinstance(pages[1].error, TimeoutException)
+    assert pages[1].html is None
+
+
+def test_TabLoader_too_many_urls(loader):
+    with pytest.raises(ValueError):
+        loader.load(["https://page/0"] * 4, 0, FakeDriver())
+
+
+def test_TabLoader_invalid_size():
+    with pytest.raises(ValueError):
+        TabLoader(0)
+
+
+class FakeRequest:
+    def __init__(self, url, status_code):
+        self.url = url
+        self.response = type("Response", (), {"status_code": status_code})
+
+
+def test_get_status_falls_back_to_requests():
+    driver = FakeDriver({"https://page/0": None})
+    driver.tabs["tab0"].url = "https://page/0"
+    driver.requests = [
+        FakeRequest("https://page/0", 503),
+        FakeRequest("https://other/", 200),
+    ]
+    assert get_status(driver) == 503
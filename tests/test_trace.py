@@ -0,0 +1,98 @@
+import json
+import threading
+
+from amarps import trace
+from amarps.trace import span, start_tracing, stop_tracing, TracedFormatter, Tracer
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.5
+        return self.now
+
+
+@pytest.fixture()
+def tracer():
+    tracer = start_tracing()
+    yield tracer
+    stop_tracing()
+
+
+def test_Tracer_span():
+    tracer = Tracer(clock=FakeClock())
+    with tracer.span("download", "navigate", url="https://product/"):
+        pass
+
+    events = tracer.to_dict()["traceEvents"]
+    assert events[0]["ph"] == "M"
+    assert events[0]["args"] == {"name": threading.current_thread().name}
+    assert events[1] == {
+        "name": "download",
+        "cat": "navigate",
+        "ph": "X",
+        "ts": 500000.0,
+        "dur": 500000.0,
+        "pid": events[0]["pid"],
+        "tid": threading.get_ident(),
+        "args": {"url": "https://product/"},
+    }
+
+
+def test_Tracer_span_records_errors():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("extract", "extract"):
+            raise ValueError()
+    assert tracer.to_dict()["traceEvents"][-1]["name"] == "extract"
+
+
+def test_Tracer_threads():
+    tracer = Tracer()
+
+    def work():
+        with tracer.span("profile", "profile"):
+            pass
+
+    threads = [threading.Thread(target=work, name=f"worker {i}") for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    events = tracer.to_dict()["traceEvents"]
+    names = [e["args"]["name"] for e in events if e["ph"] == "M"]
+    assert sorted(names) == ["worker 0", "worker 1"]
+
+
+def test_span_without_tracing():
+    assert not trace.is_tracing()
+    with span("download"):
+        pass
+
+
+def test_span_write(tracer, tmp_path):
+    with span("download", url="https://product/"):
+        with span("get", "navigate"):
+            pass
+    path = tmp_path / "trace.json"
+    tracer.write(path)
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["name"] for e in events if e["ph"] == "X"] == ["get", "download"]
+
+
+def test_TracedFormatter(tracer):
+    class Upper:
+        name = "Upper"
+
+        def format(self, value):
+            return value.upper()
+
+    formatter = TracedFormatter(Upper())
+    assert formatter.name == "Upper"
+    assert formatter.format("a") == "A"
+    assert tracer.to_dict()["traceEvents"][-1]["cat"] == "format"